@@ -234,16 +234,21 @@ class PathExpression:
         else:
             self.parsed_jsonpath = parse_jsonpath(jsonpath_expression)
 
-    def jsonpath_for_context(self, ctx: "ChangeTypeContext") -> jsonpath_ng.JSONPath:
+    def expression_for_context(self, ctx: "ChangeTypeContext") -> str:
         if self.parsed_jsonpath:
-            return self.parsed_jsonpath
+            return self.jsonpath_expression
 
-        expr = self.template.render(
+        return self.template.render(
             {
                 self.CTX_FILE_PATH_VAR_NAME: ctx.context_file.path,
             }
         )
-        return parse_jsonpath(expr)
+
+    def jsonpath_for_context(self, ctx: "ChangeTypeContext") -> jsonpath_ng.JSONPath:
+        if self.parsed_jsonpath:
+            return self.parsed_jsonpath
+
+        return parse_jsonpath(self.expression_for_context(ctx))
 
     def __eq__(self, obj: object) -> bool:
         return (
@@ -252,6 +257,39 @@ class PathExpression:
         )
 
 
+class JsonPathFinder:
+    """
+    Finds the paths within a file content that match jsonpath expressions.
+    The results are kept per expression, so change-types and contexts sharing
+    the same expressions evaluate them only once per file.
+    """
+
+    def __init__(self, content: Any):
+        self.content = content
+        self._found: dict[str, list[jsonpath_ng.JSONPath]] = {}
+        self._path_strs: dict[int, tuple[jsonpath_ng.JSONPath, str]] = {}
+
+    def find(self, jsonpath_expression: str) -> list[jsonpath_ng.JSONPath]:
+        if jsonpath_expression not in self._found:
+            self._found[jsonpath_expression] = [
+                p.full_path
+                for p in parse_jsonpath(jsonpath_expression).find(self.content)
+            ]
+        return self._found[jsonpath_expression]
+
+    def path_str(self, path: jsonpath_ng.JSONPath) -> str:
+        """
+        the string representation of a path, remembered for the paths
+        returned by `find`
+        """
+        cached = self._path_strs.get(id(path))
+        if cached and cached[0] is path:
+            return cached[1]
+        path_str = str(path)
+        self._path_strs[id(path)] = (path, path_str)
+        return path_str
+
+
 @dataclass
 class OwnershipContext:
     selector: jsonpath_ng.JSONPath
@@ -544,22 +582,33 @@ class ChangeTypeProcessor:
         return contexts
 
     def allowed_changed_paths(
-        self, file_ref: FileRef, file_content: Any, ctx: "ChangeTypeContext"
+        self,
+        file_ref: FileRef,
+        file_content: Any,
+        ctx: "ChangeTypeContext",
+        finder: Optional[JsonPathFinder] = None,
     ) -> list[jsonpath_ng.JSONPath]:
         """
         find all paths within the provide file_content, that are covered by this
         ChangeTypeV1. the paths are represented as jsonpath expressions pinpointing
         the root element that can be changed
+
+        a JsonPathFinder for the file_content can be passed to share the
+        jsonpath evaluations with other change-types and contexts
         """
+        finder = finder or JsonPathFinder(file_content)
         paths = self._allowed_changed_paths_for_file_type_and_schema(
-            file_ref.file_type, file_ref.schema, file_content, ctx
+            file_ref.file_type, file_ref.schema, finder, ctx
         )
 
         # lets also check for allowed paths that are not specific to a schema
+        path_strs = {finder.path_str(p) for p in paths}
         for p in self._allowed_changed_paths_for_file_type_and_schema(
-            file_ref.file_type, None, file_content, ctx
+            file_ref.file_type, None, finder, ctx
         ):
-            if p not in paths:
+            path_str = finder.path_str(p)
+            if path_str not in path_strs:
+                path_strs.add(path_str)
                 paths.append(p)
         return paths
 
@@ -567,7 +616,7 @@ class ChangeTypeProcessor:
         self,
         file_type: BundleFileType,
         file_schema: Optional[str],
-        file_content: Any,
+        finder: JsonPathFinder,
         ctx: "ChangeTypeContext",
     ) -> list[jsonpath_ng.JSONPath]:
         paths = []
@@ -579,12 +628,7 @@ class ChangeTypeProcessor:
                 (file_type, file_schema)
             ]:
                 paths.extend(
-                    [
-                        p.full_path
-                        for p in change_type_path_expression.jsonpath_for_context(
-                            ctx
-                        ).find(file_content)
-                    ]
+                    finder.find(change_type_path_expression.expression_for_context(ctx))
                 )
         return paths
 
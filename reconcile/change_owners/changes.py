@@ -1,6 +1,7 @@
 import copy
 import itertools
 import logging
+from bisect import bisect_left
 from collections import defaultdict
 from collections.abc import Sequence
 from dataclasses import (
@@ -22,10 +23,12 @@ from reconcile.change_owners.bundle import (
     QontractServerDiff,
 )
 from reconcile.change_owners.change_types import (
+    JSON_PATH_ROOT,
     ChangeTypeContext,
     ChangeTypePriority,
     ChangeTypeProcessor,
     DiffCoverage,
+    JsonPathFinder,
 )
 from reconcile.change_owners.diff import (
     Diff,
@@ -41,6 +44,45 @@ The path used to represent a metadata only change.
 """
 
 
+class DiffCoverageIndex:
+    """
+    Looks up the DiffCoverages related to a changed path by the string
+    representation of their diff paths, instead of comparing the path with
+    every diff. The lookups follow `DiffCoverage.changed_path_covered_by_path`
+    and `DiffCoverage.path_under_changed_path` and return positions within
+    the indexed list of DiffCoverages.
+    """
+
+    def __init__(self, diff_coverages: Sequence[DiffCoverage]):
+        self._positions: dict[str, list[int]] = defaultdict(list)
+        for i, dc in enumerate(diff_coverages):
+            self._positions[dc.diff.path_str()].append(i)
+        self._sorted_paths = sorted(self._positions)
+        self._size = len(diff_coverages)
+
+    def covered_by(self, path: str) -> set[int]:
+        """positions of the diffs covered entirely by the path"""
+        if path == JSON_PATH_ROOT:
+            return set(range(self._size))
+        positions = set()
+        for diff_path in itertools.islice(
+            self._sorted_paths, bisect_left(self._sorted_paths, path), None
+        ):
+            if not diff_path.startswith(path):
+                break
+            positions.update(self._positions[diff_path])
+        return positions
+
+    def containing(self, path: str) -> set[int]:
+        """positions of the diffs the path is only a part of"""
+        positions = set()
+        for end in range(1, len(path)):
+            positions.update(self._positions.get(path[:end], []))
+        if path != JSON_PATH_ROOT:
+            positions.update(self._positions.get(JSON_PATH_ROOT, []))
+        return positions
+
+
 @dataclass
 class BundleFileChange:
     """
@@ -60,6 +102,13 @@ class BundleFileChange:
 
     def __post_init__(self) -> None:
         self._diff_coverage = {d.path_str(): DiffCoverage(d, []) for d in self.diffs}
+        # the diffs and file contents don't change, so the lookup structures
+        # are shared by all change-type contexts covering changes in this file
+        self._diff_indexes: dict[
+            tuple[DiffType, ...], tuple[list[DiffCoverage], DiffCoverageIndex]
+        ] = {}
+        self._old_paths = JsonPathFinder(self.old)
+        self._new_paths = JsonPathFinder(self.new)
 
     def _metadata_only_diff_coverage(self) -> DiffCoverage:
         if not self.metadata_only_change:
@@ -128,37 +177,41 @@ class BundleFileChange:
         # observe the new state for added fields or list items or entire object sutrees
         covered_diffs.update(
             self._cover_changes_for_diffs(
-                self._filter_diffs([DiffType.ADDED, DiffType.CHANGED]),
-                self.new,
+                (DiffType.ADDED, DiffType.CHANGED),
+                self._new_paths,
                 change_type_context,
             )
         )
         # look at the old state for removed fields or list items or object subtrees
         covered_diffs.update(
             self._cover_changes_for_diffs(
-                self._filter_diffs([DiffType.REMOVED]), self.old, change_type_context
+                (DiffType.REMOVED,), self._old_paths, change_type_context
             )
         )
 
     def _cover_changes_for_diffs(
         self,
-        diffs: list[DiffCoverage],
-        file_content: Any,
+        diff_types: tuple[DiffType, ...],
+        finder: JsonPathFinder,
         change_type_context: ChangeTypeContext,
     ) -> dict[str, Diff]:
 
         covered_diffs = {}
+        diffs, index = self._indexed_diffs(diff_types)
         if diffs:
             for (
                 allowed_path
             ) in change_type_context.change_type_processor.allowed_changed_paths(
-                self.fileref, file_content, change_type_context
+                self.fileref, finder.content, change_type_context, finder
             ):
-                for dc in diffs:
-                    if dc.changed_path_covered_by_path(allowed_path):
+                allowed_path_str = finder.path_str(allowed_path)
+                covered = index.covered_by(allowed_path_str)
+                for i in sorted(covered | index.containing(allowed_path_str)):
+                    dc = diffs[i]
+                    if i in covered:
                         covered_diffs[dc.diff.path_str()] = dc.diff
                         dc.coverage.append(change_type_context)
-                    elif dc.path_under_changed_path(allowed_path):
+                    else:
                         # the self-service path allowed by the change-type is covering
                         # only parts of the diff. we will split the diff into a
                         # smaller part, that can be covered by the change-type.
@@ -169,10 +222,18 @@ class BundleFileChange:
                             raise Exception(
                                 f"unable to create a subdiff for path {allowed_path} on diff {dc.diff.path_str()}"
                             )
-                        covered_diffs[str(allowed_path)] = sub_dc.diff
+                        covered_diffs[allowed_path_str] = sub_dc.diff
 
         return covered_diffs
 
+    def _indexed_diffs(
+        self, diff_types: tuple[DiffType, ...]
+    ) -> tuple[list[DiffCoverage], DiffCoverageIndex]:
+        if diff_types not in self._diff_indexes:
+            diffs = self._filter_diffs(list(diff_types))
+            self._diff_indexes[diff_types] = (diffs, DiffCoverageIndex(diffs))
+        return self._diff_indexes[diff_types]
+
     def _filter_diffs(self, diff_types: list[DiffType]) -> list[DiffCoverage]:
         return [
             d for d in self._diff_coverage.values() if d.diff.diff_type in diff_types
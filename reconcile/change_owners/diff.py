@@ -135,16 +135,319 @@ def compare_object_ctx_identifier(
 
 
 def extract_diffs(old_file_content: Any, new_file_content: Any) -> list[Diff]:
-    diffs: list[Diff] = []
+    """
+    Finds the differences between two versions of a file.
+
+    List items are compared regardless of their order. Dicts, scalars and lists
+    where items were only added or only removed are diffed in a single pass.
+    Lists where items were added and removed at the same time are handed to
+    `deepdiff`, which pairs them by identifier or similarity. The result is the
+    same as diffing the whole file with `_extract_diffs_with_deepdiff`.
+    """
     if old_file_content and new_file_content:
-        deep_diff = DeepDiff(
-            old_file_content,
-            new_file_content,
-            ignore_order=True,
-            iterable_compare_func=compare_object_ctx_identifier,
-            cutoff_intersection_for_pairs=1,
+        collector = _DiffCollector()
+        collector.diff(old_file_content, new_file_content, ())
+        return collector.diffs()
+    return _extract_diffs_with_deepdiff(old_file_content, new_file_content)
+
+
+def _is_private_key(key: Any) -> bool:
+    # deepdiff ignores private keys like __identifier
+    return isinstance(key, str) and key.startswith("__")
+
+
+def _canonical(value: Any) -> Any:
+    """
+    A hashable representation of a value, equal for all values deepdiff
+    considers equal when ignoring the order of list items: lists are compared
+    as sets, private keys are ignored and ints and floats are compared by
+    their numeric value.
+    """
+    if isinstance(value, dict):
+        return (
+            "dict",
+            frozenset(
+                (k, _canonical(v)) for k, v in value.items() if not _is_private_key(k)
+            ),
+        )
+    if isinstance(value, list):
+        return ("list", frozenset(_canonical(i) for i in value))
+    if isinstance(value, bool):
+        return ("bool", value)
+    if isinstance(value, (int, float)):
+        return ("number", value)
+    if value is None or isinstance(value, str):
+        return (type(value).__name__, value)
+    return (type(value).__name__, str(value))
+
+
+JsonPathParts = tuple[jsonpath_ng.JSONPath, ...]
+
+
+def _build_path(parts: JsonPathParts) -> jsonpath_ng.JSONPath:
+    if parts:
+        return reduce(lambda a, b: a.child(b), parts)
+    return jsonpath_ng.Root()
+
+
+class _DiffCollector:
+    """
+    Walks two versions of a file and collects the diffs grouped the same way
+    `_extract_diffs_with_deepdiff` reports them.
+    """
+
+    def __init__(self) -> None:
+        self.changed: list[Diff] = []
+        self.property_added: list[Diff] = []
+        self.property_removed: list[Diff] = []
+        self.item_added: list[Diff] = []
+        self.item_removed: list[Diff] = []
+
+    def diffs(self) -> list[Diff]:
+        return (
+            self.changed
+            + self.property_added
+            + self.property_removed
+            + self.item_added
+            + self.item_removed
         )
 
+    def diff(self, old: Any, new: Any, parts: JsonPathParts) -> None:
+        if old is new or type(old) is not type(new):
+            # deepdiff reports type changes separately, they are not
+            # part of the extracted diffs
+            return
+        if isinstance(old, dict):
+            self._diff_dict(old, new, parts)
+        elif isinstance(old, list):
+            self._diff_list(old, new, parts)
+        elif old != new:
+            self.changed.append(
+                Diff(
+                    path=_build_path(parts),
+                    diff_type=DiffType.CHANGED,
+                    old=old,
+                    new=new,
+                )
+            )
+
+    def _diff_dict(
+        self, old: dict[Any, Any], new: dict[Any, Any], parts: JsonPathParts
+    ) -> None:
+        for key, value in new.items():
+            if key not in old and not _is_private_key(key):
+                self.property_added.append(
+                    Diff(
+                        path=_build_path(parts + (_jsonpath_part(str(key)),)),
+                        diff_type=DiffType.ADDED,
+                        old=None,
+                        new=value,
+                    )
+                )
+        for key, value in old.items():
+            if key not in new and not _is_private_key(key):
+                self.property_removed.append(
+                    Diff(
+                        path=_build_path(parts + (_jsonpath_part(str(key)),)),
+                        diff_type=DiffType.REMOVED,
+                        old=value,
+                        new=None,
+                    )
+                )
+        for key, value in new.items():
+            if key in old and not _is_private_key(key):
+                self.diff(old[key], value, parts + (_jsonpath_part(str(key)),))
+
+    def _diff_list(self, old: list[Any], new: list[Any], parts: JsonPathParts) -> None:
+        old_hashes = [_canonical(i) for i in old]
+        new_hashes = [_canonical(i) for i in new]
+        removed = _first_indexes(old_hashes, exclude=set(new_hashes))
+        added = _first_indexes(new_hashes, exclude=set(old_hashes))
+        if removed and added:
+            self._pair_with_deepdiff(old, new, removed, added, parts)
+            return
+        for i in added:
+            self.item_added.append(
+                Diff(
+                    path=_build_path(parts + (jsonpath_ng.Index(i),)),
+                    diff_type=DiffType.ADDED,
+                    old=None,
+                    new=new[i],
+                )
+            )
+        for i in removed:
+            self.item_removed.append(
+                Diff(
+                    path=_build_path(parts + (jsonpath_ng.Index(i),)),
+                    diff_type=DiffType.REMOVED,
+                    old=old[i],
+                    new=None,
+                )
+            )
+
+    def _pair_with_deepdiff(
+        self,
+        old: list[Any],
+        new: list[Any],
+        removed: list[int],
+        added: list[int],
+        parts: JsonPathParts,
+    ) -> None:
+        """
+        Let deepdiff pair the removed and added items of a list, e.g. by their
+        identifier, and diff them. Items present in both lists are never
+        paired by deepdiff, so they are left out.
+
+        deepdiff reports an added and a removed item with the same index as
+        a changed value. The removed and added items are placed at distinct
+        indexes, so this can be done with their indexes in the whole list.
+        """
+        filler = [_LIST_FILLER] * len(removed)
+        deep_diff = _deepdiff(
+            [old[i] for i in removed] + filler,
+            filler + [new[i] for i in added],
+        )
+
+        def list_path(deep_diff_path: str, added_item: bool = False) -> JsonPathParts:
+            # deepdiff reports paired items with the index of the old item
+            index, *rest = _deepdiff_path_parts(deep_diff_path)
+            if added_item and not rest:
+                i = added[index.index - len(removed)]
+            else:
+                i = removed[index.index]
+            return (jsonpath_ng.Index(i), *rest)
+
+        def find(list_parts: JsonPathParts, content: list[Any]) -> Any:
+            # the index of the old item does not necessarily exist in the
+            # new content
+            try:
+                found = _build_path(list_parts).find(content)
+            except (KeyError, TypeError):
+                return None
+            return found[0].value if found else None
+
+        for p, change in deep_diff.get("values_changed", {}).items():
+            self.changed.append(
+                Diff(
+                    path=_build_path(parts + list_path(p)),
+                    diff_type=DiffType.CHANGED,
+                    old=change.get("old_value"),
+                    new=change.get("new_value"),
+                )
+            )
+        for p in deep_diff.get("dictionary_item_added", []):
+            self.property_added.append(
+                Diff(
+                    path=_build_path(parts + list_path(p)),
+                    diff_type=DiffType.ADDED,
+                    old=None,
+                    new=find(list_path(p), new),
+                )
+            )
+        for p in deep_diff.get("dictionary_item_removed", []):
+            self.property_removed.append(
+                Diff(
+                    path=_build_path(parts + list_path(p)),
+                    diff_type=DiffType.REMOVED,
+                    old=find(list_path(p), old),
+                    new=None,
+                )
+            )
+
+        items_added: dict[int, Any] = {}
+        for p, change in deep_diff.get("iterable_item_added", {}).items():
+            list_parts = list_path(p, added_item=True)
+            if len(list_parts) == 1:
+                items_added[list_parts[0].index] = change
+            else:
+                self.item_added.append(
+                    Diff(
+                        path=_build_path(parts + list_parts),
+                        diff_type=DiffType.ADDED,
+                        old=None,
+                        new=change,
+                    )
+                )
+        items_removed: dict[int, Any] = {}
+        for p, change in deep_diff.get("iterable_item_removed", {}).items():
+            list_parts = list_path(p)
+            if len(list_parts) == 1:
+                items_removed[list_parts[0].index] = change
+            else:
+                self.item_removed.append(
+                    Diff(
+                        path=_build_path(parts + list_parts),
+                        diff_type=DiffType.REMOVED,
+                        old=change,
+                        new=None,
+                    )
+                )
+
+        for i, change in items_added.items():
+            if i in items_removed:
+                self.changed.append(
+                    Diff(
+                        path=_build_path(parts + (jsonpath_ng.Index(i),)),
+                        diff_type=DiffType.CHANGED,
+                        old=items_removed.pop(i),
+                        new=change,
+                    )
+                )
+            else:
+                self.item_added.append(
+                    Diff(
+                        path=_build_path(parts + (jsonpath_ng.Index(i),)),
+                        diff_type=DiffType.ADDED,
+                        old=None,
+                        new=change,
+                    )
+                )
+        for i, change in items_removed.items():
+            self.item_removed.append(
+                Diff(
+                    path=_build_path(parts + (jsonpath_ng.Index(i),)),
+                    diff_type=DiffType.REMOVED,
+                    old=change,
+                    new=None,
+                )
+            )
+
+
+class _ListFiller:
+    """Hashed equally by deepdiff, but never equal to any file content."""
+
+
+_LIST_FILLER = _ListFiller()
+
+
+def _first_indexes(hashes: list[Any], exclude: set[Any]) -> list[int]:
+    """Index of the first occurrence of every hash not in `exclude`."""
+    seen = set()
+    indexes = []
+    for i, h in enumerate(hashes):
+        if h not in exclude and h not in seen:
+            seen.add(h)
+            indexes.append(i)
+    return indexes
+
+
+def _deepdiff(old: Any, new: Any) -> DeepDiff:
+    return DeepDiff(
+        old,
+        new,
+        ignore_order=True,
+        iterable_compare_func=compare_object_ctx_identifier,
+        cutoff_intersection_for_pairs=1,
+    )
+
+
+def _extract_diffs_with_deepdiff(
+    old_file_content: Any, new_file_content: Any
+) -> list[Diff]:
+    diffs: list[Diff] = []
+    if old_file_content and new_file_content:
+        deep_diff = _deepdiff(old_file_content, new_file_content)
+
         # handle changed values
         diffs.extend(
             [
@@ -247,17 +550,17 @@ def deepdiff_path_to_jsonpath(deep_diff_path: str) -> jsonpath_ng.JSONPath:
     if not deep_diff_path.startswith("root"):
         raise ValueError("a deepdiff path must start with 'root'")
 
-    def build_jsonpath_part(element: str) -> jsonpath_ng.JSONPath:
-        if element.isdigit():
-            return jsonpath_ng.Index(int(element))
+    return _build_path(_deepdiff_path_parts(deep_diff_path))
 
-        if "." in element:
-            return jsonpath_ng.Fields(f"'{element}'")
-        return jsonpath_ng.Fields(element)
 
-    path_parts = [
-        build_jsonpath_part(p) for p in DEEP_DIFF_RE.findall(deep_diff_path[4:])
-    ]
-    if path_parts:
-        return reduce(lambda a, b: a.child(b), path_parts)
-    return jsonpath_ng.Root()
+def _deepdiff_path_parts(deep_diff_path: str) -> JsonPathParts:
+    return tuple(_jsonpath_part(p) for p in DEEP_DIFF_RE.findall(deep_diff_path[4:]))
+
+
+def _jsonpath_part(element: str) -> jsonpath_ng.JSONPath:
+    if element.isdigit():
+        return jsonpath_ng.Index(int(element))
+
+    if "." in element:
+        return jsonpath_ng.Fields(f"'{element}'")
+    return jsonpath_ng.Fields(element)
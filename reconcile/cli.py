@@ -1036,6 +1036,11 @@ def openshift_resources(
 @click.option("--saas-file-name", default=None, help="saas-file to act on.")
 @click.option("--env-name", default=None, help="environment to deploy to.")
 @trigger_reason
+@click.option(
+    "--incremental/--no-incremental",
+    default=False,
+    help="only render targets which changed since their last deployment.",
+)
 @click.pass_context
 def openshift_saas_deploy(
     ctx,
@@ -1046,6 +1051,7 @@ def openshift_saas_deploy(
     env_name,
     gitlab_project_id,
     trigger_reason,
+    incremental,
 ):
     import reconcile.openshift_saas_deploy
 
@@ -1059,6 +1065,7 @@ def openshift_saas_deploy(
         env_name=env_name,
         gitlab_project_id=gitlab_project_id,
         trigger_reason=trigger_reason,
+        incremental=incremental,
     )
 
 
@@ -1458,9 +1465,12 @@ def gcr_mirror(ctx):
     help="Only considers this image to mirror. It can be specified multiple times.",
     multiple=True,
 )
+@threaded()
 @click.pass_context
 @binary(["skopeo"])
-def quay_mirror(ctx, control_file_dir, compare_tags, compare_tags_interval, image):
+def quay_mirror(
+    ctx, control_file_dir, compare_tags, compare_tags_interval, image, thread_pool_size
+):
     import reconcile.quay_mirror
 
     run_integration(
@@ -1470,6 +1480,7 @@ def quay_mirror(ctx, control_file_dir, compare_tags, compare_tags_interval, imag
         compare_tags,
         compare_tags_interval,
         image,
+        thread_pool_size,
     )
 
 
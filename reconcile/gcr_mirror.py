@@ -15,11 +15,16 @@ from sretoolbox.container.skopeo import SkopeoCmdError
 
 from reconcile import queries
 from reconcile.utils import gql
+from reconcile.utils.mirror_digest_index import (
+    MirrorDigestIndex,
+    mirror_digests,
+)
 from reconcile.utils.secret_reader import SecretReader
 
 _LOG = logging.getLogger(__name__)
 
 QONTRACT_INTEGRATION = "gcr-mirror"
+DIGEST_INDEX_FILE_NAME = "qontract-reconcile-gcr-mirror.digests.json"
 
 
 class QuayMirror:
@@ -71,6 +76,9 @@ class QuayMirror:
         self.secret_reader = SecretReader(settings=settings)
         self.skopeo_cli = Skopeo(dry_run)
         self.push_creds = self._get_push_creds()
+        self.digest_index = MirrorDigestIndex(
+            os.path.join(tempfile.gettempdir(), DIGEST_INDEX_FILE_NAME)
+        )
 
     def run(self):
         sync_tasks = self.process_sync_tasks()
@@ -199,6 +207,17 @@ class QuayMirror:
                         )
                         continue
 
+                    # Tags in sync during the last deep check are only
+                    # compared again if one of them changed since then
+                    digests = mirror_digests(upstream, downstream)
+                    if digests and self.digest_index.is_unchanged(
+                        str(upstream), str(downstream), digests
+                    ):
+                        _LOG.debug(
+                            "Image %s and mirror %s are in sync", downstream, upstream
+                        )
+                        continue
+
                     try:
                         if downstream == upstream:
                             _LOG.debug(
@@ -206,6 +225,10 @@ class QuayMirror:
                                 downstream,
                                 upstream,
                             )
+                            if digests:
+                                self.digest_index.record(
+                                    str(upstream), str(downstream), digests
+                                )
                             continue
                     except ImageComparisonError as details:
                         _LOG.error("[%s]", details)
@@ -214,6 +237,7 @@ class QuayMirror:
                     _LOG.debug(
                         "Image %s and mirror %s are out of sync", downstream, upstream
                     )
+                    self.digest_index.forget(str(upstream), str(downstream))
                     sync_tasks[org].append(
                         {
                             "mirror_url": str(upstream),
@@ -222,6 +246,9 @@ class QuayMirror:
                         }
                     )
 
+        if is_deep_sync and not self.dry_run:
+            self.digest_index.save()
+
         return sync_tasks
 
     def _is_deep_sync(self, interval):
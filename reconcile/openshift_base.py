@@ -1,5 +1,7 @@
+import copy
 import itertools
 import logging
+import os
 from collections.abc import (
     Iterable,
     Mapping,
@@ -18,6 +20,7 @@ from typing import (
 )
 
 import yaml
+from kubernetes.dynamic.exceptions import ForbiddenError
 from sretoolbox.utils import (
     retry,
     threaded,
@@ -45,6 +48,32 @@ from reconcile.utils.openshift_resource import ResourceInventory
 ACTION_APPLIED = "applied"
 ACTION_DELETED = "deleted"
 
+# apply resources with server-side apply instead of client-side `oc apply`
+SERVER_SIDE_APPLY = os.environ.get("OPENSHIFT_SERVER_SIDE_APPLY", "false") == "true"
+
+# how to fetch the current state of namespaced resources:
+# - namespaced: one LIST per cluster, namespace and kind (default)
+# - cluster-wide: one LIST across all namespaces per cluster and kind
+# - auto: cluster-wide for kinds managed in many namespaces of a cluster
+# cluster-wide LISTs need permissions across all namespaces, clusters not
+# granting them are fetched per namespace.
+FETCH_STRATEGY_NAMESPACED = "namespaced"
+FETCH_STRATEGY_CLUSTER_WIDE = "cluster-wide"
+FETCH_STRATEGY_AUTO = "auto"
+FETCH_STRATEGY = os.environ.get("OPENSHIFT_FETCH_STRATEGY", FETCH_STRATEGY_NAMESPACED)
+CLUSTER_WIDE_FETCH_MIN_NAMESPACES = int(
+    os.environ.get("OPENSHIFT_CLUSTER_WIDE_FETCH_MIN_NAMESPACES", 20)
+)
+
+# kinds to compare with a server-side dry-run apply instead of a client-side
+# comparison, e.g. "ConfigMap,Secret". only effective in server-side apply
+# mode. every compare costs a dry-run request, so no kinds by default.
+SERVER_SIDE_COMPARE_KINDS = [
+    k.strip()
+    for k in os.environ.get("OPENSHIFT_SERVER_SIDE_COMPARE_KINDS", "").split(",")
+    if k.strip()
+]
+
 
 class ValidationError(Exception):
     pass
@@ -74,6 +103,20 @@ class DesiredStateSpec(BaseStateSpec):
     privileged: bool = False
 
 
+@dataclass
+class ClusterWideCurrentStateSpec:
+    """Fetch the current state of several CurrentStateSpecs with one LIST."""
+
+    oc: OCClient = field(compare=False, repr=False)
+    cluster: str
+    kind: str
+    specs: list[CurrentStateSpec] = field(repr=False)
+
+    @property
+    def namespaces(self) -> set[str]:
+        return {s.namespace for s in self.specs}
+
+
 StateSpec = Union[CurrentStateSpec, DesiredStateSpec]
 
 
@@ -309,6 +352,106 @@ def populate_current_state(
         logging.error(f"[{spec.cluster}/{spec.namespace}] {str(e)}")
 
 
+def group_current_state_specs(
+    state_specs: Iterable[StateSpec],
+    strategy: str = FETCH_STRATEGY,
+    min_namespaces: int = CLUSTER_WIDE_FETCH_MIN_NAMESPACES,
+) -> list[Union[StateSpec, ClusterWideCurrentStateSpec]]:
+    """
+    Replace CurrentStateSpecs of the same cluster and kind by a single
+    ClusterWideCurrentStateSpec, depending on the fetch strategy.
+
+    Specs limited to resource names and cluster scoped specs are
+    always fetched as they are.
+    """
+    if strategy not in [FETCH_STRATEGY_CLUSTER_WIDE, FETCH_STRATEGY_AUTO]:
+        return list(state_specs)
+    if strategy == FETCH_STRATEGY_CLUSTER_WIDE:
+        min_namespaces = 1
+
+    result: list[Union[StateSpec, ClusterWideCurrentStateSpec]] = []
+    # privileged and unprivileged specs of a cluster use different clients
+    groups: dict[tuple[str, str, int], list[CurrentStateSpec]] = {}
+    for spec in state_specs:
+        if (
+            isinstance(spec, CurrentStateSpec)
+            and not spec.resource_names
+            and spec.namespace != "cluster"
+        ):
+            key = (spec.cluster, spec.kind, id(spec.oc))
+            groups.setdefault(key, []).append(spec)
+        else:
+            result.append(spec)
+
+    for (cluster, kind, _), specs in groups.items():
+        if len({s.namespace for s in specs}) < min_namespaces:
+            result.extend(specs)
+            continue
+        result.append(
+            ClusterWideCurrentStateSpec(
+                oc=specs[0].oc, cluster=cluster, kind=kind, specs=specs
+            )
+        )
+    return result
+
+
+def populate_current_state_cluster_wide(
+    spec: ClusterWideCurrentStateSpec,
+    ri: ResourceInventory,
+    integration: str,
+    integration_version: str,
+    caller: Optional[str] = None,
+):
+    if not spec.oc.is_kind_supported(spec.kind):
+        msg = f"[{spec.cluster}] cluster has no API resource {spec.kind}."
+        logging.warning(msg)
+        return
+    try:
+        items = spec.oc.get_items(spec.kind, all_namespaces=True)
+    except (StatusCodeError, ForbiddenError) as e:
+        # most likely we are not allowed to list across namespaces
+        logging.info(
+            f"[{spec.cluster}] unable to list {spec.kind} in all namespaces, "
+            f"falling back to listing per namespace: {e}"
+        )
+        for s in spec.specs:
+            populate_current_state(s, ri, integration, integration_version, caller)
+        return
+
+    namespaces = spec.namespaces
+    for item in items:
+        namespace = item["metadata"].get("namespace")
+        if namespace not in namespaces:
+            continue
+        openshift_resource = OR(item, integration, integration_version)
+
+        if caller and openshift_resource.caller != caller:
+            continue
+
+        ri.add_current(
+            spec.cluster,
+            namespace,
+            spec.kind,
+            openshift_resource.name,
+            openshift_resource,
+        )
+
+
+def _populate_state(
+    spec: Union[StateSpec, ClusterWideCurrentStateSpec],
+    ri: ResourceInventory,
+    integration: str,
+    integration_version: str,
+    caller: Optional[str] = None,
+):
+    if isinstance(spec, ClusterWideCurrentStateSpec):
+        populate_current_state_cluster_wide(
+            spec, ri, integration, integration_version, caller
+        )
+    elif isinstance(spec, CurrentStateSpec):
+        populate_current_state(spec, ri, integration, integration_version, caller)
+
+
 def fetch_current_state(
     namespaces: Optional[Iterable[Mapping]] = None,
     clusters: Optional[Iterable[Mapping]] = None,
@@ -321,6 +464,7 @@ def fetch_current_state(
     init_api_resources: bool = False,
     cluster_admin: bool = False,
     caller: Optional[str] = None,
+    fetch_strategy: str = FETCH_STRATEGY,
 ) -> tuple[ResourceInventory, OC_Map]:
     ri = ResourceInventory()
     settings = queries.get_app_interface_settings()
@@ -343,8 +487,8 @@ def fetch_current_state(
         override_managed_types=override_managed_types,
     )
     threaded.run(
-        populate_current_state,
-        state_specs,
+        _populate_state,
+        group_current_state_specs(state_specs, fetch_strategy),
         thread_pool_size,
         ri=ri,
         integration=integration,
@@ -371,6 +515,7 @@ def apply(
     wait_for_namespace: bool,
     recycle_pods: bool = True,
     privileged: bool = False,
+    server_side_apply: bool = False,
 ) -> None:
     logging.info(["apply", cluster, namespace, resource_type, resource.name])
 
@@ -392,13 +537,16 @@ def apply(
                 logging.warning(msg)
                 return
 
+        # Server-side apply sends the desired object in a single PATCH and lets
+        # the API server merge the fields owned by our field manager.
+        _apply = oc.apply_server_side if server_side_apply else oc.apply
         try:
-            oc.apply(namespace, annotated)
+            _apply(namespace, annotated)
         except InvalidValueApplyError:
             oc.remove_last_applied_configuration(
                 namespace, resource_type, resource.name
             )
-            oc.apply(namespace, annotated)
+            _apply(namespace, annotated)
         except (MetaDataAnnotationsTooLongApplyError, UnsupportedMediaTypeError):
             if not oc.get(
                 namespace, resource_type, resource.name, allow_not_found=True
@@ -411,7 +559,7 @@ def apply(
             if resource_type not in ["Route", "Service", "Secret"]:
                 raise
             oc.delete(namespace=namespace, kind=resource_type, name=resource.name)
-            oc.apply(namespace=namespace, resource=annotated)
+            _apply(namespace=namespace, resource=annotated)
         except DeploymentFieldIsImmutableError:
             logging.info(["replace", cluster, namespace, resource_type, resource.name])
             # spec.selector changes
@@ -439,7 +587,7 @@ def apply(
                 cascade=False,
             )
             # create new one
-            oc.apply(namespace=namespace, resource=annotated)
+            _apply(namespace=namespace, resource=annotated)
             if obsolete_rs:
                 # refresh resources
                 deployment = oc.get(namespace, resource_type, resource.name)
@@ -460,13 +608,13 @@ def apply(
                 # not allowed to set 'blockOwnerDeletion'
                 del owner_references[0]["blockOwnerDeletion"]
                 obsolete_rs["metadata"]["ownerReferences"] = owner_references
-                oc.apply(namespace=namespace, resource=OR(obsolete_rs, "", ""))
+                _apply(namespace=namespace, resource=OR(obsolete_rs, "", ""))
         except (MayNotChangeOnceSetError, PrimaryClusterIPCanNotBeUnsetError):
             if resource_type not in ["Service"]:
                 raise
 
             oc.delete(namespace=namespace, kind=resource_type, name=resource.name)
-            oc.apply(namespace=namespace, resource=annotated)
+            _apply(namespace=namespace, resource=annotated)
         except StatefulSetUpdateForbidden:
             if resource_type != "StatefulSet":
                 raise
@@ -493,7 +641,7 @@ def apply(
                 name=resource.name,
                 cascade=False,
             )
-            oc.apply(namespace=namespace, resource=annotated)
+            _apply(namespace=namespace, resource=annotated)
             # the resource was applied without cascading.
             # if the change was in the storage, we need to
             # take care of the resize ourselves.
@@ -554,6 +702,47 @@ def check_unused_resource_types(ri):
             logging.warning(msg)
 
 
+def _strip_server_side_fields(body: Mapping[str, Any]) -> dict[str, Any]:
+    stripped = {k: v for k, v in body.items() if k != "status"}
+    stripped["metadata"] = {
+        k: v
+        for k, v in body.get("metadata", {}).items()
+        if k not in {"managedFields", "resourceVersion", "generation"}
+    }
+    return stripped
+
+
+def _server_side_dry_run_matches(
+    oc_map: ClusterMap,
+    cluster: str,
+    namespace: str,
+    d_item: OR,
+    c_item: OR,
+    privileged: bool,
+) -> bool:
+    oc = oc_map.get(cluster, privileged)
+    if isinstance(oc, OCLogMsg):
+        # the apply will report this
+        return False
+
+    # carry over the qontract annotations of the current resource. if the
+    # rest of the resource matches, so will the annotations, and computing
+    # a new sha256sum of the desired resource is not required.
+    body = copy.deepcopy(d_item.body)
+    annotations = body["metadata"].get("annotations") or {}
+    for k, v in (c_item.body["metadata"].get("annotations") or {}).items():
+        if k.startswith("qontract."):
+            annotations[k] = v
+    body["metadata"]["annotations"] = annotations
+
+    try:
+        result = oc.apply_server_side_dry_run(namespace, body)
+    except StatusCodeError as e:
+        logging.debug(f"[{cluster}/{namespace}] server-side dry-run failed: {e}")
+        return False
+    return _strip_server_side_fields(result) == _strip_server_side_fields(c_item.body)
+
+
 def _realize_resource_data(
     unpacked_ri_item,
     dry_run,
@@ -566,6 +755,8 @@ def _realize_resource_data(
     no_dry_run_skip_compare,
     override_enable_deletion,
     recycle_pods,
+    server_side_apply=False,
+    server_side_compare_kinds=None,
 ):
     cluster, namespace, resource_type, data = unpacked_ri_item
     actions: list[dict] = []
@@ -613,6 +804,29 @@ def _realize_resource_data(
                         )
                         continue
 
+                # let the server tell us how the resource would look like
+                # after applying it. this is more accurate than comparing
+                # locally and saves hashing large resources.
+                elif (
+                    server_side_apply
+                    and resource_type in (server_side_compare_kinds or [])
+                    and not (caller and take_over)
+                ):
+                    if _server_side_dry_run_matches(
+                        oc_map,
+                        cluster,
+                        namespace,
+                        d_item,
+                        c_item,
+                        data["use_admin_token"].get(name, False),
+                    ):
+                        msg = (
+                            "[{}/{}] resource '{}/{}' present "
+                            "and server-side dry-run matches, skipping."
+                        ).format(cluster, namespace, resource_type, name)
+                        logging.debug(msg)
+                        continue
+
                 # don't apply if resources match
                 # if there is a caller (saas file) and this is a take over
                 # we skip the equal compare as it's not covering
@@ -642,11 +856,15 @@ def _realize_resource_data(
                     ).format(cluster, namespace, resource_type, name)
                     logging.info(msg)
 
-                logging.debug("CURRENT: " + OR.serialize(OR.canonicalize(c_item.body)))
+                if logging.getLogger().isEnabledFor(logging.DEBUG):
+                    logging.debug(
+                        "CURRENT: " + OR.serialize(OR.canonicalize(c_item.body))
+                    )
         else:
             logging.debug("CURRENT: None")
 
-        logging.debug("DESIRED: " + OR.serialize(OR.canonicalize(d_item.body)))
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug("DESIRED: " + OR.serialize(OR.canonicalize(d_item.body)))
 
         try:
             privileged = data["use_admin_token"].get(name, False)
@@ -660,6 +878,7 @@ def _realize_resource_data(
                 wait_for_namespace,
                 recycle_pods,
                 privileged,
+                server_side_apply,
             )
             action = {
                 "action": ACTION_APPLIED,
@@ -746,6 +965,8 @@ def realize_data(
     no_dry_run_skip_compare=False,
     override_enable_deletion=None,
     recycle_pods=True,
+    server_side_apply=SERVER_SIDE_APPLY,
+    server_side_compare_kinds=None,
 ):
     """
     Realize the current state to the desired state.
@@ -764,7 +985,12 @@ def realize_data(
     :param no_dry_run_skip_compare: when running without dry-run, skip compare
     :param override_enable_deletion: override calculated enable_deletion value
     :param recycle_pods: should pods be recycled if a dependency changed
+    :param server_side_apply: apply resources using server-side apply
+    :param server_side_compare_kinds: kinds to compare using a server-side
+                                      dry-run apply (requires server_side_apply)
     """
+    if server_side_compare_kinds is None:
+        server_side_compare_kinds = SERVER_SIDE_COMPARE_KINDS
     args = locals()
     del args["thread_pool_size"]
     results = threaded.run(_realize_resource_data, ri, thread_pool_size, **args)
@@ -93,6 +93,7 @@ def run(
     env_name: Optional[str] = None,
     gitlab_project_id: Optional[str] = None,
     trigger_reason: Optional[str] = None,
+    incremental: bool = False,
     defer: Optional[Callable] = None,
 ) -> None:
     vault_settings = get_app_interface_vault_settings()
@@ -175,6 +176,7 @@ def run(
         gitlab=gl,
         jenkins_map=jenkins_map,
         state=init_state(integration=QONTRACT_INTEGRATION, secret_reader=secret_reader),
+        incremental=incremental,
     )
     if defer:
         defer(saasherder.cleanup)
@@ -236,6 +238,9 @@ def run(
     # publish results of this deployment
     # based on promotion information in targets
     success = not ri.has_error_registered()
+    # remember what was deployed, unchanged targets are skipped next time
+    if not dry_run and success and saasherder.incremental:
+        saasherder.save_deployment_states()
     # only publish promotions for deployment jobs (a single saas file)
     if notify:
         # Auto-promotions are now created by saas-auto-promotions-manager integration
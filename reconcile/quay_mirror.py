@@ -1,14 +1,17 @@
+import itertools
 import logging
 import os
 import re
 import sys
 import tempfile
+import threading
 import time
 from collections import (
     defaultdict,
     namedtuple,
 )
 from collections.abc import Iterable
+from dataclasses import dataclass
 from typing import (
     Any,
     Optional,
@@ -20,6 +23,7 @@ from sretoolbox.container.image import (
     ImageContainsError,
 )
 from sretoolbox.container.skopeo import SkopeoCmdError
+from sretoolbox.utils import threaded
 
 from reconcile import queries
 from reconcile.status import ExitCodes
@@ -30,16 +34,57 @@ from reconcile.utils import (
 )
 from reconcile.utils.instrumented_wrappers import InstrumentedImage as Image
 from reconcile.utils.instrumented_wrappers import InstrumentedSkopeo as Skopeo
+from reconcile.utils.mirror_digest_index import (
+    MirrorDigestIndex,
+    mirror_digests,
+)
 from reconcile.utils.secret_reader import SecretReader
 
 _LOG = logging.getLogger(__name__)
 
 QONTRACT_INTEGRATION = "quay-mirror"
 CONTROL_FILE_NAME = "qontract-reconcile-quay-mirror.timestamp"
+DIGEST_INDEX_FILE_NAME = "qontract-reconcile-quay-mirror.digests.json"
+
+# skopeo copies running at the same time into the same org
+COPY_CONCURRENCY_PER_ORG = int(
+    os.environ.get("QUAY_MIRROR_COPY_CONCURRENCY_PER_ORG", 2)
+)
+COPY_MAX_ATTEMPTS = int(os.environ.get("QUAY_MIRROR_COPY_MAX_ATTEMPTS", 3))
+
+# skopeo errors worth another attempt, e.g. registry hiccups and rate limits
+TRANSIENT_SKOPEO_ERRORS = re.compile(
+    r"timeout|timed out|connection reset|connection refused|unexpected EOF|"
+    r"too many requests|toomanyrequests|bad gateway|service unavailable|"
+    r"internal server error|\b(429|500|502|503|504)\b",
+    re.IGNORECASE,
+)
 
 OrgKey = namedtuple("OrgKey", ["instance", "org_name"])
 
 
+@dataclass
+class TagSync:
+    """A tag of a mirrored repository, which might have to be copied."""
+
+    org_key: OrgKey
+    upstream: Image
+    downstream: Image
+    mirror_creds: Optional[str]
+    downstream_exists: bool
+
+    def task(self) -> dict[str, Any]:
+        return {
+            "mirror_url": str(self.upstream),
+            "mirror_creds": self.mirror_creds,
+            "image_url": str(self.downstream),
+        }
+
+
+def is_transient_skopeo_error(error: SkopeoCmdError) -> bool:
+    return bool(TRANSIENT_SKOPEO_ERRORS.search(str(error)))
+
+
 class QuayMirror:
 
     QUAY_ORG_CATALOG_QUERY = """
@@ -69,8 +114,10 @@ class QuayMirror:
         compare_tags: Optional[bool] = None,
         compare_tags_interval: int = 86400,
         images: Optional[Iterable[str]] = None,
+        thread_pool_size: int = 10,
     ) -> None:
         self.dry_run = dry_run
+        self.thread_pool_size = thread_pool_size
         self.gqlapi = gql.get_api()
         settings = queries.get_app_interface_settings()
         self.secret_reader = SecretReader(settings=settings)
@@ -96,6 +143,13 @@ class QuayMirror:
             shard_id=sharding.SHARD_ID,
         )
         self.response_cache_size.set_function(lambda: len(self.response_cache))
+        self.comparisons = metrics.image_comparisons
+        self.copies_pending = metrics.image_copies_pending.labels(
+            integration=QONTRACT_INTEGRATION,
+            shards=sharding.SHARDS,
+            shard_id=sharding.SHARD_ID,
+        )
+        self._copy_slots: dict[OrgKey, threading.BoundedSemaphore] = {}
 
         if control_file_dir:
             if not os.path.isdir(control_file_dir):
@@ -108,25 +162,89 @@ class QuayMirror:
             self.control_file_path = os.path.join(
                 tempfile.gettempdir(), CONTROL_FILE_NAME
             )
+        self.digest_index = MirrorDigestIndex(
+            os.path.join(
+                os.path.dirname(self.control_file_path), DIGEST_INDEX_FILE_NAME
+            )
+        )
 
         self._has_enough_time_passed_since_last_compare_tags: Optional[bool] = None
 
     def run(self) -> None:
         sync_tasks = self.process_sync_tasks()
-        for org, data in sync_tasks.items():
-            for item in data:
-                try:
-                    self.skopeo_cli.copy(
-                        src_image=item["mirror_url"],
-                        src_creds=item["mirror_creds"],
-                        dst_image=item["image_url"],
-                        dest_creds=self.push_creds[org],
-                    )
-                except SkopeoCmdError as details:
-                    _LOG.error("skopeo command error message: '%s'", details)
+
+        # interleave the orgs, so the workers are not all waiting for
+        # the copy slots of the same org
+        copies = [
+            copy
+            for copies_round in itertools.zip_longest(
+                *(
+                    [(org_key, item) for item in data]
+                    for org_key, data in sync_tasks.items()
+                )
+            )
+            for copy in copies_round
+            if copy is not None
+        ]
+        self._copy_slots = {
+            org_key: threading.BoundedSemaphore(COPY_CONCURRENCY_PER_ORG)
+            for org_key in sync_tasks
+        }
+        self.copies_pending.inc(len(copies))
+        threaded.run(self._copy, copies, self.thread_pool_size)
 
         if self.is_compare_tags and not self.dry_run:
             self.record_timestamp(self.control_file_path)
+            # runs limited to some images only know about their tags
+            self.digest_index.save(prune=not self.images)
+
+    def _copy(self, copy: tuple[OrgKey, dict[str, Any]]) -> None:
+        org_key, item = copy
+        try:
+            with self._copy_slots[org_key]:
+                result = self._copy_with_retries(org_key, item)
+        finally:
+            self.copies_pending.dec()
+        metrics.image_copies.labels(
+            integration=QONTRACT_INTEGRATION,
+            shards=sharding.SHARDS,
+            shard_id=sharding.SHARD_ID,
+            org=org_key.org_name,
+            result=result,
+        ).inc()
+
+    def _copy_with_retries(self, org_key: OrgKey, item: dict[str, Any]) -> str:
+        attempt = 1
+        while True:
+            try:
+                self.skopeo_cli.copy(
+                    src_image=item["mirror_url"],
+                    src_creds=item["mirror_creds"],
+                    dst_image=item["image_url"],
+                    dest_creds=self.push_creds[org_key],
+                )
+                return "success"
+            except SkopeoCmdError as details:
+                if attempt >= COPY_MAX_ATTEMPTS or not is_transient_skopeo_error(
+                    details
+                ):
+                    _LOG.error("skopeo command error message: '%s'", details)
+                    return "failure"
+                _LOG.warning(
+                    "skopeo copy to %s failed (attempt %d), retrying: '%s'",
+                    item["image_url"],
+                    attempt,
+                    details,
+                )
+                metrics.image_copies.labels(
+                    integration=QONTRACT_INTEGRATION,
+                    shards=sharding.SHARDS,
+                    shard_id=sharding.SHARD_ID,
+                    org=org_key.org_name,
+                    result="retry",
+                ).inc()
+            time.sleep(attempt)
+            attempt += 1
 
     @classmethod
     def process_repos_query(
@@ -199,7 +317,8 @@ class QuayMirror:
         if self.is_compare_tags:
             _LOG.warning("Making a compare-tags run. This is a slow operation.")
         summary = self.process_repos_query(self.images)
-        sync_tasks = defaultdict(list)
+
+        repos = []
         for org_key, data in summary.items():
             org = org_key.org_name
             for item in data:
@@ -229,91 +348,141 @@ class QuayMirror:
                     password=password,
                     response_cache=self.response_cache,
                 )
+                repos.append((org_key, item, image, image_mirror, mirror_creds))
+
+        # the registries are queried for all repos in parallel, first for
+        # the tags and then, for tags present on both sides, the manifests
+        tag_syncs = [
+            tag_sync
+            for repo_tag_syncs in threaded.run(
+                self._tag_syncs, repos, self.thread_pool_size
+            )
+            for tag_sync in repo_tag_syncs
+        ]
+        to_compare = []
+        if self.is_compare_tags:
+            to_compare = [t for t in tag_syncs if t.downstream_exists]
+        out_of_sync = iter(
+            threaded.run(self._is_out_of_sync, to_compare, self.thread_pool_size)
+        )
 
-                tags = item["mirror"].get("tags")
-                tags_exclude = item["mirror"].get("tagsExclude")
+        sync_tasks = defaultdict(list)
+        for tag_sync in tag_syncs:
+            if tag_sync.downstream_exists:
+                # Compare tags (slow) only from time to time.
+                if not self.is_compare_tags:
+                    _LOG.debug(
+                        "Running in non compare-tags mode. We won't check if %s "
+                        "and %s are actually in sync",
+                        tag_sync.downstream,
+                        tag_sync.upstream,
+                    )
+                    continue
+                if not next(out_of_sync):
+                    continue
+            sync_tasks[tag_sync.org_key].append(tag_sync.task())
 
-                for tag in image_mirror:
-                    if not self.sync_tag(
-                        tags=tags, tags_exclude=tags_exclude, candidate=tag
-                    ):
-                        continue
+        return sync_tasks
 
-                    upstream = image_mirror[tag]
-                    downstream = image[tag]
-                    if tag not in image:
-                        _LOG.debug(
-                            "Image %s does not exist. Syncing it from %s",
-                            downstream,
-                            upstream,
-                        )
-                        task = {
-                            "mirror_url": str(upstream),
-                            "mirror_creds": mirror_creds,
-                            "image_url": str(downstream),
-                        }
-                        sync_tasks[org_key].append(task)
-                        continue
+    def _tag_syncs(
+        self, repo: tuple[OrgKey, dict[str, Any], Image, Image, Optional[str]]
+    ) -> list[TagSync]:
+        org_key, item, image, image_mirror, mirror_creds = repo
+        tags = item["mirror"].get("tags")
+        tags_exclude = item["mirror"].get("tagsExclude")
 
-                    # Compare tags (slow) only from time to time.
-                    if not self.is_compare_tags:
-                        _LOG.debug(
-                            "Running in non compare-tags mode. We won't check if %s "
-                            "and %s are actually in sync",
-                            downstream,
-                            upstream,
-                        )
-                        continue
+        tag_syncs = []
+        for tag in image_mirror:
+            if not self.sync_tag(tags=tags, tags_exclude=tags_exclude, candidate=tag):
+                continue
 
-                    try:
-                        if downstream == upstream:
-                            _LOG.debug(
-                                "Image %s and mirror %s are in sync",
-                                downstream,
-                                upstream,
-                            )
-                            continue
-                        if downstream.is_part_of(upstream):
-                            _LOG.debug(
-                                "Image %s is part of mirror multi-arch image %s",
-                                downstream,
-                                upstream,
-                            )
-                            continue
-                    except ImageComparisonError as details:
-                        _LOG.error(
-                            "Error comparing image %s and %s - %s",
-                            downstream,
-                            upstream,
-                            details,
-                        )
-                        continue
-                    except ImageContainsError:
-                        # Upstream and downstream images are different and not part
-                        # of each other. We will mirror them.
-                        pass
-                    finally:
-                        self.response_cache_hits.inc(
-                            upstream.response_cache_hits
-                            + downstream.response_cache_hits
-                        )
-                        self.response_cache_misses.inc(
-                            upstream.response_cache_misses
-                            + downstream.response_cache_misses
-                        )
+            upstream = image_mirror[tag]
+            downstream = image[tag]
+            downstream_exists = tag in image
+            if not downstream_exists:
+                _LOG.debug(
+                    "Image %s does not exist. Syncing it from %s",
+                    downstream,
+                    upstream,
+                )
+            tag_syncs.append(
+                TagSync(
+                    org_key=org_key,
+                    upstream=upstream,
+                    downstream=downstream,
+                    mirror_creds=mirror_creds,
+                    downstream_exists=downstream_exists,
+                )
+            )
+        return tag_syncs
+
+    def _is_out_of_sync(self, tag_sync: TagSync) -> bool:
+        upstream = tag_sync.upstream
+        downstream = tag_sync.downstream
+        # tags found in sync before only need to be compared again
+        # if one of them changed since then
+        digests = mirror_digests(upstream, downstream)
+        if digests and self.digest_index.is_unchanged(
+            str(upstream), str(downstream), digests
+        ):
+            _LOG.debug(
+                "Image %s and mirror %s are unchanged since they were in sync",
+                downstream,
+                upstream,
+            )
+            result = "unchanged"
+        else:
+            result = self._compare(upstream, downstream)
+            if result in {"in_sync", "part_of"} and digests:
+                self.digest_index.record(str(upstream), str(downstream), digests)
+            elif result == "out_of_sync":
+                self.digest_index.forget(str(upstream), str(downstream))
+        self.comparisons.labels(
+            integration=QONTRACT_INTEGRATION,
+            shards=sharding.SHARDS,
+            shard_id=sharding.SHARD_ID,
+            result=result,
+        ).inc()
+        return result == "out_of_sync"
 
-                    _LOG.debug(
-                        "Image %s and mirror %s are out of sync", downstream, upstream
-                    )
-                    sync_tasks[org_key].append(
-                        {
-                            "mirror_url": str(upstream),
-                            "mirror_creds": mirror_creds,
-                            "image_url": str(downstream),
-                        }
-                    )
+    def _compare(self, upstream: Image, downstream: Image) -> str:
+        try:
+            if downstream == upstream:
+                _LOG.debug(
+                    "Image %s and mirror %s are in sync",
+                    downstream,
+                    upstream,
+                )
+                return "in_sync"
+            if downstream.is_part_of(upstream):
+                _LOG.debug(
+                    "Image %s is part of mirror multi-arch image %s",
+                    downstream,
+                    upstream,
+                )
+                return "part_of"
+        except ImageComparisonError as details:
+            _LOG.error(
+                "Error comparing image %s and %s - %s",
+                downstream,
+                upstream,
+                details,
+            )
+            return "error"
+        except ImageContainsError:
+            # Upstream and downstream images are different and not part
+            # of each other. We will mirror them.
+            pass
+        finally:
+            self.response_cache_hits.inc(
+                upstream.response_cache_hits + downstream.response_cache_hits
+            )
+            self.response_cache_misses.inc(
+                upstream.response_cache_misses + downstream.response_cache_misses
+            )
 
-        return sync_tasks
+        _LOG.debug("Image %s and mirror %s are out of sync", downstream, upstream)
+        return "out_of_sync"
 
     @property
     def is_compare_tags(self) -> bool:
@@ -376,9 +545,15 @@ def run(
     compare_tags: Optional[bool],
     compare_tags_interval: int,
     images: Optional[Iterable[str]],
+    thread_pool_size: int = 10,
 ):
     quay_mirror = QuayMirror(
-        dry_run, control_file_dir, compare_tags, compare_tags_interval, images
+        dry_run,
+        control_file_dir,
+        compare_tags,
+        compare_tags_interval,
+        images,
+        thread_pool_size,
     )
     quay_mirror.run()
 
@@ -253,7 +253,7 @@ def run(
 
     defer(tf.cleanup)
 
-    _, err = tf.plan(enable_deletion)
+    _, err = tf.plan(enable_deletion, dry_run=dry_run)
     if err:
         sys.exit(ExitCodes.ERROR)
 
@@ -171,7 +171,7 @@ class TerraformCloudflareDNSIntegration(
         if defer:
             defer(tf.cleanup)
 
-        disabled_deletions_detected, err = tf.plan(self.params.enable_deletion)
+        disabled_deletions_detected, err = tf.plan(self.params.enable_deletion, dry_run=dry_run)
         if err:
             sys.exit(ExitCodes.ERROR)
         if disabled_deletions_detected:
@@ -393,7 +393,7 @@ def run(
     )
     defer(tf.cleanup)
 
-    disabled_deletions_detected, err = tf.plan(enable_deletion)
+    disabled_deletions_detected, err = tf.plan(enable_deletion, dry_run=dry_run)
     if err:
         sys.exit(ExitCodes.ERROR)
     if disabled_deletions_detected:
@@ -187,7 +187,7 @@ class TerraformCloudflareUsers(
         )
 
         try:
-            disabled_deletions_detected, err = tf.plan(enable_deletion)
+            disabled_deletions_detected, err = tf.plan(enable_deletion, dry_run=dry_run)
             if err:
                 raise TerraformPlanFailed(
                     f"Failed to run terraform plan for integration {QONTRACT_INTEGRATION}"
@@ -401,7 +401,7 @@ def run(
         cleanup_and_exit(tf, err)
 
     if not light:
-        disabled_deletions_detected, err = tf.plan(enable_deletion)
+        disabled_deletions_detected, err = tf.plan(enable_deletion, dry_run=dry_run)
         if err:
             cleanup_and_exit(tf, err)
         if disabled_deletions_detected:
@@ -416,7 +416,7 @@ def run(
     if defer:
         defer(tf.cleanup)
 
-    disabled_deletions_detected, err = tf.plan(enable_deletion)
+    disabled_deletions_detected, err = tf.plan(enable_deletion, dry_run=dry_run)
     if err:
         raise RuntimeError("Error running terraform plan")
     if disabled_deletions_detected:
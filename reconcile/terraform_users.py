@@ -252,7 +252,7 @@ def run(
         err = True
         cleanup_and_exit(tf, err)
 
-    disabled_deletions_detected, err = tf.plan(enable_deletion)
+    disabled_deletions_detected, err = tf.plan(enable_deletion, dry_run=dry_run)
     if err:
         cleanup_and_exit(tf, err)
     if disabled_deletions_detected:
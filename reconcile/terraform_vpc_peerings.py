@@ -564,7 +564,7 @@ def run(
 
     defer(tf.cleanup)
 
-    disabled_deletions_detected, err = tf.plan(enable_deletion)
+    disabled_deletions_detected, err = tf.plan(enable_deletion, dry_run=dry_run)
     errors.append(err)
     if disabled_deletions_detected:
         logging.error("Deletions detected when they are disabled")
@@ -8,6 +8,7 @@ from reconcile.change_owners.change_types import (
 )
 from reconcile.change_owners.changes import (
     METADATA_CHANGE_PATH,
+    DiffCoverageIndex,
     aggregate_file_moves,
 )
 from reconcile.change_owners.diff import (
@@ -266,6 +267,61 @@ def test_diff_no_coverage_all_disabled(
     assert not dc.is_covered()
 
 
+def _diff_coverage(path: str) -> DiffCoverage:
+    return DiffCoverage(
+        diff=Diff(
+            diff_type=DiffType.CHANGED,
+            path=jsonpath_ng.parse(path),
+            new=None,
+            old=None,
+        ),
+        coverage=[],
+    )
+
+
+def test_diff_coverage_index_matches_diff_coverage() -> None:
+    diff_coverages = [
+        _diff_coverage(p)
+        for p in [
+            "resourceTemplates.[0].targets.[1].ref",
+            "resourceTemplates.[0].targets.[10]",
+            "resourceTemplates.[1].url",
+            "name",
+        ]
+    ]
+    index = DiffCoverageIndex(diff_coverages)
+
+    for path in [
+        "$",
+        "resourceTemplates",
+        "resourceTemplates.[0].targets.[1]",
+        "resourceTemplates.[0].targets.[10].ref",
+        "resourceTemplates.[1].url",
+        "resourceTemplates.[1].urls",
+        "description",
+    ]:
+        jsonpath = jsonpath_ng.parse(path)
+        assert index.covered_by(str(jsonpath)) == {
+            i
+            for i, dc in enumerate(diff_coverages)
+            if dc.changed_path_covered_by_path(jsonpath)
+        }
+        assert index.containing(str(jsonpath)) == {
+            i
+            for i, dc in enumerate(diff_coverages)
+            if dc.path_under_changed_path(jsonpath)
+        }
+
+
+def test_diff_coverage_index_root_diff() -> None:
+    index = DiffCoverageIndex([_diff_coverage("$")])
+
+    assert index.covered_by("$") == {0}
+    assert index.containing("$") == set()
+    assert index.covered_by("name") == set()
+    assert index.containing("name") == {0}
+
+
 def test_no_diff_but_sha_change(saas_file_changetype: ChangeTypeV1) -> None:
     # create a file change with no diff but with a SHA change
     saas_file_change = build_bundle_datafile_change(
@@ -1,3 +1,6 @@
+import copy
+from typing import Any
+
 import jsonpath_ng
 import jsonpath_ng.ext
 import pytest
@@ -6,7 +9,9 @@ from reconcile.change_owners.change_types import DiffCoverage
 from reconcile.change_owners.diff import (
     Diff,
     DiffType,
+    _extract_diffs_with_deepdiff,
     deepdiff_path_to_jsonpath,
+    extract_diffs,
 )
 from reconcile.test.change_owners.fixtures import (
     build_bundle_datafile_change,
@@ -684,3 +689,85 @@ def test_bundle_change_resource_file_dict_value_added() -> None:
     assert bundle_change.diff_coverage[0].diff.diff_type == DiffType.ADDED
     assert bundle_change.diff_coverage[0].diff.old is None
     assert bundle_change.diff_coverage[0].diff.new == "new_value"
+
+
+#
+# single pass diff extraction
+#
+
+
+def _normalized(diffs: list[Diff]) -> list[tuple[str, str, Any, Any]]:
+    return sorted(
+        (str(d.path), d.diff_type.value, repr(d.old), repr(d.new)) for d in diffs
+    )
+
+
+@pytest.mark.parametrize(
+    "old,new",
+    [
+        ({"a": 1, "b": {"c": "x"}}, {"a": 2, "b": {"c": "y", "d": "z"}}),
+        ({"a": 1, "b": 2}, {"a": 1}),
+        ({"a": 1}, {"a": 1.0}),
+        ({"a": 1}, {"a": "1"}),
+        ({"a": True}, {"a": 1}),
+        ({"a": 1, "__identifier": "x"}, {"a": 1, "__identifier": "y"}),
+        ({"l": [1, 2, 3]}, {"l": [3, 1, 2]}),
+        ({"l": [1, 2]}, {"l": [1, 2, 3]}),
+        ({"l": [1, 2, 2]}, {"l": [1]}),
+        ({"l": [True, 3.5]}, {"l": [3.5, "u"]}),
+        ({"l": [1, "a"]}, {"l": ["b", 1]}),
+        (
+            {"l": [{"$ref": "/a"}, {"$ref": "/b"}, {"$ref": "/c"}]},
+            {"l": [{"$ref": "/c"}, {"$ref": "/d"}, {"$ref": "/a"}]},
+        ),
+        (
+            {"l": [{"__identifier": "a", "v": 1}, {"__identifier": "b", "v": 2}]},
+            {"l": [{"__identifier": "b", "v": 3}, {"__identifier": "a", "v": 1}]},
+        ),
+        (
+            {"l": [{"name": "a", "v": 1, "w": [1, 2]}, {"name": "b", "v": 2}]},
+            {"l": [{"name": "b", "v": 2}, {"name": "a", "v": 1, "w": [2, 3]}]},
+        ),
+        (
+            {"l": [{"name": "a", "v": {"x": 1}}, "s"]},
+            {"l": [{"name": "a", "v": {"x": 1, "y": 2}}, "t"]},
+        ),
+    ],
+)
+def test_extract_diffs_same_as_deepdiff(old: Any, new: Any) -> None:
+    assert _normalized(extract_diffs(old, new)) == _normalized(
+        _extract_diffs_with_deepdiff(old, new)
+    )
+
+
+def test_extract_diffs_same_as_deepdiff_saas_file() -> None:
+    old: dict[str, Any] = {
+        "name": "saas",
+        "resourceTemplates": [
+            {
+                "name": f"rt-{i}",
+                "url": f"https://github.com/app-sre/rt-{i}",
+                "targets": [
+                    {
+                        "namespace": {"$ref": f"/namespaces/ns-{j}.yml"},
+                        "ref": "main",
+                        "parameters": {"REPLICAS": j},
+                    }
+                    for j in range(5)
+                ],
+            }
+            for i in range(50)
+        ],
+    }
+    new = copy.deepcopy(old)
+    new["resourceTemplates"][10]["targets"][3]["ref"] = "1234567"
+    new["resourceTemplates"][20]["targets"].append(
+        {"namespace": {"$ref": "/namespaces/ns-new.yml"}, "ref": "main"}
+    )
+    del new["resourceTemplates"][30]["targets"][1]["parameters"]
+    new["resourceTemplates"].reverse()
+    new["resourceTemplates"].pop()
+
+    diffs = extract_diffs(old, new)
+    assert diffs
+    assert _normalized(diffs) == _normalized(_extract_diffs_with_deepdiff(old, new))
@@ -5,6 +5,7 @@ from reconcile.change_owners.bundle import BundleFileType
 from reconcile.change_owners.change_types import (
     ChangeTypeContext,
     ChangeTypeProcessor,
+    JsonPathFinder,
 )
 from reconcile.gql_definitions.change_owners.queries.change_types import ChangeTypeV1
 from reconcile.test.change_owners.fixtures import (
@@ -136,3 +137,43 @@ def test_change_type_processor_allowed_paths_conditions_ct_without_schema_file_w
     )
 
     assert {str(p) for p in paths} == {"$"}
+
+
+def test_change_type_processor_allowed_paths_shared_finder(
+    role_member_change_type: ChangeTypeV1, user_file: StubFile
+) -> None:
+    changed_user_file = user_file.create_bundle_change(
+        {"roles[0]": {"$ref": "some-role"}}
+    )
+    processor = change_type_to_processor(role_member_change_type)
+    finder = JsonPathFinder(changed_user_file.new)
+    paths = [
+        processor.allowed_changed_paths(
+            file_ref=changed_user_file.fileref,
+            file_content=changed_user_file.new,
+            ctx=ChangeTypeContext(
+                change_type_processor=processor,
+                context=f"RoleV1 - role {i}",
+                origin="",
+                approvers=[],
+                context_file=user_file.file_ref(),
+            ),
+            finder=finder,
+        )
+        for i in range(2)
+    ]
+
+    assert {str(p) for p in paths[0]} == {"roles"}
+    # the jsonpaths are evaluated only once for all contexts
+    assert paths[0][0] is paths[1][0]
+    assert finder.path_str(paths[0][0]) == "roles"
+
+
+def test_jsonpath_finder() -> None:
+    finder = JsonPathFinder({"a": [{"b": 1}, {"b": 2}], "c": 3})
+
+    paths = finder.find("a[*].b")
+    assert [str(p) for p in paths] == ["a.[0].b", "a.[1].b"]
+    assert finder.find("a[*].b") is paths
+    assert finder.find("d") == []
+    assert [finder.path_str(p) for p in paths] == ["a.[0].b", "a.[1].b"]
@@ -1,3 +1,4 @@
+import json
 from collections.abc import Callable
 from typing import Any
 
@@ -6,6 +7,7 @@ from httpretty.core import HTTPrettyRequest
 
 from reconcile.test.ocm.fixtures import OcmUrl
 from reconcile.utils.ocm import OCM
+from reconcile.utils.ocm_base_client import OCMBaseClient
 
 
 def buid_ocm_item_page(page: int, items: list[Any], total: int) -> dict[str, Any]:
@@ -31,6 +33,18 @@ def build_paged_ocm_response(nr_of_items: int, page_size: int) -> list[dict[str,
     return paged_responses
 
 
+def paged_callback(nr_of_items: int) -> Callable:
+    def callback(
+        request: HTTPrettyRequest, uri: str, headers: dict[str, str]
+    ) -> tuple[int, dict, str]:
+        page = int(request.querystring.get("page", ["1"])[0])
+        size = int(request.querystring["size"][0])
+        items = [{"id": x} for x in range(nr_of_items)][(page - 1) * size : page * size]
+        return 200, headers, json.dumps(buid_ocm_item_page(page, items, nr_of_items))
+
+    return callback
+
+
 @pytest.mark.parametrize(
     "nr_of_items, page_size",
     [(10, 3), (10, 2), (1, 10), (10, 10)],
@@ -39,20 +53,11 @@ def test_get_json_pagination(
     nr_of_items: int,
     page_size: int,
     ocm: OCM,
-    register_ocm_url_responses: Callable[[list[OcmUrl]], int],
+    register_ocm_url_callback: Callable[[str, str, Callable], None],
     find_all_ocm_http_requests: Callable[[str, str], list[HTTPrettyRequest]],
 ) -> None:
-    register_ocm_url_responses(
-        [
-            OcmUrl(
-                method="GET",
-                uri="/api",
-                responses=build_paged_ocm_response(
-                    nr_of_items=nr_of_items, page_size=page_size
-                ),
-            )
-        ]
-    )
+    # pages are fetched concurrently, so responses must match the page
+    register_ocm_url_callback("GET", "/api", paged_callback(nr_of_items))
 
     resp = ocm._get_json("/api", page_size=page_size)
 
@@ -103,3 +108,33 @@ def test_get_json(
 
     x = ocm._get_json("/api")
     assert x["id"] == 1
+
+
+def test_get_json_items_in_order(
+    ocm: OCM,
+    register_ocm_url_callback: Callable[[str, str, Callable], None],
+    find_all_ocm_http_requests: Callable[[str, str], list[HTTPrettyRequest]],
+) -> None:
+    register_ocm_url_callback("GET", "/api", paged_callback(95))
+
+    items = list(ocm._get_json_items("/api", page_size=10))
+
+    assert [i["id"] for i in items] == list(range(95))
+    pages = sorted(
+        int(r.querystring.get("page", ["1"])[0])
+        for r in find_all_ocm_http_requests("GET", "/api")
+    )
+    assert pages == list(range(1, 11))
+
+
+def test_get_paginated(
+    ocm_api: OCMBaseClient,
+    register_ocm_url_callback: Callable[[str, str, Callable], None],
+) -> None:
+    register_ocm_url_callback("GET", "/api", paged_callback(25))
+
+    items = list(ocm_api.get_paginated("/api", max_page_size=10))
+    assert [i["id"] for i in items] == list(range(25))
+
+    items = list(ocm_api.get_paginated("/api", max_page_size=10, max_pages=2))
+    assert [i["id"] for i in items] == list(range(20))
@@ -0,0 +1,132 @@
+import json
+from collections.abc import Callable
+
+import pytest
+from httpretty.core import HTTPrettyRequest
+
+from reconcile.utils.ocm_base_client import OCMBaseClient
+from reconcile.utils.ocm_response_cache import OCMResponseCache
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture
+def build_client(
+    access_token_url: str, ocm_url: str
+) -> Callable[[OCMResponseCache], OCMBaseClient]:
+    def f(cache: OCMResponseCache) -> OCMBaseClient:
+        return OCMBaseClient(
+            access_token_client_id="some_client_id",
+            access_token_client_secret="some_client_secret",
+            access_token_url=access_token_url,
+            url=ocm_url,
+            response_cache=cache,
+        )
+
+    return f
+
+
+@pytest.fixture
+def requests(
+    register_ocm_url_callback: Callable[[str, str, Callable], None]
+) -> list[HTTPrettyRequest]:
+    received: list[HTTPrettyRequest] = []
+
+    def callback(
+        request: HTTPrettyRequest, uri: str, headers: dict[str, str]
+    ) -> tuple[int, dict, str]:
+        received.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return 304, headers, ""
+        return 200, {**headers, "ETag": '"v1"'}, json.dumps({"kind": "Cluster"})
+
+    register_ocm_url_callback("GET", "/api/cluster", callback)
+    register_ocm_url_callback(
+        "POST", "/api/cluster", lambda request, uri, headers: (201, headers, "{}")
+    )
+    return received
+
+
+def test_response_cache_ttl_shared_between_clients(
+    build_client: Callable[[OCMResponseCache], OCMBaseClient],
+    requests: list[HTTPrettyRequest],
+    clock: Clock,
+) -> None:
+    cache = OCMResponseCache(ttl=60, clock=clock)
+
+    assert build_client(cache).get("/api/cluster") == {"kind": "Cluster"}
+    assert build_client(cache).get("/api/cluster") == {"kind": "Cluster"}
+    assert len(requests) == 1
+
+    clock.now = 60
+    assert build_client(cache).get("/api/cluster") == {"kind": "Cluster"}
+    assert len(requests) == 2
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+
+
+def test_response_cache_revalidates_with_etag(
+    build_client: Callable[[OCMResponseCache], OCMBaseClient],
+    requests: list[HTTPrettyRequest],
+) -> None:
+    client = build_client(OCMResponseCache(ttl=0))
+
+    assert client.get("/api/cluster") == {"kind": "Cluster"}
+    assert client.get("/api/cluster") == {"kind": "Cluster"}
+    assert len(requests) == 2
+    assert "If-None-Match" not in requests[0].headers
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+
+
+def test_response_cache_invalidated_by_writes(
+    build_client: Callable[[OCMResponseCache], OCMBaseClient],
+    requests: list[HTTPrettyRequest],
+) -> None:
+    client = build_client(OCMResponseCache(ttl=60))
+
+    client.get("/api/cluster")
+    client.post("/api/cluster", {})
+    client.get("/api/cluster")
+    assert len(requests) == 2
+    assert "If-None-Match" not in requests[1].headers
+
+
+def test_response_cache_discards_responses_of_invalidated_generation() -> None:
+    cache = OCMResponseCache(ttl=60)
+    identity = ("url", "token-url", "client-id")
+
+    generation = cache.generation(identity)
+    cache.invalidate(identity)
+    cache.put(identity, "/api", None, "{}", None, generation)
+    assert cache.get(identity, "/api") is None
+
+    cache.put(identity, "/api", None, "{}", None, cache.generation(identity))
+    assert cache.get(identity, "/api") is not None
+    assert cache.get(("other", "token-url", "client-id"), "/api") is None
+
+
+def test_response_cache_evicts_least_recently_used() -> None:
+    cache = OCMResponseCache(ttl=0, max_size=4)
+    identity = ("url", "token-url", "client-id")
+
+    cache.put(identity, "/a", None, "{}", '"a"', 0)
+    cache.put(identity, "/b", None, "{}", '"b"', 0)
+    assert cache.get(identity, "/a") is not None
+    cache.put(identity, "/c", None, "{}", '"c"', 0)
+
+    assert cache.get(identity, "/a") is not None
+    assert cache.get(identity, "/b") is None
+    assert cache.get(identity, "/c") is not None
+
+    cache.put(identity, "/big", None, "{" * 5, '"big"', 0)
+    assert cache.get(identity, "/big") is None
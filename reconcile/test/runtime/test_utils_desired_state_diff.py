@@ -18,8 +18,10 @@ from reconcile.utils.runtime import desired_state_diff
 from reconcile.utils.runtime.desired_state_diff import (
     DiffDetectionFailure,
     DiffDetectionTimeout,
+    ShardDetectionNotSupported,
     build_desired_state_diff,
     extract_diffs_with_timeout,
+    find_changed_shards_by_digest,
 )
 from reconcile.utils.runtime.integration import DesiredStateShardConfig
 
@@ -121,6 +123,11 @@ def diff_extration_with_exception(
 def test_desired_state_diff_building_time(
     mocker: MockerFixture, shardable_test_integration: ShardableTestIntegration
 ):
+    mocker.patch.object(
+        desired_state_diff,
+        "find_changed_shards_by_digest",
+        side_effect=ShardDetectionNotSupported(),
+    )
     extract_diffs_with_timeout_mock = mocker.patch.object(
         desired_state_diff, "extract_diffs_with_timeout"
     )
@@ -366,3 +373,85 @@ def test_find_changed_shards_no_diff():
         ).affected_shards
         == set()
     )
+
+
+#
+# find changed shards by digest
+#
+
+
+NESTED_SHARD_CONFIG = DesiredStateShardConfig(
+    shard_arg_name="account",
+    shard_path_selectors={"roles[*].groups[*].account", "accounts[*].name"},
+    sharded_run_review=lambda x: True,
+)
+
+
+def nested_desired_state() -> dict[str, Any]:
+    return {
+        "accounts": [{"name": "a"}, {"name": "b"}, {"name": "c"}],
+        "roles": [
+            {"name": "r1", "groups": [{"account": "a"}, {"account": "b"}]},
+            {"name": "r2", "groups": [{"account": "c"}]},
+        ],
+    }
+
+
+def test_find_changed_shards_by_digest_nested_element():
+    current = nested_desired_state()
+    current["roles"][0]["groups"][1]["policy"] = "admin"
+    assert find_changed_shards_by_digest(
+        nested_desired_state(), current, NESTED_SHARD_CONFIG
+    ) == {"b"}
+
+
+def test_find_changed_shards_by_digest_parent_change():
+    """
+    a change to a parent affects all shards below it
+    """
+    current = nested_desired_state()
+    current["roles"][0]["name"] = "r3"
+    assert find_changed_shards_by_digest(
+        nested_desired_state(), current, NESTED_SHARD_CONFIG
+    ) == {"a", "b"}
+
+
+def test_find_changed_shards_by_digest_move_between_parents():
+    current = nested_desired_state()
+    current["roles"][1]["groups"].append(current["roles"][0]["groups"].pop(0))
+    assert find_changed_shards_by_digest(
+        nested_desired_state(), current, NESTED_SHARD_CONFIG
+    ) == {"a"}
+
+
+def test_find_changed_shards_by_digest_reorder():
+    current = nested_desired_state()
+    current["accounts"].reverse()
+    assert (
+        find_changed_shards_by_digest(
+            nested_desired_state(), current, NESTED_SHARD_CONFIG
+        )
+        == set()
+    )
+
+
+def test_find_changed_shards_by_digest_change_outside_shards():
+    current = nested_desired_state()
+    current["settings"] = {"dry_run": True}
+    with pytest.raises(ShardDetectionNotSupported):
+        find_changed_shards_by_digest(
+            nested_desired_state(), current, NESTED_SHARD_CONFIG
+        )
+
+
+def test_find_changed_shards_by_digest_unsupported_selector():
+    with pytest.raises(ShardDetectionNotSupported):
+        find_changed_shards_by_digest(
+            {"data": [{"shard": "a"}]},
+            {"data": [{"shard": "b"}]},
+            DesiredStateShardConfig(
+                shard_arg_name="shard",
+                shard_path_selectors={"data[?(@.shard=='a')].shard"},
+                sharded_run_review=lambda x: True,
+            ),
+        )
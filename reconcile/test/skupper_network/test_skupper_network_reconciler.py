@@ -2,6 +2,7 @@ import copy
 from typing import Any
 from unittest.mock import (
     ANY,
+    MagicMock,
     call,
 )
 
@@ -18,7 +19,7 @@ from reconcile.utils.oc_map import OCMap
 def test_skupper_network_reconciler_delete_skupper_resources(
     dry_run: bool,
     oc_map: OCMap,
-    oc: OCNative,
+    oc: MagicMock,
     skupper_sites: list[SkupperSite],
     fake_site_configmap: dict[str, Any],
 ) -> None:
@@ -75,7 +76,7 @@ def test_skupper_network_reconciler_get_token(
 def test_skupper_network_reconciler_create_token(
     dry_run: bool,
     oc_map: OCMap,
-    oc: OCNative,
+    oc: MagicMock,
     skupper_sites: list[SkupperSite],
 ) -> None:
     site = skupper_sites[0]
@@ -121,7 +122,7 @@ def test_skupper_network_reconciler_transfer_token(
     is_usable_connection_token: bool,
     mocker: MockerFixture,
     oc_map: OCMap,
-    oc: OCNative,
+    oc: MagicMock,
     skupper_sites: list[SkupperSite],
     fake_token: dict[str, Any],
 ) -> None:
@@ -274,7 +275,7 @@ def test_skupper_network_reconciler_delete_unused_tokens(
     token_secrets: list[dict[str, Any]],
     expected_deletion_count: int,
     oc_map: OCMap,
-    oc: OCNative,
+    oc: MagicMock,
     skupper_sites: list[SkupperSite],
 ) -> None:
     edge_1 = skupper_sites[0]
@@ -0,0 +1,121 @@
+import os
+from typing import Optional
+from unittest.mock import patch
+
+import pytest
+
+from reconcile.gcr_mirror import QuayMirror
+from reconcile.utils.mirror_digest_index import MirrorDigestIndex
+
+
+class FakeImage:
+    # image url -> tag -> manifest
+    REGISTRY: dict[str, dict[str, str]] = {}
+    # tags whose manifests were compared
+    COMPARED: list[str] = []
+
+    def __init__(self, url: str, tag: Optional[str] = None, **kwargs) -> None:
+        self.url = url
+        self.tag = tag
+
+    def __iter__(self):
+        return iter(self.REGISTRY.get(self.url, {}))
+
+    def __contains__(self, tag: str) -> bool:
+        return tag in self.REGISTRY.get(self.url, {})
+
+    def __getitem__(self, tag: str) -> "FakeImage":
+        return FakeImage(self.url, tag)
+
+    def __eq__(self, other: object) -> bool:
+        assert isinstance(other, FakeImage)
+        self.COMPARED.append(str(self))
+        return self.manifest == other.manifest
+
+    @property
+    def manifest(self) -> str:
+        assert self.tag
+        return self.REGISTRY[self.url][self.tag]
+
+    @property
+    def digest(self) -> str:
+        return f"sha256:{self.manifest}"
+
+    def __str__(self) -> str:
+        return f"{self.url}:{self.tag}"
+
+
+SUMMARY = {
+    "project": [
+        {
+            "name": "a",
+            "mirror": {"url": "docker.io/upstream-a", "pullCredentials": None},
+            "server_url": "gcr.io",
+        }
+    ]
+}
+
+
+def new_gcr_mirror(tmp_path, dry_run: bool = False) -> QuayMirror:
+    with patch("reconcile.utils.gql.get_api", autospec=True), patch(
+        "reconcile.queries.get_app_interface_settings", return_value={}
+    ), patch.object(QuayMirror, "_get_push_creds", return_value={}):
+        gm = QuayMirror(dry_run)
+    gm.digest_index = MirrorDigestIndex(str(tmp_path / "digests.json"))
+    return gm
+
+
+@pytest.fixture
+def registry():
+    FakeImage.REGISTRY = {
+        "docker.io/upstream-a": {"1": "m1", "2": "m2", "3": "m3"},
+        "gcr.io/project/a": {"1": "m1", "2": "old"},
+    }
+    FakeImage.COMPARED = []
+    with patch("reconcile.gcr_mirror.Image", FakeImage), patch(
+        "reconcile.utils.mirror_digest_index.manifest_digest",
+        lambda image: image.digest,
+    ), patch.object(QuayMirror, "process_repos_query", return_value=SUMMARY):
+        yield
+
+
+def image_urls(sync_tasks) -> list[str]:
+    return [t["image_url"] for t in sync_tasks["project"]]
+
+
+@patch.object(QuayMirror, "_is_deep_sync", return_value=True)
+def test_deep_sync_skips_unchanged_tags(mock_deep_sync, registry, tmp_path):
+    gm = new_gcr_mirror(tmp_path)
+
+    sync_tasks = gm.process_sync_tasks()
+    assert sorted(FakeImage.COMPARED) == ["gcr.io/project/a:1", "gcr.io/project/a:2"]
+    assert image_urls(sync_tasks) == ["gcr.io/project/a:2", "gcr.io/project/a:3"]
+
+    FakeImage.COMPARED = []
+    sync_tasks = new_gcr_mirror(tmp_path).process_sync_tasks()
+    # a:1 was in sync and the digests did not change
+    assert FakeImage.COMPARED == ["gcr.io/project/a:2"]
+    assert image_urls(sync_tasks) == ["gcr.io/project/a:2", "gcr.io/project/a:3"]
+
+    FakeImage.COMPARED = []
+    FakeImage.REGISTRY["docker.io/upstream-a"]["1"] = "m1-rebuilt"
+    sync_tasks = new_gcr_mirror(tmp_path).process_sync_tasks()
+    assert sorted(FakeImage.COMPARED) == ["gcr.io/project/a:1", "gcr.io/project/a:2"]
+    assert "gcr.io/project/a:1" in image_urls(sync_tasks)
+
+
+@pytest.mark.parametrize(
+    "deep_sync, dry_run, saved",
+    [
+        (True, False, True),
+        (False, False, False),
+        (True, True, False),
+    ],
+)
+def test_digest_index_saved_on_deep_sync(registry, tmp_path, deep_sync, dry_run, saved):
+    gm = new_gcr_mirror(tmp_path, dry_run=dry_run)
+
+    with patch.object(QuayMirror, "_is_deep_sync", return_value=deep_sync):
+        gm.process_sync_tasks()
+
+    assert os.path.exists(tmp_path / "digests.json") == saved
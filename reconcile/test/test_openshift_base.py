@@ -4,7 +4,9 @@ from unittest.mock import patch
 
 import pytest
 import yaml
+from kubernetes.client.exceptions import ApiException
 from kubernetes.dynamic import Resource
+from kubernetes.dynamic.exceptions import ForbiddenError
 from pydantic import BaseModel
 from pytest_mock import MockerFixture
 
@@ -728,3 +730,266 @@ def test_user_has_cluster_access(mocker: MockerFixture):
     )
     assert sut.user_has_cluster_access(user, cluster, ["user_org"])
     assert not sut.user_has_cluster_access(user, cluster, ["another_user"])
+
+
+#
+# server-side apply tests
+#
+
+
+def build_configmap(data: dict[str, str]) -> resource.OpenshiftResource:
+    body = build_resource("ConfigMap", "v1", "cm")
+    body["data"] = data
+    return resource.OpenshiftResource(body, TEST_INT, TEST_INT_VER)
+
+
+@pytest.fixture
+def ssa_oc(mocker: MockerFixture):
+    return mocker.create_autospec(oc.OCCli, instance=True)
+
+
+@pytest.fixture
+def ssa_oc_map(mocker: MockerFixture, ssa_oc):
+    oc_map = mocker.create_autospec(oc.OC_Map, instance=True)
+    oc_map.get.return_value = ssa_oc
+    oc_map.get_cluster.return_value = ssa_oc
+    return oc_map
+
+
+@pytest.fixture
+def ssa_ri() -> resource.ResourceInventory:
+    ri = resource.ResourceInventory()
+    ri.initialize_resource_type("cs1", "ns1", "ConfigMap")
+    ri.add_desired("cs1", "ns1", "ConfigMap", "cm", build_configmap({"k": "v"}))
+    current = build_configmap({"k": "v"}).annotate()
+    current.body["metadata"]["resourceVersion"] = "123"
+    current.body["metadata"]["managedFields"] = [{"manager": "qontract-reconcile"}]
+    ri.add_current("cs1", "ns1", "ConfigMap", "cm", current)
+    return ri
+
+
+def test_apply_server_side(ssa_oc_map, ssa_oc):
+    sut.apply(
+        dry_run=False,
+        oc_map=ssa_oc_map,
+        cluster="cs1",
+        namespace="ns1",
+        resource_type="ConfigMap",
+        resource=build_configmap({"k": "v"}),
+        wait_for_namespace=False,
+        recycle_pods=False,
+        server_side_apply=True,
+    )
+    ssa_oc.apply_server_side.assert_called_once()
+    ssa_oc.apply.assert_not_called()
+
+
+def test_apply_server_side_fallback(ssa_oc_map, ssa_oc):
+    ssa_oc.apply_server_side.side_effect = [oc.InvalidValueApplyError("err"), None]
+    sut.apply(
+        dry_run=False,
+        oc_map=ssa_oc_map,
+        cluster="cs1",
+        namespace="ns1",
+        resource_type="ConfigMap",
+        resource=build_configmap({"k": "v"}),
+        wait_for_namespace=False,
+        recycle_pods=False,
+        server_side_apply=True,
+    )
+    ssa_oc.remove_last_applied_configuration.assert_called_once()
+    assert ssa_oc.apply_server_side.call_count == 2
+    ssa_oc.apply.assert_not_called()
+
+
+def test_realize_data_server_side_compare_matches(ssa_oc_map, ssa_oc, ssa_ri):
+    current = ssa_ri.get_current("cs1", "ns1", "ConfigMap", "cm")
+    dry_run_result = yaml.safe_load(yaml.safe_dump(current.body))
+    dry_run_result["metadata"]["resourceVersion"] = "124"
+    ssa_oc.apply_server_side_dry_run.return_value = dry_run_result
+
+    actions = sut.realize_data(
+        False,
+        ssa_oc_map,
+        ssa_ri,
+        1,
+        server_side_apply=True,
+        server_side_compare_kinds=["ConfigMap"],
+    )
+
+    assert actions == []
+    body = ssa_oc.apply_server_side_dry_run.call_args[0][1]
+    assert body["metadata"]["annotations"] == {
+        k: v
+        for k, v in current.body["metadata"]["annotations"].items()
+        if k.startswith("qontract.")
+    }
+    ssa_oc.apply_server_side.assert_not_called()
+
+
+def test_realize_data_server_side_compare_differs(ssa_oc_map, ssa_oc, ssa_ri):
+    current = ssa_ri.get_current("cs1", "ns1", "ConfigMap", "cm")
+    dry_run_result = yaml.safe_load(yaml.safe_dump(current.body))
+    dry_run_result["data"] = {"k": "changed-on-cluster"}
+    ssa_oc.apply_server_side_dry_run.return_value = dry_run_result
+
+    actions = sut.realize_data(
+        False,
+        ssa_oc_map,
+        ssa_ri,
+        1,
+        server_side_apply=True,
+        server_side_compare_kinds=["ConfigMap"],
+    )
+
+    assert [a["action"] for a in actions] == [sut.ACTION_APPLIED]
+    ssa_oc.apply_server_side.assert_called_once()
+
+
+def test_realize_data_server_side_compare_requires_server_side_apply(
+    ssa_oc_map, ssa_oc, ssa_ri
+):
+    actions = sut.realize_data(
+        False,
+        ssa_oc_map,
+        ssa_ri,
+        1,
+        server_side_apply=False,
+        server_side_compare_kinds=["ConfigMap"],
+    )
+
+    assert actions == []
+    ssa_oc.apply_server_side_dry_run.assert_not_called()
+
+
+#
+# cluster wide fetch tests
+#
+
+
+def build_namespaced_resource(name: str, namespace: str) -> dict[str, Any]:
+    body = build_resource("Kind", "fully.qualified/v1", name)
+    body["metadata"]["namespace"] = namespace
+    return body
+
+
+def current_state_specs(
+    oc_client: oc.OCClient, namespaces: list[str]
+) -> list[sut.CurrentStateSpec]:
+    return [
+        sut.CurrentStateSpec(
+            oc=oc_client,
+            cluster="cs1",
+            namespace=ns,
+            kind="Kind.fully.qualified",
+            resource_names=None,
+        )
+        for ns in namespaces
+    ]
+
+
+def test_group_current_state_specs_auto(oc_cs1: oc.OCNative):
+    specs = current_state_specs(oc_cs1, ["ns1", "ns2"])
+    named = sut.CurrentStateSpec(
+        oc=oc_cs1,
+        cluster="cs1",
+        namespace="ns3",
+        kind="Kind.fully.qualified",
+        resource_names=["name"],
+    )
+
+    grouped = sut.group_current_state_specs(
+        specs + [named], sut.FETCH_STRATEGY_AUTO, min_namespaces=2
+    )
+
+    assert grouped == [
+        named,
+        sut.ClusterWideCurrentStateSpec(
+            oc=oc_cs1, cluster="cs1", kind="Kind.fully.qualified", specs=specs
+        ),
+    ]
+    assert (
+        sut.group_current_state_specs(specs, sut.FETCH_STRATEGY_AUTO, min_namespaces=3)
+        == specs
+    )
+
+
+def test_group_current_state_specs_namespaced(oc_cs1: oc.OCNative):
+    specs = current_state_specs(oc_cs1, ["ns1", "ns2"])
+    assert (
+        sut.group_current_state_specs(
+            specs, sut.FETCH_STRATEGY_NAMESPACED, min_namespaces=1
+        )
+        == specs
+    )
+
+
+def test_populate_current_state_cluster_wide(
+    api_resources, resource_inventory: resource.ResourceInventory, oc_cs1: oc.OCNative
+):
+    oc_cs1.init_api_resources = True
+    oc_cs1.api_resources = api_resources
+    oc_cs1.get_items = lambda kind, **kwargs: [
+        build_namespaced_resource("a", "ns1"),
+        build_namespaced_resource("b", "ns2"),
+        build_namespaced_resource("c", "unmanaged"),
+    ]
+    for ns in ["ns1", "ns2"]:
+        resource_inventory.initialize_resource_type("cs1", ns, "Kind.fully.qualified")
+    spec = sut.ClusterWideCurrentStateSpec(
+        oc=oc_cs1,
+        cluster="cs1",
+        kind="Kind.fully.qualified",
+        specs=current_state_specs(oc_cs1, ["ns1", "ns2"]),
+    )
+
+    sut.populate_current_state_cluster_wide(
+        spec, resource_inventory, TEST_INT, TEST_INT_VER
+    )
+
+    current = {
+        (namespace, name)
+        for _, namespace, _, data in resource_inventory
+        for name in data["current"]
+    }
+    assert current == {("ns1", "a"), ("ns2", "b")}
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        oc.StatusCodeError("forbidden"),
+        ForbiddenError(ApiException(status=403, reason="Forbidden")),
+    ],
+)
+def test_populate_current_state_cluster_wide_fallback(
+    api_resources,
+    resource_inventory: resource.ResourceInventory,
+    oc_cs1: oc.OCNative,
+    error: Exception,
+):
+    def get_items(kind, **kwargs):
+        if kwargs.get("all_namespaces"):
+            raise error
+        return [build_namespaced_resource("a", kwargs["namespace"])]
+
+    oc_cs1.init_api_resources = True
+    oc_cs1.api_resources = api_resources
+    oc_cs1.get_items = get_items
+    resource_inventory.initialize_resource_type("cs1", "ns1", "Kind.fully.qualified")
+    spec = sut.ClusterWideCurrentStateSpec(
+        oc=oc_cs1,
+        cluster="cs1",
+        kind="Kind.fully.qualified",
+        specs=current_state_specs(oc_cs1, ["ns1"]),
+    )
+
+    sut.populate_current_state_cluster_wide(
+        spec, resource_inventory, TEST_INT, TEST_INT_VER
+    )
+
+    assert resource_inventory.get_current(
+        "cs1", "ns1", "Kind.fully.qualified", "a"
+    ) == resource.OpenshiftResource(
+        build_namespaced_resource("a", "ns1"), TEST_INT, TEST_INT_VER
+    )
@@ -1,3 +1,5 @@
+import copy
+
 import pytest
 
 from reconcile.utils.openshift_resource import ConstructResourceError
@@ -220,6 +222,55 @@ def test_secret_string_data():
     assert result == expected
 
 
+def test_canonicalize_does_not_modify_body():
+    resource = {
+        "kind": "RoleBinding",
+        "apiVersion": "rbac.authorization.k8s.io/v1",
+        "metadata": {
+            "name": "resource",
+            "namespace": "ns",
+            "annotations": {"qontract.sha256sum": "sha"},
+        },
+        "roleRef": {"kind": "Role", "name": "role", "namespace": "ns"},
+        "subjects": [{"kind": "User", "name": "user", "namespace": "ns"}],
+    }
+    expected = copy.deepcopy(resource)
+
+    result = OR.canonicalize(resource)
+
+    assert resource == expected
+    assert result == {
+        "kind": "RoleBinding",
+        "apiVersion": "authorization.openshift.io/v1",
+        "metadata": {"name": "resource", "annotations": {}},
+        "roleRef": {"name": "role"},
+        "subjects": [{"kind": "User", "name": "user"}],
+    }
+
+
+def test_sha256sum_is_cached(mocker):
+    openshift_resource = OR(
+        {"kind": "ConfigMap", "metadata": {"name": "cm"}, "data": {"k": "v"}},
+        TEST_INT,
+        TEST_INT_VER,
+    )
+    canonicalize = mocker.spy(OR, "canonicalize")
+
+    sha256sum = openshift_resource.sha256sum()
+    assert openshift_resource.sha256sum() == sha256sum
+    assert openshift_resource.annotate().sha256sum() == sha256sum
+    assert canonicalize.call_count == 1
+
+    openshift_resource.body["data"]["k"] = "changed"
+    openshift_resource.invalidate_sha256sum()
+    assert openshift_resource.sha256sum() != sha256sum
+
+    openshift_resource.body = {"kind": "ConfigMap", "metadata": {"name": "cm"}}
+    assert canonicalize.call_count == 2
+    assert openshift_resource.sha256sum() not in [sha256sum, None]
+    assert canonicalize.call_count == 3
+
+
 def test_managed_cluster_label_ignore():
     desired = {
         "apiVersion": "cluster.open-cluster-management.io/v1",
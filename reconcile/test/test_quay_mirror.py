@@ -1,12 +1,22 @@
 import os
 import tempfile
-from unittest.mock import patch
+import threading
+import time
+from typing import Optional
+from unittest.mock import (
+    Mock,
+    patch,
+)
 
 import pytest
+from sretoolbox.container.image import ImageContainsError
+from sretoolbox.container.skopeo import SkopeoCmdError
 
 from reconcile.quay_mirror import (
     CONTROL_FILE_NAME,
+    OrgKey,
     QuayMirror,
+    is_transient_skopeo_error,
 )
 
 NOW = 1662124612.995397
@@ -107,3 +117,243 @@ class TestIsCompareTags:
 )
 def test_sync_tag(tags, tags_exclude, candidate, result):
     assert QuayMirror.sync_tag(tags, tags_exclude, candidate) == result
+
+
+class FakeImage:
+    """An image with tags and manifests known upfront instead of fetched."""
+
+    # image url -> tag -> manifest
+    REGISTRY: dict[str, dict[str, str]] = {}
+    # tags whose manifests were compared
+    COMPARED: list[str] = []
+
+    def __init__(self, url: str, tag: Optional[str] = None, **kwargs) -> None:
+        self.url = url
+        self.tag = tag
+        self.response_cache_hits = 0
+        self.response_cache_misses = 0
+
+    def __iter__(self):
+        return iter(self.REGISTRY.get(self.url, {}))
+
+    def __contains__(self, tag: str) -> bool:
+        return tag in self.REGISTRY.get(self.url, {})
+
+    def __getitem__(self, tag: str) -> "FakeImage":
+        return FakeImage(self.url, tag)
+
+    def __eq__(self, other: object) -> bool:
+        assert isinstance(other, FakeImage)
+        self.COMPARED.append(str(self))
+        return self.manifest == other.manifest
+
+    def is_part_of(self, other: "FakeImage") -> bool:
+        raise ImageContainsError()
+
+    @property
+    def manifest(self) -> str:
+        assert self.tag
+        return self.REGISTRY[self.url][self.tag]
+
+    @property
+    def digest(self) -> str:
+        return f"sha256:{self.manifest}"
+
+    def __str__(self) -> str:
+        return f"{self.url}:{self.tag}"
+
+
+ORG_KEY = OrgKey("quay", "app-sre")
+
+
+def new_quay_mirror(control_file_dir: str) -> QuayMirror:
+    with patch("reconcile.utils.gql.get_api", autospec=True), patch(
+        "reconcile.queries.get_app_interface_settings", return_value={}
+    ):
+        qm = QuayMirror(
+            control_file_dir=control_file_dir, compare_tags=True, thread_pool_size=4
+        )
+    qm.push_creds = {ORG_KEY: "user:token"}
+    qm.skopeo_cli = Mock()
+    return qm
+
+
+@pytest.fixture
+def quay_mirror(tmp_path):
+    return new_quay_mirror(str(tmp_path))
+
+
+@pytest.fixture
+def registry():
+    FakeImage.REGISTRY = {
+        "docker.io/upstream-a": {"1": "m1", "2": "m2", "3": "m3"},
+        "quay.io/app-sre/a": {"1": "m1", "2": "old"},
+        "docker.io/upstream-b": {"x": "mx"},
+        "quay.io/app-sre/b": {},
+    }
+    FakeImage.COMPARED = []
+    summary = {
+        ORG_KEY: [
+            {
+                "name": name,
+                "mirror": {
+                    "url": f"docker.io/upstream-{name}",
+                    "pullCredentials": None,
+                },
+                "server_url": "quay.io",
+            }
+            for name in ["a", "b"]
+        ]
+    }
+    with patch("reconcile.quay_mirror.Image", FakeImage), patch(
+        "reconcile.utils.mirror_digest_index.manifest_digest",
+        lambda image: image.digest,
+    ), patch.object(QuayMirror, "process_repos_query", return_value=summary):
+        yield summary
+
+
+def test_process_sync_tasks_compare_tags(quay_mirror, registry):
+    sync_tasks = quay_mirror.process_sync_tasks()
+
+    assert [t["image_url"] for t in sync_tasks[ORG_KEY]] == [
+        "quay.io/app-sre/a:2",
+        "quay.io/app-sre/a:3",
+        "quay.io/app-sre/b:x",
+    ]
+
+
+def test_process_sync_tasks_no_compare_tags(quay_mirror, registry):
+    quay_mirror.compare_tags = False
+    sync_tasks = quay_mirror.process_sync_tasks()
+
+    assert [t["image_url"] for t in sync_tasks[ORG_KEY]] == [
+        "quay.io/app-sre/a:3",
+        "quay.io/app-sre/b:x",
+    ]
+
+
+def test_compare_tags_only_compares_changed_tags(quay_mirror, registry):
+    quay_mirror.process_sync_tasks()
+    assert sorted(FakeImage.COMPARED) == ["quay.io/app-sre/a:1", "quay.io/app-sre/a:2"]
+
+    FakeImage.COMPARED = []
+    sync_tasks = quay_mirror.process_sync_tasks()
+    # a:1 was in sync and did not change upstream
+    assert FakeImage.COMPARED == ["quay.io/app-sre/a:2"]
+    assert [t["image_url"] for t in sync_tasks[ORG_KEY]] == [
+        "quay.io/app-sre/a:2",
+        "quay.io/app-sre/a:3",
+        "quay.io/app-sre/b:x",
+    ]
+
+    FakeImage.COMPARED = []
+    FakeImage.REGISTRY["docker.io/upstream-a"]["1"] = "m1-rebuilt"
+    sync_tasks = quay_mirror.process_sync_tasks()
+    assert sorted(FakeImage.COMPARED) == ["quay.io/app-sre/a:1", "quay.io/app-sre/a:2"]
+    assert "quay.io/app-sre/a:1" in [t["image_url"] for t in sync_tasks[ORG_KEY]]
+
+
+def test_compare_tags_compares_changed_downstream_tags(quay_mirror, registry):
+    quay_mirror.process_sync_tasks()
+
+    FakeImage.COMPARED = []
+    FakeImage.REGISTRY["quay.io/app-sre/a"]["1"] = "overwritten"
+    sync_tasks = quay_mirror.process_sync_tasks()
+    assert sorted(FakeImage.COMPARED) == ["quay.io/app-sre/a:1", "quay.io/app-sre/a:2"]
+    assert "quay.io/app-sre/a:1" in [t["image_url"] for t in sync_tasks[ORG_KEY]]
+
+
+def test_run_saves_digest_index(quay_mirror, registry, tmp_path):
+    quay_mirror.run()
+
+    FakeImage.COMPARED = []
+    new_quay_mirror(str(tmp_path)).process_sync_tasks()
+    assert FakeImage.COMPARED == ["quay.io/app-sre/a:2"]
+
+
+def test_filtered_run_keeps_digest_index(quay_mirror, registry, tmp_path):
+    quay_mirror.run()
+
+    qm = new_quay_mirror(str(tmp_path))
+    qm.images = ["b"]
+    b_only = {ORG_KEY: [item for item in registry[ORG_KEY] if item["name"] == "b"]}
+    with patch.object(QuayMirror, "process_repos_query", return_value=b_only):
+        qm.run()
+
+    FakeImage.COMPARED = []
+    new_quay_mirror(str(tmp_path)).process_sync_tasks()
+    assert FakeImage.COMPARED == ["quay.io/app-sre/a:2"]
+
+
+def test_run_copies_all_tasks(quay_mirror, registry):
+    quay_mirror.run()
+
+    assert sorted(
+        c.kwargs["dst_image"] for c in quay_mirror.skopeo_cli.copy.call_args_list
+    ) == ["quay.io/app-sre/a:2", "quay.io/app-sre/a:3", "quay.io/app-sre/b:x"]
+    assert {
+        c.kwargs["dest_creds"] for c in quay_mirror.skopeo_cli.copy.call_args_list
+    } == {"user:token"}
+
+
+@pytest.mark.parametrize(
+    "error, transient",
+    [
+        ("received unexpected HTTP status: 502 Bad Gateway", True),
+        ("toomanyrequests: too many requests to registry", True),
+        ("dial tcp: i/o timeout", True),
+        ("unauthorized: access to the requested resource is not authorized", False),
+        ("manifest unknown", False),
+    ],
+)
+def test_is_transient_skopeo_error(error, transient):
+    assert is_transient_skopeo_error(SkopeoCmdError(error)) == transient
+
+
+@patch("time.sleep")
+def test_copy_retries_transient_errors(mock_sleep, quay_mirror):
+    quay_mirror._copy_slots = {ORG_KEY: threading.BoundedSemaphore(1)}
+    quay_mirror.skopeo_cli.copy.side_effect = [SkopeoCmdError("502 Bad Gateway"), None]
+
+    quay_mirror._copy(
+        (ORG_KEY, {"mirror_url": "a", "mirror_creds": None, "image_url": "b"})
+    )
+
+    assert quay_mirror.skopeo_cli.copy.call_count == 2
+
+
+@patch("time.sleep")
+def test_copy_does_not_retry_permanent_errors(mock_sleep, quay_mirror):
+    quay_mirror._copy_slots = {ORG_KEY: threading.BoundedSemaphore(1)}
+    quay_mirror.skopeo_cli.copy.side_effect = SkopeoCmdError("manifest unknown")
+
+    quay_mirror._copy(
+        (ORG_KEY, {"mirror_url": "a", "mirror_creds": None, "image_url": "b"})
+    )
+
+    assert quay_mirror.skopeo_cli.copy.call_count == 1
+
+
+@patch("reconcile.quay_mirror.COPY_CONCURRENCY_PER_ORG", 1)
+def test_run_limits_copies_per_org(quay_mirror):
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+
+    def copy(**kwargs):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        time.sleep(0.01)
+        with lock:
+            running["now"] -= 1
+
+    quay_mirror.skopeo_cli.copy.side_effect = copy
+    tasks = [
+        {"mirror_url": f"m{i}", "mirror_creds": None, "image_url": f"i{i}"}
+        for i in range(6)
+    ]
+    with patch.object(QuayMirror, "process_sync_tasks", return_value={ORG_KEY: tasks}):
+        quay_mirror.run()
+
+    assert quay_mirror.skopeo_cli.copy.call_count == 6
+    assert running["max"] == 1
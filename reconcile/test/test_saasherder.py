@@ -29,6 +29,7 @@ from reconcile.gql_definitions.common.saas_files import (
     SaasResourceTemplateV2,
 )
 from reconcile.utils.jjb_client import JJB
+from reconcile.utils.openshift_resource import OpenshiftResource as OR
 from reconcile.utils.openshift_resource import ResourceInventory
 from reconcile.utils.saasherder import SaasHerder
 from reconcile.utils.saasherder.interfaces import SaasFile
@@ -621,6 +622,145 @@ class TestPopulateDesiredState(TestCase):
         self.assertEqual(self.saasherder.promotions, [None, None, None, None])
 
 
+class TestIncrementalPopulateDesiredState(TestPopulateDesiredState):
+    def setUp(self) -> None:
+        super().setUp()
+        self.state_store: dict[str, Any] = {}
+        state = MagicMock()
+        state.get.side_effect = self.state_store.get
+        state.__setitem__.side_effect = self.state_store.__setitem__
+        self.saasherder = SaasHerder(
+            self.saasherder.saas_files,
+            secret_reader=MockSecretReader(),
+            thread_pool_size=1,
+            integration="openshift-saas-deploy",
+            integration_version="0.1.0",
+            hash_length=7,
+            repo_url="https://repo-url.com",
+            state=state,
+            incremental=True,
+        )
+
+        self.get_commit_sha_patcher = patch.object(
+            SaasHerder,
+            "_get_commit_sha",
+            side_effect=lambda url, ref, github: ref,
+        )
+        self.image_digests_patcher = patch.object(
+            SaasHerder, "_image_digests", return_value={}
+        )
+        # process templates without the oc binary
+        self.process_implementation_patcher = patch(
+            "reconcile.utils.oc.OC_PROCESS_IMPLEMENTATION", "native"
+        )
+        self.get_commit_sha_patcher.start()
+        self.image_digests_patcher.start()
+        self.process_implementation_patcher.start()
+
+    def tearDown(self) -> None:
+        super().tearDown()
+        self.get_commit_sha_patcher.stop()
+        self.image_digests_patcher.stop()
+        self.process_implementation_patcher.stop()
+
+    def build_ri(self) -> ResourceInventory:
+        ri = ResourceInventory()
+        for resource_type in (
+            "Deployment",
+            "Service",
+            "ConfigMap",
+        ):
+            ri.initialize_resource_type("stage-1", "yolo-stage", resource_type)
+            ri.initialize_resource_type("prod-1", "yolo", resource_type)
+        return ri
+
+    def deploy(self) -> ResourceInventory:
+        """Populate the desired state and return the resulting current state."""
+        ri = self.build_ri()
+        self.saasherder.populate_desired_state(ri)
+        self.saasherder.save_deployment_states()
+        cluster_ri = self.build_ri()
+        for (cluster, namespace, resource_type, data) in ri:
+            for name, d_item in data["desired"].items():
+                c_item = OR(
+                    d_item.annotate().body,
+                    self.saasherder.integration,
+                    self.saasherder.integration_version,
+                )
+                cluster_ri.add_current(cluster, namespace, resource_type, name, c_item)
+        return cluster_ri
+
+    def test_populate_desired_state_cases(self) -> None:
+        # nothing deployed yet
+        super().test_populate_desired_state_cases()
+
+    def test_unchanged_targets_are_not_rendered(self) -> None:
+        cluster_ri = self.deploy()
+        rendered = SaasHerder._get_file_contents.call_count
+
+        self.saasherder.populate_desired_state(cluster_ri)
+
+        self.assertEqual(
+            rendered,
+            SaasHerder._get_file_contents.call_count,
+        )
+        cnt = 0
+        for (_, _, _, data) in cluster_ri:
+            for name, d_item in data["desired"].items():
+                self.assertIs(d_item, data["current"][name])
+                cnt += 1
+        self.assertEqual(5, cnt)
+
+    def test_changed_resources_are_rendered(self) -> None:
+        cluster_ri = self.deploy()
+        rendered = SaasHerder._get_file_contents.call_count
+        c_item = cluster_ri.get_current(
+            "stage-1", "yolo-stage", "ConfigMap", "some-app"
+        )
+        assert c_item
+        c_item.body["data"] = {"changed": "manually"}
+
+        self.saasherder.populate_desired_state(cluster_ri)
+
+        self.assertEqual(
+            rendered + 1,
+            SaasHerder._get_file_contents.call_count,
+        )
+        d_item = cluster_ri.get_desired(
+            "stage-1", "yolo-stage", "ConfigMap", "some-app"
+        )
+        self.assertIsNot(d_item, c_item)
+
+    def test_image_digests_are_looked_up_once_per_image(self) -> None:
+        self.image_digests_patcher.stop()
+        with patch("reconcile.utils.saasherder.saasherder.Image") as image:
+            image.return_value.digest = "sha256:abc"
+            cluster_ri = self.deploy()
+            self.saasherder.populate_desired_state(cluster_ri)
+
+        images = [c.args[0] for c in image.call_args_list]
+        self.assertTrue(images)
+        self.assertEqual(len(set(images)), len(images))
+        for deployment_state in self.state_store.values():
+            self.assertEqual(
+                {i: "sha256:abc" for i in deployment_state["images"]},
+                deployment_state["images"],
+            )
+
+    def test_changed_inputs_are_rendered(self) -> None:
+        cluster_ri = self.deploy()
+        rendered = SaasHerder._get_file_contents.call_count
+        for deployment_state in self.state_store.values():
+            deployment_state["fingerprint"] = "outdated"
+
+        self.saasherder.populate_desired_state(cluster_ri)
+
+        self.assertEqual(
+            rendered * 2,
+            SaasHerder._get_file_contents.call_count,
+        )
+
+
 @pytest.mark.usefixtures("inject_gql_class_factory")
 class TestCollectRepoUrls(TestCase):
     def setUp(self) -> None:
@@ -0,0 +1,114 @@
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from reconcile.utils.saasherder.image_cache import (
+    ImageDigestCache,
+    ImageExistenceCache,
+)
+from reconcile.utils.saasherder.models import ImageAuth
+
+IMAGE = "quay.io/app-sre/test:abcdef"
+DIGEST_IMAGE = "quay.io/app-sre/test@sha256:" + "0" * 64
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture
+def cache(clock: Clock) -> ImageExistenceCache:
+    return ImageExistenceCache(ttl=600, negative_ttl=60, clock=clock)
+
+
+def test_image_cache_tag_expires(cache, clock):
+    lookup = Mock(return_value=True)
+
+    assert cache.exists(IMAGE, ImageAuth(), lookup)
+    clock.now = 599
+    assert cache.exists(IMAGE, ImageAuth(), lookup)
+    lookup.assert_called_once()
+    clock.now = 600
+    assert cache.exists(IMAGE, ImageAuth(), lookup)
+    assert lookup.call_count == 2
+
+
+def test_image_cache_digest_never_expires(cache, clock):
+    lookup = Mock(return_value=True)
+
+    assert cache.exists(DIGEST_IMAGE, ImageAuth(), lookup)
+    clock.now = 10**9
+    assert cache.exists(DIGEST_IMAGE, ImageAuth(), lookup)
+    lookup.assert_called_once()
+
+
+def test_image_cache_negative_ttl(cache, clock):
+    lookup = Mock(side_effect=[False, True])
+
+    assert not cache.exists(DIGEST_IMAGE, ImageAuth(), lookup)
+    clock.now = 59
+    assert not cache.exists(DIGEST_IMAGE, ImageAuth(), lookup)
+    clock.now = 60
+    assert cache.exists(DIGEST_IMAGE, ImageAuth(), lookup)
+    assert lookup.call_count == 2
+
+
+def test_image_cache_keyed_by_auth(cache):
+    lookup = Mock(side_effect=[False, True])
+
+    assert not cache.exists(IMAGE, ImageAuth(), lookup)
+    assert cache.exists(IMAGE, ImageAuth(username="user", password="pw"), lookup)
+    assert lookup.call_count == 2
+
+
+def test_image_cache_errors_are_not_cached(cache):
+    lookup = Mock(side_effect=[Exception("rate limited"), True])
+
+    with pytest.raises(Exception):
+        cache.exists(IMAGE, ImageAuth(), lookup)
+    assert cache.exists(IMAGE, ImageAuth(), lookup)
+
+
+def test_image_cache_single_flight(cache):
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def lookup():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return True
+
+    first = threading.Thread(target=cache.exists, args=(IMAGE, ImageAuth(), lookup))
+    first.start()
+    started.wait()
+    second = threading.Thread(target=cache.exists, args=(IMAGE, ImageAuth(), lookup))
+    second.start()
+    release.set()
+    first.join()
+    second.join()
+
+    assert len(calls) == 1
+
+
+def test_image_digest_cache():
+    cache = ImageDigestCache()
+    lookup = Mock(side_effect=[Exception("rate limited"), "sha256:abc", "sha256:def"])
+
+    with pytest.raises(Exception):
+        cache.digest(IMAGE, ImageAuth(), lookup)
+    assert cache.digest(IMAGE, ImageAuth(), lookup) == "sha256:abc"
+    assert cache.digest(IMAGE, ImageAuth(), lookup) == "sha256:abc"
+    assert cache.digest(IMAGE, ImageAuth(username="user"), lookup) == "sha256:def"
+    assert lookup.call_count == 3
@@ -0,0 +1,102 @@
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from reconcile.utils.saasherder.template_cache import TemplateCache
+
+URL = "https://github.com/app-sre/test"
+SHA = "8a5d8f1e8d1ef1f43e3fbc4f1b77c8d1d2e0a5a1"
+TEMPLATE = """
+apiVersion: v1
+kind: Template
+objects:
+- apiVersion: v1
+  kind: ConfigMap
+  metadata:
+    name: cm
+"""
+
+
+def test_template_cache_file_contents():
+    cache = TemplateCache()
+    fetch = Mock(return_value=TEMPLATE)
+
+    template = cache.file_contents(URL, "/template.yml", SHA, fetch)
+    template["objects"].clear()
+
+    assert cache.file_contents(URL, "/template.yml", SHA, fetch)["objects"] == [
+        {"apiVersion": "v1", "kind": "ConfigMap", "metadata": {"name": "cm"}}
+    ]
+    fetch.assert_called_once()
+    cache.file_contents(URL, "/template.yml", "other-sha", fetch)
+    assert fetch.call_count == 2
+
+
+def test_template_cache_directory_contents():
+    cache = TemplateCache()
+    fetch = Mock(return_value=["kind: A", "kind: B"])
+
+    for _ in range(2):
+        assert cache.directory_contents(URL, "/dir", SHA, fetch) == [
+            {"kind": "A"},
+            {"kind": "B"},
+        ]
+    fetch.assert_called_once()
+
+
+def test_template_cache_persists_on_disk(tmp_path):
+    fetch = Mock(return_value=TEMPLATE)
+
+    for _ in range(2):
+        cache = TemplateCache(str(tmp_path))
+        assert cache.file_contents(URL, "/template.yml", SHA, fetch)["kind"] == (
+            "Template"
+        )
+    fetch.assert_called_once()
+
+
+def test_template_cache_commit_sha():
+    cache = TemplateCache()
+    resolve = Mock(side_effect=[SHA, "other-sha"])
+
+    assert cache.commit_sha(URL, "main", resolve) == SHA
+    assert cache.commit_sha(URL, "main", resolve) == SHA
+    resolve.assert_called_once()
+
+
+def test_template_cache_single_flight():
+    cache = TemplateCache()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return TEMPLATE
+
+    first = threading.Thread(
+        target=cache.file_contents, args=(URL, "/template.yml", SHA, fetch)
+    )
+    first.start()
+    started.wait()
+    second = threading.Thread(
+        target=cache.file_contents, args=(URL, "/template.yml", SHA, fetch)
+    )
+    second.start()
+    release.set()
+    first.join()
+    second.join()
+
+    assert len(calls) == 1
+
+
+def test_template_cache_failed_lookup_is_not_cached():
+    cache = TemplateCache()
+    fetch = Mock(side_effect=[Exception("rate limited"), TEMPLATE])
+
+    with pytest.raises(Exception):
+        cache.file_contents(URL, "/template.yml", SHA, fetch)
+    assert cache.file_contents(URL, "/template.yml", SHA, fetch)["kind"] == "Template"
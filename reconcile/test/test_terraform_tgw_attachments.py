@@ -588,7 +588,7 @@ def test_dry_run(
     mocks["get_app_interface_vault_settings"].assert_called_once_with()
     mocks["get_clusters_with_peering"].assert_called_once_with(mocks["gql_api"])
     mocks["get_aws_accounts"].assert_called_once_with(mocks["gql_api"], name=None)
-    mocks["tf"].plan.assert_called_once_with(False)
+    mocks["tf"].plan.assert_called_once_with(False, dry_run=True)
     mocks["tf"].apply.assert_not_called()
 
 
@@ -606,7 +606,7 @@ def test_non_dry_run(
     mocks["get_app_interface_vault_settings"].assert_called_once_with()
     mocks["get_clusters_with_peering"].assert_called_once_with(mocks["gql_api"])
     mocks["get_aws_accounts"].assert_called_once_with(mocks["gql_api"], name=None)
-    mocks["tf"].plan.assert_called_once_with(False)
+    mocks["tf"].plan.assert_called_once_with(False, dry_run=False)
     mocks["tf"].apply.assert_called_once()
 
 
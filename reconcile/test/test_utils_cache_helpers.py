@@ -0,0 +1,76 @@
+import os
+import threading
+
+import pytest
+
+from reconcile.utils.cache_helpers import (
+    SingleFlight,
+    write_atomically,
+)
+
+
+def test_single_flight_computes_once():
+    lock = threading.Lock()
+    values: dict[str, int] = {}
+    single_flight = SingleFlight(lock)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute() -> int:
+        calls.append(1)
+        started.set()
+        release.wait()
+        with lock:
+            values["k"] = 42
+        return 42
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                single_flight.get("k", lambda: values.get("k"), compute)
+            )
+        )
+        for _ in range(4)
+    ]
+    threads[0].start()
+    started.wait()
+    for t in threads[1:]:
+        t.start()
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert results == [42] * 4
+    assert len(calls) == 1
+
+
+def test_single_flight_retries_after_failure():
+    single_flight = SingleFlight(threading.Lock())
+
+    def fail() -> int:
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        single_flight.get("k", lambda: None, fail)
+    assert single_flight.get("k", lambda: None, lambda: 1) == 1
+
+
+def test_write_atomically(tmp_path):
+    path = str(tmp_path / "file")
+    write_atomically(path, b"one")
+    write_atomically(path, b"two")
+
+    with open(path, "rb") as f:
+        assert f.read() == b"two"
+    assert os.listdir(tmp_path) == ["file"]
+
+
+def test_write_atomically_cleans_up(tmp_path):
+    # the target is a directory, so it can't be replaced
+    os.mkdir(tmp_path / "dir")
+
+    with pytest.raises(OSError):
+        write_atomically(str(tmp_path / "dir"), b"data")
+    assert os.listdir(tmp_path) == ["dir"]
@@ -1,12 +1,17 @@
+import json
+import threading
+
 import pytest
 import requests
 from gql.transport.exceptions import TransportQueryError
 
+from reconcile.gql_definitions.common import app_interface_repo_settings
 from reconcile.utils.gql import (
     GqlApi,
     GqlApiError,
     GqlApiErrorForbiddenSchema,
     GqlApiIntegrationNotFound,
+    PooledRequestsHTTPTransport,
 )
 
 TEST_QUERY = """
@@ -79,3 +84,231 @@ def test_gqlapi_throws_gqlapierrorforbiddenschema_exception(mocker):
     with pytest.raises(GqlApiErrorForbiddenSchema):
         gql_api = GqlApi("test_url", "test_token", "INTEGRATION", validate_schemas=True)
         gql_api.query.__wrapped__(gql_api, TEST_QUERY)
+
+
+def test_gqlapi_reuses_client_within_thread():
+    gql_api = GqlApi("test_url", "test_token", validate_schemas=False)
+    assert gql_api._client is gql_api._client
+
+
+def test_gqlapi_client_per_thread_shares_session():
+    gql_api = GqlApi("test_url", "test_token", validate_schemas=False)
+    clients = []
+    thread = threading.Thread(target=lambda: clients.append(gql_api._client))
+    thread.start()
+    thread.join()
+
+    assert clients[0] is not gql_api._client
+    for transport in (clients[0].transport, gql_api._client.transport):
+        assert isinstance(transport, PooledRequestsHTTPTransport)
+        assert transport._pooled_session is gql_api._session
+
+
+def test_pooled_transport_can_reconnect():
+    session = requests.Session()
+    transport = PooledRequestsHTTPTransport("test_url", session)
+    for _ in range(2):
+        transport.connect()
+        assert transport.session is session
+        transport.close()
+        assert transport.session is None
+
+
+def test_gqlapi_memoizes_identical_queries(mocker):
+    patched_client = mocker.patch("reconcile.utils.gql.Client.execute", autospec=True)
+    patched_client.return_value.formatted = {"data": {"clusters": [{"name": "c"}]}}
+    gql_api = GqlApi("test_url", "test_token", validate_schemas=False)
+
+    first = gql_api.query.__wrapped__(gql_api, TEST_QUERY, {"a": 1})
+    first["clusters"].append({"name": "mutated"})
+    second = gql_api.query.__wrapped__(gql_api, TEST_QUERY, {"a": 1})
+    gql_api.query.__wrapped__(gql_api, TEST_QUERY, {"a": 2})
+
+    assert second == {"clusters": [{"name": "c"}]}
+    assert patched_client.call_count == 2
+
+
+def test_gqlapi_memo_does_not_keep_failures(mocker):
+    patched_client = mocker.patch("reconcile.utils.gql.Client.execute", autospec=True)
+    patched_client.side_effect = [
+        Exception("Something went wrong!"),
+        mocker.Mock(formatted={"data": {"clusters": []}}),
+    ]
+    gql_api = GqlApi("test_url", "test_token", validate_schemas=False)
+
+    with pytest.raises(GqlApiError):
+        gql_api.query.__wrapped__(gql_api, TEST_QUERY)
+    assert gql_api.query.__wrapped__(gql_api, TEST_QUERY) == {"clusters": []}
+
+
+def test_gqlapi_memo_evicts_least_recently_used(mocker):
+    patched_client = mocker.patch("reconcile.utils.gql.Client.execute", autospec=True)
+    patched_client.return_value.formatted = {"data": {"clusters": []}}
+    entry_size = len(json.dumps(patched_client.return_value.formatted))
+    gql_api = GqlApi(
+        "test_url", "test_token", validate_schemas=False, memo_max_size=2 * entry_size
+    )
+
+    for variables in ({"a": 1}, {"a": 2}, {"a": 1}, {"a": 3}, {"a": 1}):
+        gql_api.query.__wrapped__(gql_api, TEST_QUERY, variables)
+    assert patched_client.call_count == 3
+
+    gql_api.query.__wrapped__(gql_api, TEST_QUERY, {"a": 2})
+    assert patched_client.call_count == 4
+
+
+def test_gqlapi_memo_disabled(mocker):
+    patched_client = mocker.patch("reconcile.utils.gql.Client.execute", autospec=True)
+    patched_client.return_value.formatted = {"data": {"clusters": []}}
+    gql_api = GqlApi("test_url", "test_token", validate_schemas=False, memo_max_size=0)
+
+    gql_api.query.__wrapped__(gql_api, TEST_QUERY)
+    gql_api.query.__wrapped__(gql_api, TEST_QUERY)
+    assert patched_client.call_count == 2
+
+
+def test_gqlapi_memo_single_flight(mocker):
+    started = threading.Event()
+    release = threading.Event()
+
+    def execute(*args, **kwargs):
+        started.set()
+        release.wait()
+        return mocker.Mock(formatted={"data": {"clusters": []}})
+
+    patched_client = mocker.patch("reconcile.utils.gql.Client.execute", autospec=True)
+    patched_client.side_effect = execute
+    gql_api = GqlApi("test_url", "test_token", validate_schemas=False)
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                gql_api.query.__wrapped__(gql_api, TEST_QUERY)
+            )
+        )
+        for _ in range(3)
+    ]
+    for t in threads:
+        t.start()
+    started.wait()
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert results == [{"clusters": []}] * 3
+    assert patched_client.call_count == 1
+
+
+def test_gqlapi_query_many(mocker):
+    def execute(client, document, variables, **kwargs):
+        return mocker.Mock(formatted={"data": {"name": variables["name"]}})
+
+    patched_client = mocker.patch("reconcile.utils.gql.Client.execute", autospec=True)
+    patched_client.side_effect = execute
+    gql_api = GqlApi("test_url", "test_token", validate_schemas=False)
+
+    results = gql_api.query_many([(TEST_QUERY, {"name": str(i)}) for i in range(5)])
+
+    assert results == [{"name": str(i)} for i in range(5)]
+
+
+def test_gqlapi_query_many_validates_schemas(mocker):
+    patched_client = mocker.patch("reconcile.utils.gql.Client.execute", autospec=True)
+    patched_client.return_value.formatted = {
+        "data": {"integrations": [{"name": "INTEGRATION", "schemas": "TEST_SCHEMA"}]},
+        "extensions": {"schemas": ["TEST_SCHEMA", "FORBIDDEN_TEST_SCHEMA"]},
+    }
+    gql_api = GqlApi("test_url", "test_token", "INTEGRATION", validate_schemas=True)
+
+    with pytest.raises(GqlApiErrorForbiddenSchema):
+        gql_api.query_many([(TEST_QUERY, None), (TEST_QUERY, {"a": 1})])
+
+
+def test_gqlapi_query_many_typed(mocker):
+    patched_client = mocker.patch("reconcile.utils.gql.Client.execute", autospec=True)
+    patched_client.return_value.formatted = {
+        "data": {"settings": [{"repoUrl": "https://repo"}]}
+    }
+    gql_api = GqlApi("test_url", "test_token", validate_schemas=False)
+
+    [settings] = gql_api.query_many_typed([app_interface_repo_settings.query])
+
+    assert settings.settings
+    assert settings.settings[0].repo_url == "https://repo"
+
+
+def test_gqlapi_query_stream(httpretty):
+    httpretty.register_uri(
+        httpretty.POST,
+        "http://gql/graphql",
+        body=json.dumps(
+            {
+                "data": {"settings": [{"repoUrl": "https://a"}, {"repoUrl": "b"}]},
+                "extensions": {"schemas": ["/app-sre/app-interface-settings-1.yml"]},
+            }
+        ),
+    )
+    gql_api = GqlApi("http://gql/graphql", "test_token", validate_schemas=False)
+
+    settings = list(
+        gql_api.query_stream_typed(
+            app_interface_repo_settings.DEFINITION,
+            app_interface_repo_settings.AppInterfaceRepoSettingsQueryData,
+            "settings",
+        )
+    )
+
+    assert [s.repo_url for s in settings] == ["https://a", "b"]
+    assert httpretty.last_request().headers["Authorization"] == "test_token"
+    assert "/app-sre/app-interface-settings-1.yml" in gql_api.get_queried_schemas()
+
+
+def test_gqlapi_query_stream_raises_errors(httpretty):
+    httpretty.register_uri(
+        httpretty.POST,
+        "http://gql/graphql",
+        body=json.dumps({"errors": [{"message": "boom"}], "data": None}),
+    )
+    gql_api = GqlApi("http://gql/graphql", "test_token", validate_schemas=False)
+
+    with pytest.raises(GqlApiError):
+        list(gql_api.query_stream(TEST_QUERY, "integrations"))
+
+
+def test_gqlapi_query_stream_typed_unknown_root():
+    gql_api = GqlApi("http://gql/graphql", "test_token", validate_schemas=False)
+
+    with pytest.raises(GqlApiError, match="no field aliased 'unknown'"):
+        list(
+            gql_api.query_stream_typed(
+                app_interface_repo_settings.DEFINITION,
+                app_interface_repo_settings.AppInterfaceRepoSettingsQueryData,
+                "unknown",
+            )
+        )
+
+
+def test_gqlapi_get_resources(httpretty):
+    httpretty.register_uri(
+        httpretty.POST,
+        "http://gql/graphql",
+        body=json.dumps(
+            {
+                "data": {
+                    "r0": [{"path": "/a.yml", "content": "a: 1", "sha256sum": "x"}],
+                    "r1": [],
+                },
+                "extensions": {"schemas": []},
+            }
+        ),
+    )
+    gql_api = GqlApi("http://gql/graphql", "test_token", validate_schemas=False)
+
+    resources = gql_api.get_resources(["/b.yml", "/a.yml", "/a.yml"])
+
+    assert resources == {
+        "/a.yml": {"path": "/a.yml", "content": "a: 1", "sha256sum": "x"}
+    }
+    body = json.loads(httpretty.last_request().body)
+    assert body["variables"] == {"p0": "/a.yml", "p1": "/b.yml"}
@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+from reconcile.utils.gql import GqlApi
+from reconcile.utils.gql_cache import (
+    GqlQueryCache,
+    sha_from_url,
+)
+
+TEST_QUERY = "{ clusters: clusters_v1 { name } }"
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("http://localhost:4000/graphqlsha/abc123", "abc123"),
+        ("http://localhost:4000/graphqlsha/abc123/", "abc123"),
+        ("http://localhost:4000/graphql", None),
+        ("http://localhost:4000/graphqlsha/", None),
+    ],
+)
+def test_sha_from_url(url, expected):
+    assert sha_from_url(url) == expected
+
+
+def test_gql_query_cache_key():
+    key = GqlQueryCache.key("sha", TEST_QUERY, {"a": 1, "b": 2})
+    assert key == GqlQueryCache.key("sha", TEST_QUERY, {"b": 2, "a": 1})
+    assert key != GqlQueryCache.key("other-sha", TEST_QUERY, {"a": 1, "b": 2})
+    assert key != GqlQueryCache.key("sha", TEST_QUERY, {"a": 2, "b": 2})
+    assert GqlQueryCache.key("sha", TEST_QUERY, None) == GqlQueryCache.key(
+        "sha", TEST_QUERY, {}
+    )
+
+
+def test_gql_query_cache_get_set(tmp_path):
+    cache = GqlQueryCache(str(tmp_path), max_size=1024)
+    key = cache.key("sha", TEST_QUERY, None)
+    assert cache.get(key) is None
+    cache.set(key, {"data": {"clusters": []}})
+    assert cache.get(key) == {"data": {"clusters": []}}
+    # a new instance on the same directory sees the entry as well
+    assert GqlQueryCache(str(tmp_path), max_size=1024).get(key) == {
+        "data": {"clusters": []}
+    }
+
+
+def test_gql_query_cache_evicts_least_recently_used(tmp_path):
+    value = {"data": {"payload": "x" * 100}}
+    cache = GqlQueryCache(str(tmp_path), max_size=300)
+    keys = [cache.key("sha", TEST_QUERY, {"i": i}) for i in range(3)]
+
+    cache.set(keys[0], value)
+    cache.set(keys[1], value)
+    # make keys[0] the most recently used entry
+    os.utime(cache._path(keys[1]), (0, 0))
+    assert cache.get(keys[0]) == value
+    cache.set(keys[2], value)
+
+    assert cache.get(keys[0]) == value
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) == value
+
+
+def test_gql_query_cache_skips_entries_larger_than_cache(tmp_path):
+    cache = GqlQueryCache(str(tmp_path), max_size=10)
+    key = cache.key("sha", TEST_QUERY, None)
+    cache.set(key, {"data": {"payload": "x" * 100}})
+    assert cache.get(key) is None
+
+
+def test_gqlapi_query_uses_cache(mocker, tmp_path):
+    execute = mocker.patch("reconcile.utils.gql.Client.execute", autospec=True)
+    execute.return_value.formatted = {"data": {"clusters": [{"name": "c"}]}}
+    cache = GqlQueryCache(str(tmp_path), max_size=1024)
+
+    for _ in range(2):
+        gql_api = GqlApi("http://localhost/graphqlsha/abc", query_cache=cache)
+        assert gql_api.query.__wrapped__(gql_api, TEST_QUERY) == {
+            "clusters": [{"name": "c"}]
+        }
+    assert execute.call_count == 1
+
+
+def test_gqlapi_query_no_cache_without_sha(mocker, tmp_path):
+    execute = mocker.patch("reconcile.utils.gql.Client.execute", autospec=True)
+    execute.return_value.formatted = {"data": {"clusters": []}}
+    cache = GqlQueryCache(str(tmp_path), max_size=1024)
+
+    for _ in range(2):
+        gql_api = GqlApi("http://localhost/graphql", query_cache=cache)
+        gql_api.query.__wrapped__(gql_api, TEST_QUERY)
+    assert execute.call_count == 2
@@ -0,0 +1,144 @@
+import json
+from typing import Any
+
+import pytest
+
+from reconcile.utils.json_stream import (
+    JsonArrayStream,
+    JsonStreamError,
+)
+
+DOCUMENT: dict[str, Any] = {
+    "errors": None,
+    "data": {
+        "other": [{"skipped": True}],
+        "items": [
+            {"name": "a", "nested": {"list": [1, 2, {"x": "]}"}]}},
+            12345678,
+            'str\\ing ü with "quotes"',
+            None,
+            True,
+            [1.5e10, -2],
+        ],
+        "after": {"a": 1},
+    },
+    "extensions": {"schemas": ["/some-1.yml"]},
+}
+
+
+def chunked(data: bytes, size: int) -> list[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 100000])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_json_array_stream(chunk_size, indent):
+    data = json.dumps(DOCUMENT, indent=indent).encode("utf-8")
+    stream = JsonArrayStream(chunked(data, chunk_size), ("data", "items"))
+
+    assert list(stream) == DOCUMENT["data"]["items"]
+    assert stream.top_level == {
+        "errors": None,
+        "extensions": {"schemas": ["/some-1.yml"]},
+    }
+
+
+def test_json_array_stream_multibyte_split():
+    data = json.dumps({"items": ["ü€"]}, ensure_ascii=False).encode("utf-8")
+    assert list(JsonArrayStream(chunked(data, 1), ("items",))) == ["ü€"]
+
+
+@pytest.mark.parametrize(
+    "document",
+    [
+        {"data": {"items": None}},
+        {"data": None},
+        {"data": {}},
+        {"data": {"items": []}},
+        {},
+    ],
+)
+def test_json_array_stream_empty(document):
+    data = json.dumps(document).encode("utf-8")
+    assert list(JsonArrayStream(chunked(data, 3), ("data", "items"))) == []
+
+
+def test_json_array_stream_is_lazy():
+    def chunks():
+        yield '{"items": [1, 2, '
+        raise AssertionError("read too far")
+
+    assert next(iter(JsonArrayStream(chunks(), ("items",)))) == 1
+
+
+def test_json_array_stream_decodes_large_elements_once(mocker):
+    items = [{"name": "x" * 1000, "list": list(range(100))}, "y" * 1000]
+    data = json.dumps({"items": items}).encode("utf-8")
+    raw_decode = mocker.spy(json.JSONDecoder, "raw_decode")
+
+    assert list(JsonArrayStream(chunked(data, 16), ("items",))) == items
+    # the "items" key and each element
+    assert raw_decode.call_count == 3
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        '{"items": [1, 2',
+        '{"items": [1 2]}',
+        '["items"]',
+        '{"items": [1]} trailing',
+    ],
+)
+def test_json_array_stream_malformed(data):
+    with pytest.raises((JsonStreamError, ValueError)):
+        list(JsonArrayStream([data], ("items",)))
+
+
+PLAN = {
+    "format_version": "0.1",
+    "planned_values": {"root_module": {"resources": [{"a": '"]}\\"'}]}},
+    "resource_changes": [{"type": "t", "name": "n1"}, {"type": "t", "name": "n2"}],
+    "output_changes": {"o": {"after": "x"}},
+    "prior_state": {
+        "values": {"outputs": {"o": {"value": "y"}}, "root_module": {"x": [1]}},
+        "format_version": "0.1",
+    },
+    "configuration": {"provider_config": {"aws": {"name": "aws"}}},
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 100000])
+def test_json_array_stream_keep(chunk_size):
+    data = json.dumps(PLAN, indent=2).encode("utf-8")
+    stream = JsonArrayStream(
+        chunked(data, chunk_size),
+        ("resource_changes",),
+        keep=[
+            ("format_version",),
+            ("output_changes",),
+            ("prior_state", "values", "outputs"),
+            ("missing", "key"),
+        ],
+    )
+
+    assert list(stream) == PLAN["resource_changes"]
+    assert stream.top_level == {
+        "format_version": "0.1",
+        "output_changes": {"o": {"after": "x"}},
+        "prior_state": {"values": {"outputs": {"o": {"value": "y"}}}},
+    }
+
+
+def test_json_array_stream_keep_nothing():
+    data = json.dumps(DOCUMENT)
+    stream = JsonArrayStream([data], ("data", "items"), keep=[])
+
+    assert list(stream) == DOCUMENT["data"]["items"]
+    assert stream.top_level == {}
+
+
+@pytest.mark.parametrize("data", ['{"skipped": [1, {"a": "]}', '{"skipped": "x'])
+def test_json_array_stream_skip_malformed(data):
+    with pytest.raises((JsonStreamError, ValueError)):
+        list(JsonArrayStream([data], ("items",), keep=[]))
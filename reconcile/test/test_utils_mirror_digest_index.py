@@ -0,0 +1,143 @@
+import json
+
+import requests
+from sretoolbox.container import Image
+
+from reconcile.utils.mirror_digest_index import (
+    DigestEntry,
+    MirrorDigestIndex,
+    manifest_digest,
+    mirror_digests,
+)
+
+UPSTREAM = "docker.io/library/nginx:1.23"
+DOWNSTREAM = "quay.io/app-sre/nginx:1.23"
+
+
+DIGESTS = DigestEntry(upstream="sha256:a", downstream="sha256:b")
+REMOVED = ("docker.io/removed:1", "quay.io/removed:1", DigestEntry("1", "2"))
+
+
+def test_digest_index_unchanged(tmp_path):
+    index = MirrorDigestIndex(str(tmp_path / "digests.json"))
+    assert not index.is_unchanged(UPSTREAM, DOWNSTREAM, DIGESTS)
+
+    index.record(UPSTREAM, DOWNSTREAM, DIGESTS)
+    assert index.is_unchanged(UPSTREAM, DOWNSTREAM, DIGESTS)
+    assert not index.is_unchanged(
+        UPSTREAM, DOWNSTREAM, DigestEntry("sha256:c", "sha256:b")
+    )
+    assert not index.is_unchanged(
+        UPSTREAM, DOWNSTREAM, DigestEntry("sha256:a", "sha256:c")
+    )
+    assert not index.is_unchanged(UPSTREAM, "quay.io/other/nginx:1.23", DIGESTS)
+
+    index.forget(UPSTREAM, DOWNSTREAM)
+    assert not index.is_unchanged(UPSTREAM, DOWNSTREAM, DIGESTS)
+
+
+def test_digest_index_saves_used_entries(tmp_path):
+    path = str(tmp_path / "digests.json")
+    index = MirrorDigestIndex(path)
+    index.record(UPSTREAM, DOWNSTREAM, DIGESTS)
+    index.record(*REMOVED)
+    index.save()
+
+    index = MirrorDigestIndex(path)
+    assert index.is_unchanged(UPSTREAM, DOWNSTREAM, DIGESTS)
+    index.save()
+
+    # the removed tag was not looked up during the last run
+    index = MirrorDigestIndex(path)
+    assert index.is_unchanged(UPSTREAM, DOWNSTREAM, DIGESTS)
+    assert not index.is_unchanged(*REMOVED)
+
+
+def test_digest_index_keeps_unused_entries(tmp_path):
+    path = str(tmp_path / "digests.json")
+    index = MirrorDigestIndex(path)
+    index.record(UPSTREAM, DOWNSTREAM, DIGESTS)
+    index.record(*REMOVED)
+    index.save()
+
+    index = MirrorDigestIndex(path)
+    assert index.is_unchanged(UPSTREAM, DOWNSTREAM, DIGESTS)
+    index.save(prune=False)
+
+    index = MirrorDigestIndex(path)
+    assert index.is_unchanged(*REMOVED)
+
+
+def test_digest_index_ignores_unreadable_file(tmp_path):
+    path = tmp_path / "digests.json"
+    path.write_text("{not json")
+
+    index = MirrorDigestIndex(str(path))
+    assert not index.is_unchanged(UPSTREAM, DOWNSTREAM, DIGESTS)
+
+
+MANIFEST_URL = "https://registry-1.docker.io/v2/library/nginx/manifests/1.23"
+TOKEN_URL = "https://auth.docker.io/token"
+
+
+def test_manifest_digest_head_request(httpretty):
+    httpretty.register_uri(
+        httpretty.HEAD,
+        MANIFEST_URL,
+        status=200,
+        adding_headers={"Docker-Content-Digest": "sha256:a"},
+    )
+
+    assert manifest_digest(Image(UPSTREAM)) == "sha256:a"
+    assert httpretty.last_request().method == "HEAD"
+
+
+def test_manifest_digest_token_auth(httpretty):
+    def head(request, uri, headers):
+        if request.headers.get("Authorization") != "Bearer t":
+            return (
+                401,
+                {
+                    "Www-Authenticate": f'Bearer realm="{TOKEN_URL}",'
+                    'service="registry.docker.io",'
+                    'scope="repository:library/nginx:pull"'
+                },
+                "",
+            )
+        return 200, {"Docker-Content-Digest": "sha256:a"}, ""
+
+    httpretty.register_uri(httpretty.HEAD, MANIFEST_URL, body=head)
+    httpretty.register_uri(httpretty.GET, TOKEN_URL, body=json.dumps({"token": "t"}))
+    image = Image(UPSTREAM)
+
+    assert manifest_digest(image) == "sha256:a"
+    assert image.auth_token == "Bearer t"
+    assert httpretty.last_request().headers["Authorization"] == "Bearer t"
+
+
+def test_manifest_digest_not_found_is_not_retried(httpretty):
+    httpretty.register_uri(httpretty.HEAD, MANIFEST_URL, status=404)
+
+    assert manifest_digest(Image(UPSTREAM)) is None
+    assert len(httpretty.latest_requests()) == 1
+
+
+def test_manifest_digest_unavailable(mocker):
+    mocker.patch(
+        "reconcile.utils.mirror_digest_index.requests.head",
+        side_effect=requests.ConnectionError("unreachable"),
+    )
+
+    assert manifest_digest(Image(UPSTREAM)) is None
+
+
+def test_mirror_digests(mocker):
+    mocker.patch(
+        "reconcile.utils.mirror_digest_index.manifest_digest",
+        side_effect=lambda image: {"docker.io": "sha256:a", "quay.io": "sha256:b"}.get(
+            image.registry
+        ),
+    )
+
+    assert mirror_digests(Image(UPSTREAM), Image(DOWNSTREAM)) == DIGESTS
+    assert mirror_digests(Image(UPSTREAM), Image("gcr.io/app-sre/nginx:1.23")) is None
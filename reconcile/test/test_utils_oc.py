@@ -1,26 +1,43 @@
+import json
 import logging
 import os
+import threading
 from unittest import TestCase
 from unittest.mock import patch
 
 import pytest
+from kubernetes.client.rest import ApiException
 from kubernetes.dynamic import Resource
-from kubernetes.dynamic.exceptions import ResourceNotFoundError
+from kubernetes.dynamic.exceptions import (
+    DynamicApiError,
+    NotFoundError,
+    ResourceNotFoundError,
+)
 
 import reconcile.utils.oc
 from reconcile.utils.oc import (
     GET_REPLICASET_MAX_ATTEMPTS,
+    HTTP_STATUS_GONE,
     LABEL_MAX_KEY_NAME_LENGTH,
     LABEL_MAX_KEY_PREFIX_LENGTH,
     LABEL_MAX_VALUE_LENGTH,
+    LAST_APPLIED_CONFIGURATION,
     OC,
+    SERVER_SIDE_APPLY_FIELD_MANAGER,
+    InformerCache,
+    MetaDataAnnotationsTooLongApplyError,
     OC_Map,
     OCCli,
+    OCLocal,
     OCLogMsg,
     OCNative,
     PodNotReadyError,
+    ResourceInformer,
     StatusCodeError,
     equal_spec_template,
+    format_api_error,
+    three_way_merge_patch,
+    three_way_strategic_merge_patch,
     validate_labels,
 )
 from reconcile.utils.openshift_resource import OpenshiftResource as OR
@@ -980,3 +997,521 @@ def test_is_kind_not_namespaced(oc_api_resources):
 
 def test_is_kind_not_namespaced_full_name(oc_api_resources):
     assert not oc_api_resources.is_kind_namespaced("kind2.group2")
+
+
+@pytest.mark.parametrize(
+    "original, modified, current, expected",
+    [
+        # nothing changed
+        ({"a": 1}, {"a": 1}, {"a": 1, "status": {}}, {}),
+        # changed value
+        ({"a": 1}, {"a": 2}, {"a": 1}, {"a": 2}),
+        # removed from desired state
+        ({"a": 1, "b": 1}, {"a": 1}, {"a": 1, "b": 1}, {"b": None}),
+        # removed from desired state and already gone
+        ({"a": 1, "b": 1}, {"a": 1}, {"a": 1}, {}),
+        # fields set by others are kept
+        ({"spec": {"a": 1}}, {"spec": {"a": 1}}, {"spec": {"a": 1, "d": 2}}, {}),
+        # nested changes
+        (
+            {"spec": {"a": 1, "b": 1}},
+            {"spec": {"a": 2}},
+            {"spec": {"a": 1, "b": 1, "d": 2}},
+            {"spec": {"a": 2, "b": None}},
+        ),
+        # lists are replaced
+        ({"l": [1, 2]}, {"l": [1]}, {"l": [1, 2]}, {"l": [1]}),
+        # no last applied configuration
+        ({}, {"a": {"b": 1}}, {"a": {"c": 1}}, {"a": {"b": 1}}),
+        # explicit null
+        ({}, {"a": None}, {}, {"a": None}),
+    ],
+)
+def test_three_way_merge_patch(original, modified, current, expected):
+    assert three_way_merge_patch(original, modified, current) == expected
+
+
+def pod_spec(*containers):
+    return {"spec": {"template": {"spec": {"containers": list(containers)}}}}
+
+
+@pytest.mark.parametrize(
+    "original, modified, current, expected",
+    [
+        # nothing changed, injected sidecar is kept
+        (
+            pod_spec({"name": "app", "image": "a:1"}),
+            pod_spec({"name": "app", "image": "a:1"}),
+            pod_spec({"name": "app", "image": "a:1"}, {"name": "sidecar"}),
+            {},
+        ),
+        # containers are merged by name
+        (
+            pod_spec({"name": "app", "image": "a:1", "args": ["x"]}),
+            pod_spec({"name": "app", "image": "a:2"}),
+            pod_spec(
+                {"name": "app", "image": "a:1", "args": ["x"], "tty": False},
+                {"name": "sidecar"},
+            ),
+            {
+                "spec": {
+                    "template": {
+                        "spec": {
+                            "containers": [
+                                {"name": "app", "image": "a:2", "args": None}
+                            ],
+                            "$setElementOrder/containers": [{"name": "app"}],
+                        }
+                    }
+                }
+            },
+        ),
+        # added and removed containers
+        (
+            pod_spec({"name": "app"}, {"name": "old"}),
+            pod_spec({"name": "new"}, {"name": "app"}),
+            pod_spec({"name": "app"}, {"name": "old"}, {"name": "sidecar"}),
+            {
+                "spec": {
+                    "template": {
+                        "spec": {
+                            "containers": [
+                                {"name": "new"},
+                                {"name": "old", "$patch": "delete"},
+                            ],
+                            "$setElementOrder/containers": [
+                                {"name": "new"},
+                                {"name": "app"},
+                            ],
+                        }
+                    }
+                }
+            },
+        ),
+        # nested lists are merged by their own key
+        (
+            pod_spec({"name": "app", "env": [{"name": "A", "value": "1"}]}),
+            pod_spec({"name": "app", "env": [{"name": "A", "value": "2"}]}),
+            pod_spec(
+                {
+                    "name": "app",
+                    "env": [{"name": "A", "value": "1"}, {"name": "B", "value": "1"}],
+                }
+            ),
+            {
+                "spec": {
+                    "template": {
+                        "spec": {
+                            "containers": [
+                                {
+                                    "name": "app",
+                                    "env": [{"name": "A", "value": "2"}],
+                                    "$setElementOrder/env": [{"name": "A"}],
+                                }
+                            ],
+                            "$setElementOrder/containers": [{"name": "app"}],
+                        }
+                    }
+                }
+            },
+        ),
+        # lists without a merge key are replaced
+        ({"l": [1, 2]}, {"l": [1]}, {"l": [1, 2]}, {"l": [1]}),
+    ],
+)
+def test_three_way_strategic_merge_patch(original, modified, current, expected):
+    assert three_way_strategic_merge_patch(original, modified, current) == expected
+
+
+def api_exception(status, body):
+    e = ApiException(status=status, reason="reason")
+    e.body = body
+    return e
+
+
+def test_format_api_error_invalid():
+    e = DynamicApiError(
+        api_exception(
+            422,
+            json.dumps(
+                {
+                    "reason": "Invalid",
+                    "message": 'Deployment.apps "d" is invalid: spec.selector: '
+                    "Invalid value: {}: field is immutable",
+                    "details": {"kind": "Deployment", "name": "d"},
+                }
+            ),
+        )
+    )
+    assert format_api_error(e).startswith('The Deployment "d" is invalid: ')
+
+
+def test_format_api_error_other():
+    e = DynamicApiError(
+        api_exception(404, json.dumps({"reason": "NotFound", "message": "not found"}))
+    )
+    assert format_api_error(e) == "Error from server (NotFound): not found"
+
+
+@pytest.fixture
+def oc_native(mocker):
+    mocker.patch.object(OCNative, "_get_client", autospec=True)
+    mocker.patch.object(OCCli, "get_api_resources", autospec=True)
+    mocker.patch(
+        "reconcile.utils.oc.RunningState",
+        return_value=mocker.Mock(timestamp="0", integration="test", commit="sha"),
+    )
+    oc = OCNative("cluster", "server", "token", local=True, native_writes=True)
+    obj_client = mocker.Mock(namespaced=True)
+    mocker.patch.object(oc, "_get_obj_client", return_value=obj_client)
+    return oc, obj_client
+
+
+@pytest.fixture
+def configmap():
+    return OR(
+        {
+            "apiVersion": "v1",
+            "kind": "ConfigMap",
+            "metadata": {"name": "cm", "annotations": {"a": "b"}},
+            "data": {"k": "v"},
+        },
+        "integration",
+        "1.0",
+    )
+
+
+def test_oc_native_apply_creates_missing(oc_native, configmap):
+    oc, obj_client = oc_native
+    obj_client.get.side_effect = NotFoundError(api_exception(404, ""))
+
+    oc.apply("ns", configmap)
+
+    body = obj_client.create.call_args.kwargs["body"]
+    assert obj_client.create.call_args.kwargs["namespace"] == "ns"
+    assert json.loads(body["metadata"]["annotations"][LAST_APPLIED_CONFIGURATION]) == {
+        **configmap.body
+    }
+    obj_client.patch.assert_not_called()
+
+
+def test_oc_native_apply_patches_existing(oc_native, configmap):
+    oc, obj_client = oc_native
+    last_applied = {
+        "apiVersion": "v1",
+        "kind": "ConfigMap",
+        "metadata": {"name": "cm", "annotations": {"a": "b"}},
+        "data": {"k": "old", "removed": "x"},
+    }
+    obj_client.get.return_value.to_dict.return_value = {
+        **last_applied,
+        "metadata": {
+            "name": "cm",
+            "resourceVersion": "1",
+            "annotations": {
+                "a": "b",
+                LAST_APPLIED_CONFIGURATION: json.dumps(last_applied),
+            },
+        },
+    }
+
+    oc.apply("ns", configmap)
+
+    patch = obj_client.patch.call_args.kwargs["body"]
+    assert patch["data"] == {"k": "v", "removed": None}
+    assert LAST_APPLIED_CONFIGURATION in patch["metadata"]["annotations"]
+    obj_client.create.assert_not_called()
+
+
+def test_oc_native_apply_strategic_merge_patch(oc_native):
+    oc, obj_client = oc_native
+    obj_client.group = "apps"
+    last_applied = {
+        "apiVersion": "apps/v1",
+        "kind": "Deployment",
+        "metadata": {"name": "d"},
+        **pod_spec({"name": "app", "image": "a:1"}),
+    }
+    obj_client.get.return_value.to_dict.return_value = {
+        **pod_spec({"name": "app", "image": "a:1"}, {"name": "sidecar"}),
+        "metadata": {
+            "name": "d",
+            "annotations": {LAST_APPLIED_CONFIGURATION: json.dumps(last_applied)},
+        },
+    }
+    deployment = OR(
+        {**last_applied, **pod_spec({"name": "app", "image": "a:2"})},
+        "integration",
+        "1.0",
+    )
+
+    oc.apply("ns", deployment)
+
+    kwargs = obj_client.patch.call_args.kwargs
+    assert kwargs["content_type"] == "application/strategic-merge-patch+json"
+    assert kwargs["body"]["spec"]["template"]["spec"]["containers"] == [
+        {"name": "app", "image": "a:2"}
+    ]
+
+
+def test_oc_native_apply_maps_errors(oc_native, configmap):
+    oc, obj_client = oc_native
+    obj_client.get.side_effect = NotFoundError(api_exception(404, ""))
+    obj_client.create.side_effect = DynamicApiError(
+        api_exception(
+            422,
+            json.dumps(
+                {
+                    "reason": "Invalid",
+                    "message": 'ConfigMap "cm" is invalid: '
+                    "metadata.annotations: Too long: must have at most 262144 bytes",
+                    "details": {"kind": "ConfigMap", "name": "cm"},
+                }
+            ),
+        )
+    )
+
+    with pytest.raises(MetaDataAnnotationsTooLongApplyError):
+        oc.apply("ns", configmap)
+
+
+def test_oc_native_delete_orphan(oc_native, mocker):
+    oc, obj_client = oc_native
+    mocker.patch.object(oc, "_parse_kind", return_value=("Deployment", "apps/v1"))
+
+    oc.delete("ns", "Deployment", "d", cascade=False)
+
+    obj_client.delete.assert_called_once_with(
+        name="d", namespace="ns", body={"propagationPolicy": "Orphan"}
+    )
+
+
+def test_oc_native_label_no_overwrite(oc_native, mocker):
+    oc, obj_client = oc_native
+    mocker.patch.object(oc, "_parse_kind", return_value=("Namespace", "v1"))
+    obj_client.namespaced = False
+    obj_client.get.return_value.to_dict.return_value = {
+        "metadata": {"name": "ns", "labels": {"a": "1"}}
+    }
+
+    with pytest.raises(StatusCodeError):
+        oc.label(None, "Namespace", "ns", {"a": "2"})
+    oc.label(None, "Namespace", "ns", {"a": "1", "b": None})
+
+    obj_client.patch.assert_called_once_with(
+        body={"metadata": {"labels": {"a": "1", "b": None}}},
+        name="ns",
+        namespace=None,
+        content_type="application/merge-patch+json",
+    )
+
+
+def test_oc_native_writes_disabled_uses_oc(oc_native, mocker, configmap):
+    oc, obj_client = oc_native
+    oc.native_writes = False
+    run = mocker.patch.object(OCNative, "_run", autospec=True)
+
+    oc.apply("ns", configmap)
+
+    run.assert_called_once()
+    obj_client.get.assert_not_called()
+
+
+def test_oc_native_apply_server_side(oc_native, configmap):
+    oc, obj_client = oc_native
+
+    oc.apply_server_side("ns", configmap)
+
+    kwargs = obj_client.server_side_apply.call_args.kwargs
+    assert json.loads(kwargs["body"]) == configmap.body
+    assert kwargs["field_manager"] == SERVER_SIDE_APPLY_FIELD_MANAGER
+    assert kwargs["force_conflicts"] is True
+    assert kwargs["dry_run"] is None
+
+
+def test_oc_native_apply_server_side_dry_run(oc_native, configmap):
+    oc, obj_client = oc_native
+    obj_client.server_side_apply.return_value.to_dict.return_value = configmap.body
+
+    assert oc.apply_server_side_dry_run("ns", configmap.body) == configmap.body
+    assert obj_client.server_side_apply.call_args.kwargs["dry_run"] == "All"
+
+
+def test_oc_apply_server_side_dry_run_uses_oc(oc_native, mocker, configmap):
+    oc, obj_client = oc_native
+    oc.native_writes = False
+    run = mocker.patch.object(OCNative, "_run", autospec=True)
+    run.return_value = json.dumps(configmap.body)
+
+    assert oc.apply_server_side_dry_run("ns", configmap.body) == configmap.body
+    cmd = run.call_args.args[1]
+    assert "--server-side" in cmd
+    assert "--dry-run=server" in cmd
+    obj_client.server_side_apply.assert_not_called()
+
+
+def cm_event(event_type, name, resource_version):
+    return {
+        "type": event_type,
+        "raw_object": {
+            "kind": "ConfigMap",
+            "metadata": {
+                "name": name,
+                "namespace": "ns",
+                "resourceVersion": resource_version,
+            },
+        },
+    }
+
+
+@pytest.fixture
+def informer_obj_client(mocker):
+    obj_client = mocker.Mock()
+    obj_client.get.return_value.to_dict.return_value = {
+        "metadata": {"resourceVersion": "1"},
+        "items": [cm_event("ADDED", "a", "1")["raw_object"]],
+    }
+    return obj_client
+
+
+def test_resource_informer_handle_event(informer_obj_client):
+    informer = ResourceInformer("ns")
+    informer.obj_client = informer_obj_client
+    informer.list()
+
+    informer.handle_event(cm_event("ADDED", "b", "2"))
+    informer.handle_event(cm_event("MODIFIED", "a", "3"))
+    informer.handle_event(cm_event("DELETED", "b", "4"))
+    informer.handle_event(
+        {"type": "BOOKMARK", "raw_object": {"metadata": {"resourceVersion": "5"}}}
+    )
+
+    assert list(informer._items) == ["ns/a"]
+    assert informer._items["ns/a"]["metadata"]["resourceVersion"] == "3"
+    assert informer._resource_version == "5"
+
+
+def test_resource_informer_lists_once(mocker, informer_obj_client):
+    release = threading.Event()
+    mocker.patch.object(
+        ResourceInformer, "_watch", autospec=True, side_effect=lambda _: release.wait()
+    )
+    informer = ResourceInformer("ns")
+    try:
+        items = informer.items(informer_obj_client)
+        items[0]["metadata"]["name"] = "modified-by-caller"
+        assert [i["metadata"]["name"] for i in informer.items(informer_obj_client)] == [
+            "a"
+        ]
+        informer_obj_client.get.assert_called_once()
+    finally:
+        informer.stop()
+        release.set()
+
+
+def test_resource_informer_relists_when_gone(mocker, informer_obj_client):
+    informer = ResourceInformer("ns")
+    informer.obj_client = informer_obj_client
+    stopped = threading.Event()
+    informer._stopped = stopped
+
+    def watch(_):
+        if informer_obj_client.get.call_count == 0:
+            raise ApiException(status=HTTP_STATUS_GONE)
+        stopped.set()
+
+    mocker.patch.object(ResourceInformer, "_watch", autospec=True, side_effect=watch)
+    informer._run(stopped)
+
+    informer_obj_client.get.assert_called_once()
+    assert informer._resource_version == "1"
+
+
+def test_resource_informer_unsynced_on_error(mocker, informer_obj_client):
+    informer = ResourceInformer("ns")
+    informer.obj_client = informer_obj_client
+    informer.list()
+    mocker.patch.object(
+        ResourceInformer,
+        "_watch",
+        autospec=True,
+        side_effect=ApiException(status=500),
+    )
+    informer._run(informer._stopped)
+    assert not informer._synced
+
+
+def test_oc_native_get_items_uses_informer_cache(oc_native, mocker):
+    oc, obj_client = oc_native
+    mocker.patch.object(oc, "_parse_kind", return_value=("ConfigMap", "v1"))
+    oc.informer_cache = mocker.create_autospec(InformerCache, instance=True)
+    oc.informer_cache.get_items.return_value = [
+        {"metadata": {"name": "a"}},
+        {"metadata": {"name": "b"}},
+    ]
+
+    items = oc.get_items("ConfigMap", namespace="cluster", resource_names=["b"])
+
+    assert items == [{"metadata": {"name": "b"}}]
+    obj_client.get.assert_not_called()
+
+
+TEMPLATE = {
+    "apiVersion": "template.openshift.io/v1",
+    "kind": "Template",
+    "metadata": {"name": "test"},
+    "objects": [{"kind": "ConfigMap", "metadata": {"name": "${NAME}"}}],
+    "parameters": [{"name": "NAME", "required": True}],
+}
+
+
+def test_oc_local_process(mocker):
+    mocker.patch.object(reconcile.utils.oc, "OC_PROCESS_IMPLEMENTATION", "native")
+    run = mocker.patch.object(OCCli, "_run", autospec=True)
+    oc = OCLocal("cluster", None, None, local=True)
+
+    assert oc.process(TEMPLATE, {"NAME": "cm"}) == [
+        {"kind": "ConfigMap", "metadata": {"name": "cm"}}
+    ]
+    run.assert_not_called()
+    with pytest.raises(StatusCodeError, match="NAME is required"):
+        oc.process(TEMPLATE)
+
+
+def test_oc_local_process_compare(mocker):
+    mocker.patch.object(reconcile.utils.oc, "OC_PROCESS_IMPLEMENTATION", "compare")
+    run = mocker.patch.object(
+        OCCli, "_run", autospec=True, return_value=b'{"items": [{"kind": "oc"}]}'
+    )
+    warning = mocker.patch("reconcile.utils.oc.logging.warning")
+    oc = OCLocal("cluster", None, None, local=True)
+
+    assert oc.process(TEMPLATE, {"NAME": "cm"}) == [{"kind": "oc"}]
+    run.assert_called_once()
+    warning.assert_called_once()
+
+
+def test_oc_local_process_compare_skips_generated(mocker):
+    mocker.patch.object(reconcile.utils.oc, "OC_PROCESS_IMPLEMENTATION", "compare")
+    run = mocker.patch.object(OCCli, "_run", autospec=True)
+    oc = OCLocal("cluster", None, None, local=True)
+    template = {
+        **TEMPLATE,
+        "parameters": [{"name": "NAME", "generate": "expression", "from": "[a-z]{8}"}],
+    }
+
+    items = oc.process(template, {"NAME": ""})
+
+    assert len(items[0]["metadata"]["name"]) == 8
+    run.assert_not_called()
+
+
+def test_oc_local_process_with_oc(mocker):
+    mocker.patch.object(reconcile.utils.oc, "OC_PROCESS_IMPLEMENTATION", "oc")
+    run = mocker.patch.object(
+        OCCli, "_run", autospec=True, return_value=b'{"items": []}'
+    )
+    oc = OCLocal("cluster", None, None, local=True)
+
+    assert oc.process(TEMPLATE, {"NAME": "cm"}) == []
+    run.assert_called_once()
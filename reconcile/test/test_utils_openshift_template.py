@@ -0,0 +1,171 @@
+import re
+
+import pytest
+
+from reconcile.utils.openshift_template import (
+    TemplateProcessingError,
+    generate_value,
+    process_template,
+    substitute,
+)
+
+
+def build_template(objects, parameters, labels=None):
+    template = {
+        "apiVersion": "template.openshift.io/v1",
+        "kind": "Template",
+        "metadata": {"name": "test"},
+        "objects": objects,
+        "parameters": parameters,
+    }
+    if labels:
+        template["labels"] = labels
+    return template
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("${A}", "a"),
+        ("x-${A}-${B}-${A}", "x-a-2-a"),
+        ("${UNKNOWN}", "${UNKNOWN}"),
+        ("${{B}}", 2),
+        ("${{BOOL}}", True),
+        ("${{A}}", "a"),
+        ("${{JSON}}", {"k": ["v"]}),
+        ("${{B}}-suffix", "${{B}}-suffix"),
+        ("${{UNKNOWN}}", "${{UNKNOWN}}"),
+    ],
+)
+def test_substitute(value, expected):
+    values = {"A": "a", "B": "2", "BOOL": "true", "JSON": '{"k": ["v"]}'}
+    assert substitute(value, values) == expected
+
+
+def test_process_template():
+    template = build_template(
+        objects=[
+            {
+                "apiVersion": "apps/v1",
+                "kind": "Deployment",
+                "metadata": {
+                    "name": "${NAME}",
+                    "namespace": "hardcoded",
+                    "labels": {"${LABEL_KEY}": "${NAME}"},
+                },
+                "spec": {
+                    "replicas": "${{REPLICAS}}",
+                    "template": {
+                        "spec": {
+                            "containers": [
+                                {"name": "app", "image": "quay.io/app:${IMAGE_TAG}"}
+                            ]
+                        }
+                    },
+                },
+            },
+            {
+                "apiVersion": "v1",
+                "kind": "ConfigMap",
+                "metadata": {"name": "cm", "namespace": "${NAMESPACE}"},
+                "data": {"enabled": "${ENABLED}"},
+            },
+        ],
+        parameters=[
+            {"name": "NAME", "value": "app"},
+            {"name": "LABEL_KEY", "value": "app"},
+            {"name": "REPLICAS", "value": "1"},
+            {"name": "IMAGE_TAG", "required": True},
+            {"name": "NAMESPACE", "value": "ns"},
+            {"name": "ENABLED"},
+        ],
+        labels={"template": "${NAME}-template"},
+    )
+
+    items = process_template(
+        template, {"IMAGE_TAG": "abcdef", "REPLICAS": 3, "ENABLED": True, "X": "y"}
+    )
+
+    assert items == [
+        {
+            "apiVersion": "apps/v1",
+            "kind": "Deployment",
+            "metadata": {
+                "name": "app",
+                "labels": {"app": "app", "template": "app-template"},
+            },
+            "spec": {
+                "replicas": 3,
+                "template": {
+                    "spec": {
+                        "containers": [{"name": "app", "image": "quay.io/app:abcdef"}]
+                    }
+                },
+            },
+        },
+        {
+            "apiVersion": "v1",
+            "kind": "ConfigMap",
+            "metadata": {
+                "name": "cm",
+                "namespace": "ns",
+                "labels": {"template": "app-template"},
+            },
+            "data": {"enabled": "True"},
+        },
+    ]
+    # the template itself is left untouched
+    assert template["objects"][0]["metadata"]["name"] == "${NAME}"
+
+
+def test_process_template_required_parameter():
+    template = build_template(
+        objects=[], parameters=[{"name": "IMAGE_TAG", "required": True}]
+    )
+    with pytest.raises(TemplateProcessingError, match="IMAGE_TAG is required"):
+        process_template(template, {})
+    with pytest.raises(TemplateProcessingError, match="IMAGE_TAG is required"):
+        process_template(template, {"IMAGE_TAG": ""})
+
+
+def test_process_template_generated_parameter():
+    template = build_template(
+        objects=[{"kind": "Secret", "metadata": {"name": "s"}, "data": "${PW}"}],
+        parameters=[
+            {"name": "PW", "generate": "expression", "from": "pw-[a-zA-Z0-9]{16}"}
+        ],
+    )
+    assert re.fullmatch(r"pw-[a-zA-Z0-9]{16}", process_template(template)[0]["data"])
+    # passed parameters are never generated
+    assert process_template(template, {"PW": "given"})[0]["data"] == "given"
+    # unless they are empty, oc treats those as unset
+    assert re.fullmatch(
+        r"pw-[a-zA-Z0-9]{16}", process_template(template, {"PW": ""})[0]["data"]
+    )
+
+
+def test_process_template_empty_parameter_overrides_value():
+    template = build_template(
+        objects=[{"kind": "ConfigMap", "metadata": {"name": "cm"}, "data": "${V}"}],
+        parameters=[{"name": "V", "value": "default"}],
+    )
+    assert process_template(template, {"V": ""})[0]["data"] == ""
+
+
+@pytest.mark.parametrize(
+    "expression, pattern",
+    [
+        ("test[0-9]{1}x", r"test[0-9]x"),
+        ("[0-1]{8}", r"[01]{8}"),
+        ("0x[A-F0-9]{4}", r"0x[A-F0-9]{4}"),
+        ("[\\w]{8}", r"\w{8}"),
+        ("[\\d]{2}-[\\a]{3}", r"\d{2}-[a-zA-Z]{3}"),
+    ],
+)
+def test_generate_value(expression, pattern):
+    assert re.fullmatch(pattern, generate_value(expression))
+
+
+def test_generate_value_invalid_length():
+    with pytest.raises(TemplateProcessingError):
+        generate_value("[a-z]{256}")
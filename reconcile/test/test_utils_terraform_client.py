@@ -1,6 +1,8 @@
 import base64
+import json
 from logging import DEBUG
 from operator import itemgetter
+from typing import Any
 from unittest.mock import create_autospec
 
 import pytest
@@ -12,6 +14,7 @@ from reconcile.utils.external_resource_spec import (
     ExternalResourceSpec,
     ExternalResourceUniqueKey,
 )
+from reconcile.utils.state import State
 
 
 @pytest.fixture
@@ -583,3 +586,176 @@ def test__validate_db_upgrade_major_version_upgrade_not_allow(aws_api, tf):
         "allow_major_version_upgrade is not enabled for upgrading RDS instance: test-database-1 to a new major version."
         == str(error.value)
     )
+
+
+@pytest.fixture
+def skip_unchanged_plans(mocker):
+    mocker.patch.object(tfclient, "TERRAFORM_SKIP_UNCHANGED_PLANS", True)
+
+
+@pytest.fixture
+def plan_state():
+    store: dict[str, Any] = {}
+    state = create_autospec(State, instance=True)
+    state.get.side_effect = store.get
+    state.__setitem__.side_effect = store.__setitem__
+    state.store = store
+    return state
+
+
+@pytest.fixture
+def plan_spec(tmp_path):
+    (tmp_path / "config.tf.json").write_text('{"resource": {}}')
+    tf_mock = create_autospec(tfclient.Terraform, instance=True)
+    tf_mock.working_dir = str(tmp_path)
+    tf_mock.cmd.return_value = (0, '{"lineage": "l", "serial": 1}', "")
+    tf_mock.plan.return_value = (0, "", "")
+    return {"name": "a1", "tf": tf_mock}
+
+
+def test_terraform_plan_skips_unchanged(
+    mocker, skip_unchanged_plans, tf, plan_state, plan_spec
+):
+    tf.state = plan_state
+    log_plan_diff = mocker.patch.object(tf, "log_plan_diff", return_value=(False, []))
+
+    assert tf.terraform_plan(plan_spec, enable_deletion=False, dry_run=False) == (
+        False,
+        [],
+        False,
+    )
+    assert "plan-fingerprints/a1" in plan_state.store
+
+    assert tf.terraform_plan(plan_spec, enable_deletion=False, dry_run=False) == (
+        False,
+        [],
+        False,
+    )
+    plan_spec["tf"].plan.assert_called_once()
+    log_plan_diff.assert_called_once()
+    # nothing to apply for accounts without a plan
+    assert tf.terraform_apply(plan_spec) is False
+    plan_spec["tf"].apply.assert_not_called()
+
+
+def test_terraform_plan_state_changed(
+    mocker, skip_unchanged_plans, tf, plan_state, plan_spec
+):
+    tf.state = plan_state
+    mocker.patch.object(tf, "log_plan_diff", return_value=(False, []))
+
+    tf.terraform_plan(plan_spec, enable_deletion=False, dry_run=False)
+    plan_spec["tf"].cmd.return_value = (0, '{"lineage": "l", "serial": 2}', "")
+    tf.terraform_plan(plan_spec, enable_deletion=False, dry_run=False)
+
+    assert plan_spec["tf"].plan.call_count == 2
+
+
+def test_terraform_plan_full_plan_interval(
+    mocker, skip_unchanged_plans, tf, plan_state, plan_spec
+):
+    tf.state = plan_state
+    mocker.patch.object(tf, "log_plan_diff", return_value=(False, []))
+    mocker.patch.object(tfclient, "TERRAFORM_FULL_PLAN_INTERVAL", 0)
+
+    tf.terraform_plan(plan_spec, enable_deletion=False, dry_run=False)
+    tf.terraform_plan(plan_spec, enable_deletion=False, dry_run=False)
+
+    assert plan_spec["tf"].plan.call_count == 2
+
+
+def test_terraform_plan_dry_run_does_not_store_fingerprints(
+    mocker, skip_unchanged_plans, tf, plan_state, plan_spec
+):
+    tf.state = plan_state
+    mocker.patch.object(tf, "log_plan_diff", return_value=(False, []))
+
+    tf.terraform_plan(plan_spec, enable_deletion=False, dry_run=True)
+
+    assert plan_state.store == {}
+
+
+def test_terraform_cleanup_keeps_state_of_caller(tf, plan_state):
+    tf.state = plan_state
+    tf.working_dirs = {}
+
+    tf.cleanup()
+
+    plan_state.cleanup.assert_not_called()
+
+
+def test_terraform_plan_with_changes_is_not_skipped(
+    mocker, skip_unchanged_plans, tf, plan_state, plan_spec
+):
+    tf.state = plan_state
+
+    def log_plan_diff(name, tf_, enable_deletion):
+        tf._set_should_apply(name)
+        return False, []
+
+    mocker.patch.object(tf, "log_plan_diff", side_effect=log_plan_diff)
+
+    tf.terraform_plan(plan_spec, enable_deletion=False, dry_run=False)
+
+    assert tf.should_apply
+    assert plan_state.store == {}
+
+
+def plan_stream(plan):
+    data = json.dumps(plan).encode("utf-8")
+    chunks = [data[i : i + 16] for i in range(0, len(data), 16)]
+    return lambda name, working_dir: tfclient.JsonArrayStream(
+        chunks,
+        ("resource_changes",),
+        keep=[
+            ("format_version",),
+            ("output_changes",),
+            ("prior_state", "values", "outputs"),
+        ],
+    )
+
+
+def test_log_plan_diff(mocker, tf):
+    tf.outputs = {"a1": {"kept": {"value": "x"}}}
+    plan = {
+        "format_version": "0.1",
+        "planned_values": {"root_module": {"resources": [{"huge": True}]}},
+        "resource_changes": [
+            {
+                "type": "aws_s3_bucket",
+                "name": "unchanged",
+                "change": {"actions": ["no-op"], "before": {}, "after": {}},
+            },
+            {
+                "type": "aws_iam_user_login_profile",
+                "name": "user",
+                "change": {"actions": ["create"], "before": None, "after": {}},
+            },
+            {
+                "type": "aws_s3_bucket",
+                "name": "deleted",
+                "change": {"actions": ["delete"], "before": {}, "after": None},
+            },
+        ],
+        "output_changes": {"kept": {"after": "x"}},
+        "prior_state": {
+            "values": {"outputs": {"kept": {}, "removed": {}}, "root_module": {}}
+        },
+    }
+    mocker.patch.object(tf, "terraform_show", side_effect=plan_stream(plan))
+
+    disabled_deletion_detected, created_users = tf.log_plan_diff(
+        "a1", mocker.Mock(working_dir="wd"), enable_deletion=False
+    )
+
+    assert disabled_deletion_detected
+    assert created_users == [tfclient.AccountUser("a1", "user")]
+    assert tf.should_apply
+
+
+def test_log_plan_diff_unknown_format_version(mocker, tf):
+    plan = {"format_version": "2.0", "resource_changes": []}
+    mocker.patch.object(tf, "terraform_show", side_effect=plan_stream(plan))
+
+    with pytest.raises(NotImplementedError):
+        tf.log_plan_diff("a1", mocker.Mock(working_dir="wd"), enable_deletion=False)
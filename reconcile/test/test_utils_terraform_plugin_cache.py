@@ -0,0 +1,108 @@
+import json
+import os
+from unittest.mock import create_autospec
+
+import pytest
+from python_terraform import Terraform
+
+from reconcile.utils.terraform_plugin_cache import (
+    LOCK_FILE,
+    TerraformPluginCache,
+    provider_set,
+)
+
+CONFIG = {
+    "provider": {
+        "aws": [{"access_key": "a", "version": "3.76.1", "region": "us-east-1"}],
+        "random": [{"version": "3.4.3"}],
+    },
+    "terraform": {"backend": {"s3": {"bucket": "b"}}},
+}
+PROVIDER = "registry.terraform.io/hashicorp/aws/3.76.1/linux_amd64"
+
+
+def working_dir(tmp_path, name, config=CONFIG):
+    wd = tmp_path / name
+    wd.mkdir()
+    (wd / "config.tf.json").write_text(json.dumps(config))
+    return str(wd)
+
+
+def fake_init(wd):
+    def init(**kwargs):
+        if "plugin_dir" not in kwargs:
+            # download providers
+            provider = os.path.join(wd, ".terraform", "providers", PROVIDER)
+            os.makedirs(provider)
+            with open(os.path.join(provider, "terraform-provider-aws"), "w") as f:
+                f.write("binary")
+        with open(os.path.join(wd, LOCK_FILE), "a") as f:
+            f.write("lock")
+        return 0, "", ""
+
+    tf = create_autospec(Terraform, instance=True)
+    tf.init.side_effect = init
+    return tf
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TerraformPluginCache(str(tmp_path / "cache"))
+
+
+def test_provider_set_ignores_provider_settings():
+    other = json.loads(json.dumps(CONFIG))
+    other["provider"]["aws"][0]["access_key"] = "b"
+    other["terraform"]["backend"]["s3"]["bucket"] = "c"
+    assert provider_set(CONFIG) == provider_set(other)
+
+    other["provider"]["aws"][0]["version"] = "4.0.0"
+    assert provider_set(CONFIG) != provider_set(other)
+
+
+def test_plugin_cache_downloads_once(tmp_path, cache):
+    wd1 = working_dir(tmp_path, "wd1")
+    tf1 = fake_init(wd1)
+    assert cache.init(tf1, wd1) == (0, "", "")
+    tf1.init.assert_called_once_with()
+    assert os.path.exists(
+        os.path.join(cache.plugin_dir, PROVIDER, "terraform-provider-aws")
+    )
+
+    wd2 = working_dir(tmp_path, "wd2")
+    tf2 = fake_init(wd2)
+    assert cache.init(tf2, wd2) == (0, "", "")
+    tf2.init.assert_called_once_with(plugin_dir=cache.plugin_dir)
+    # the lock file of the first working dir is shared
+    with open(os.path.join(wd2, LOCK_FILE)) as f:
+        assert f.read() == "locklock"
+
+    # subsequent runs don't download at all
+    wd3 = working_dir(tmp_path, "wd3")
+    tf3 = fake_init(wd3)
+    TerraformPluginCache(cache.directory).init(tf3, wd3)
+    tf3.init.assert_called_once_with(plugin_dir=cache.plugin_dir)
+
+
+def test_plugin_cache_per_provider_set(tmp_path, cache):
+    wd1 = working_dir(tmp_path, "wd1")
+    cache.init(fake_init(wd1), wd1)
+
+    config = json.loads(json.dumps(CONFIG))
+    config["provider"]["random"][0]["version"] = "3.5.0"
+    wd2 = working_dir(tmp_path, "wd2", config)
+    tf2 = fake_init(wd2)
+    cache.init(tf2, wd2)
+    tf2.init.assert_called_once_with()
+
+
+def test_plugin_cache_falls_back_to_download(tmp_path, cache):
+    wd1 = working_dir(tmp_path, "wd1")
+    cache.init(fake_init(wd1), wd1)
+
+    wd2 = working_dir(tmp_path, "wd2")
+    tf2 = create_autospec(Terraform, instance=True)
+    tf2.init.side_effect = [(1, "", "provider not found"), (0, "", "")]
+    assert cache.init(tf2, wd2) == (0, "", "")
+    assert tf2.init.call_count == 2
+    assert not os.path.exists(os.path.join(wd2, LOCK_FILE))
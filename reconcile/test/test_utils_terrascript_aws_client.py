@@ -275,3 +275,36 @@ def test_terraform_state_when_not_present_error(ts):
         )
     except ValueError:
         pass
+
+
+def test_get_values_parses_once(mocker, ts):
+    get_raw_values = mocker.patch.object(
+        ts,
+        "get_raw_values",
+        return_value={"content": "$schema: /x.yml\nengine: postgres\nspec: {a: 1}"},
+    )
+
+    values = ts.get_values("/defaults.yml")
+    assert values == {"engine": "postgres", "spec": {"a": 1}}
+    values["spec"]["a"] = 2
+
+    assert ts.get_values("/defaults.yml") == {"engine": "postgres", "spec": {"a": 1}}
+    get_raw_values.assert_called_once_with("/defaults.yml")
+
+
+def test_prefetch_defaults(mocker, ts):
+    gqlapi = mocker.patch.object(tsclient.gql, "get_api").return_value
+    gqlapi.get_resources.return_value = {"/rds.yml": {"content": "engine: pg"}}
+    ts.account_resource_specs = {
+        "acc": [
+            mocker.Mock(
+                resource={"defaults": "/rds.yml", "parameter_group": "/pg.yml"}
+            ),
+            mocker.Mock(resource={"specs": [{"defaults": "/sqs.yml"}]}),
+        ]
+    }
+
+    ts.prefetch_defaults()
+
+    gqlapi.get_resources.assert_called_once_with({"/rds.yml", "/pg.yml", "/sqs.yml"})
+    assert ts.get_raw_values("/rds.yml") == {"content": "engine: pg"}
@@ -1,14 +1,33 @@
+import os
 from collections.abc import Callable
 from typing import Optional
 
 from reconcile.gql_definitions.terraform_resources.terraform_resources_namespaces import (
+    DEFINITION,
     NamespaceV1,
+    TerraformResourcesNamespacesQueryData,
     query,
 )
 from reconcile.utils import gql
 
+# this is one of the biggest responses we query, streaming parses it element
+# by element instead of holding the raw response and the models at once.
+# streamed queries are not retried, memoized or cached, so this is opt-in.
+TERRAFORM_NAMESPACES_STREAM = (
+    os.environ.get("TERRAFORM_NAMESPACES_STREAM", "false") == "true"
+)
+
 
-def get_namespaces(query_func: Optional[Callable] = None) -> list[NamespaceV1]:
+def get_namespaces(
+    query_func: Optional[Callable] = None,
+    stream: bool = TERRAFORM_NAMESPACES_STREAM,
+) -> list[NamespaceV1]:
+    if stream and not query_func:
+        return list(
+            gql.get_api().query_stream_typed(
+                DEFINITION, TerraformResourcesNamespacesQueryData, "namespaces"
+            )
+        )
     if not query_func:
         query_func = gql.get_api().query
     data = query(query_func=query_func)
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import threading
+from collections.abc import (
+    Callable,
+    Hashable,
+)
+from contextlib import suppress
+from typing import (
+    Optional,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Compute concurrent lookups of the same key only once.
+
+    `lock` is the lock guarding the cache of the caller. The first caller of
+    a key computes the value, all other callers wait for it and look it up
+    in the cache afterwards. If the computation failed, the next caller
+    computes on its own.
+    """
+
+    def __init__(self, lock: threading.Lock) -> None:
+        self._lock = lock
+        self._in_flight: dict[Hashable, threading.Event] = {}
+
+    def get(
+        self,
+        key: Hashable,
+        cached: Callable[[], Optional[T]],
+        compute: Callable[[], T],
+    ) -> T:
+        """
+        Return `cached()`, called while holding the lock, unless it is None.
+        Otherwise return `compute()`, which is expected to fill the cache.
+        """
+        while True:
+            with self._lock:
+                value = cached()
+                if value is not None:
+                    return value
+                in_flight = self._in_flight.get(key)
+                if in_flight is None:
+                    in_flight = self._in_flight[key] = threading.Event()
+                    break
+            in_flight.wait()
+
+        try:
+            return compute()
+        finally:
+            with self._lock:
+                self._in_flight.pop(key).set()
+
+
+def write_atomically(path: str, data: bytes) -> None:
+    """
+    Write a file atomically, concurrent readers never see partial content.
+    Raises OSError without leaving a temporary file behind.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or None, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        with suppress(OSError):
+            os.remove(tmp_path)
+        raise
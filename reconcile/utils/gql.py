@@ -1,5 +1,14 @@
+import json
 import logging
 import textwrap
+import threading
+from collections import OrderedDict
+from collections.abc import (
+    Callable,
+    Iterable,
+    Iterator,
+    Sequence,
+)
 from datetime import (
     datetime,
     timezone,
@@ -7,6 +16,10 @@ from datetime import (
 from typing import (
     Any,
     Optional,
+    Type,
+    TypeVar,
+    Union,
+    cast,
 )
 from urllib.parse import urlparse
 
@@ -18,11 +31,28 @@ from gql import (
 from gql.transport.exceptions import TransportQueryError
 from gql.transport.requests import RequestsHTTPTransport
 from gql.transport.requests import log as requests_logger
+from pydantic import BaseModel
+from requests.adapters import HTTPAdapter
 from sentry_sdk import capture_exception
-from sretoolbox.utils import retry
+from sretoolbox.utils import (
+    retry,
+    threaded,
+)
 
 from reconcile.status import RunningState
+from reconcile.utils import metrics
+from reconcile.utils.cache_helpers import SingleFlight
 from reconcile.utils.config import get_config
+from reconcile.utils.gql_cache import (
+    GQL_QUERY_MEMO_MAX_SIZE_MB,
+    GqlQueryCache,
+    init_query_cache_from_env,
+    sha_from_url,
+)
+from reconcile.utils.json_stream import (
+    JsonArrayStream,
+    JsonStreamError,
+)
 
 INTEGRATIONS_QUERY = """
 {
@@ -34,6 +64,13 @@ INTEGRATIONS_QUERY = """
 }
 """
 
+GQL_POOL_CONNECTIONS = 10
+GQL_POOL_MAXSIZE = 100
+GQL_QUERY_MANY_THREAD_POOL_SIZE = 10
+GQL_STREAM_CHUNK_SIZE = 64 * 1024
+
+T = TypeVar("T")
+
 requests_logger.setLevel(logging.WARNING)
 
 
@@ -83,6 +120,28 @@ class GqlGetResourceError(Exception):
         )
 
 
+class PooledRequestsHTTPTransport(RequestsHTTPTransport):
+    """RequestsHTTPTransport that works on an externally managed requests.Session.
+
+    The upstream transport creates (and closes) a new session on every
+    connect/close cycle, which means a new TCP/TLS connection per query.
+    This transport borrows a shared session instead, so keep-alive
+    connections are reused across queries and threads.
+    """
+
+    def __init__(self, url: str, session: requests.Session, **kwargs: Any) -> None:
+        super().__init__(url, **kwargs)
+        self._pooled_session = session
+
+    def connect(self) -> None:
+        # the base class initializes the session as None, without annotation
+        self.session = self._pooled_session  # type: ignore[assignment]
+
+    def close(self) -> None:
+        # the shared session outlives the transport, don't close it here
+        self.session = None
+
+
 class GqlApi:
     _valid_schemas: list[str] = []
     _queried_schemas: set[Any] = set()
@@ -95,6 +154,8 @@ class GqlApi:
         validate_schemas=False,
         commit: Optional[str] = None,
         commit_timestamp: Optional[str] = None,
+        query_cache: Optional[GqlQueryCache] = None,
+        memo_max_size: int = GQL_QUERY_MEMO_MAX_SIZE_MB * 1024 * 1024,
     ) -> None:
         self.url = url
         self.token = token
@@ -102,6 +163,21 @@ class GqlApi:
         self.validate_schemas = validate_schemas
         self.commit = commit
         self.commit_timestamp = commit_timestamp
+        self._session = _init_gql_session()
+        self._thread_local = threading.local()
+        # results are only immutable (and thus cacheable) when pinned to a bundle
+        self.sha = sha_from_url(url)
+        self._query_cache = query_cache if self.sha else None
+        # Identical queries are only sent once per GqlApi instance. A new
+        # instance is created whenever we switch bundles (see `init`), which
+        # drops the memo along with the old instance. Results are kept
+        # serialized, the least recently used ones are dropped once they
+        # exceed memo_max_size bytes.
+        self._memo: OrderedDict[str, str] = OrderedDict()
+        self._memo_size = 0
+        self._memo_max_size = memo_max_size
+        self._memo_lock = threading.Lock()
+        self._memo_single_flight = SingleFlight(self._memo_lock)
 
         if validate_schemas and not int_name:
             raise Exception(
@@ -119,22 +195,78 @@ class GqlApi:
             if not self._valid_schemas:
                 raise GqlApiIntegrationNotFound(int_name)
 
-    @retry(exceptions=GqlApiError, max_attempts=5, hook=capture_and_forget)
-    def query(
-        self, query: str, variables=None, skip_validation=False
-    ) -> Optional[dict[str, Any]]:
-
-        # Here we are recreating client on purpose as some integrations such as `openshift-resource` require multiple
-        # queries in separate threads. With RequestsHTTPTransport that is currently not possible as it expects
-        # session to be reused and thus throws `Transport is already connected` error.
-        # Adding a synchronization mechanism would lead to increase wait time given some of our integrations are not
-        # sharded and thread pool capacity is also large for those.
-        # Hence, we are recreating client for every query.
-        client = _init_gql_client(self.url, self.token)
+    @property
+    def _client(self) -> Client:
+        # Some integrations such as `openshift-resources` run queries from
+        # many threads. A gql Client/transport pair must not be used
+        # concurrently (`Transport is already connected`), so every thread
+        # gets its own client. All of them share one pooled requests.Session,
+        # so connections to the GraphQL server are kept alive and reused.
+        try:
+            return self._thread_local.client
+        except AttributeError:
+            self._thread_local.client = _init_gql_client(
+                self.url, self.token, session=self._session
+            )
+            return self._thread_local.client
+
+    def _execute(self, query: str, variables=None) -> dict[str, Any]:
+        if self._memo_max_size <= 0:
+            return self._execute_uncached(query, variables)
+
+        memo_key = json.dumps([query, variables], sort_keys=True)
+
+        # hits are returned serialized and decoded outside of the lock
+        def memoized() -> Optional[Union[str, dict[str, Any]]]:
+            result = self._memo.get(memo_key)
+            if result is not None:
+                self._memo.move_to_end(memo_key)
+            return result
+
+        def execute() -> Union[str, dict[str, Any]]:
+            self._count_cache_miss("memo")
+            result = self._execute_uncached(query, variables)
+            self._memoize(memo_key, json.dumps(result))
+            return result
+
+        result = self._memo_single_flight.get(memo_key, memoized, execute)
+        if isinstance(result, str):
+            self._count_cache_hit("memo")
+            # every caller gets its own copy, some of them mutate results
+            return json.loads(result)
+        return result
+
+    def _memoize(self, memo_key: str, result: str) -> None:
+        if len(result) > self._memo_max_size:
+            return
+        with self._memo_lock:
+            previous = self._memo.pop(memo_key, None)
+            if previous is not None:
+                self._memo_size -= len(previous)
+            self._memo[memo_key] = result
+            self._memo_size += len(result)
+            while self._memo_size > self._memo_max_size:
+                _, evicted = self._memo.popitem(last=False)
+                self._memo_size -= len(evicted)
+
+    def _execute_uncached(self, query: str, variables=None) -> dict[str, Any]:
+        cache_key = None
+        if self._query_cache and self.sha:
+            cache_key = self._query_cache.key(self.sha, query, variables)
+            cached = self._query_cache.get(cache_key)
+            if cached is not None:
+                self._count_cache_hit("disk")
+                return cached
+            self._count_cache_miss("disk")
+
+        client = self._client
         try:
-            result = client.execute(
-                gql(query), variables, get_execution_result=True
-            ).formatted
+            result = cast(
+                dict[str, Any],
+                client.execute(
+                    gql(query), variables, get_execution_result=True
+                ).formatted,
+            )
         except requests.exceptions.ConnectionError as e:
             raise GqlApiError("Could not connect to GraphQL server ({})".format(e))
         except TransportQueryError as e:
@@ -144,8 +276,38 @@ class GqlApi:
         except Exception as e:
             raise GqlApiError("Unexpected error occurred") from e
 
+        if self._query_cache and cache_key and result.get("data") is not None:
+            self._query_cache.set(cache_key, result)
+
+        return result
+
+    def _count_cache_hit(self, cache: str) -> None:
+        metrics.gql_query_cache_hits.labels(
+            integration=self.integration or "", cache=cache
+        ).inc()
+
+    def _count_cache_miss(self, cache: str) -> None:
+        metrics.gql_query_cache_misses.labels(
+            integration=self.integration or "", cache=cache
+        ).inc()
+
+    @retry(exceptions=GqlApiError, max_attempts=5, hook=capture_and_forget)
+    def query(
+        self, query: str, variables=None, skip_validation=False
+    ) -> Optional[dict[str, Any]]:
+        result = self._execute(query, variables)
+        self._check_schemas(result, skip_validation)
+
+        # This is to appease mypy. This exception won't be thrown as this condition
+        # is already handled above with AssertionError
+        if result["data"] is None:
+            raise GqlApiError("`data` not received in GraphQL payload")
+
+        return result["data"]
+
+    def _check_schemas(self, result: dict[str, Any], skip_validation: bool) -> None:
         # show schemas if log level is debug
-        query_schemas = result.get("extensions", {}).get("schemas", [])
+        query_schemas = (result.get("extensions") or {}).get("schemas", [])
         self._queried_schemas.update(query_schemas)
 
         for s in query_schemas:
@@ -158,12 +320,97 @@ class GqlApi:
             if forbidden_schemas:
                 raise GqlApiErrorForbiddenSchema(forbidden_schemas)
 
-        # This is to appease mypy. This exception won't be thrown as this condition
-        # is already handled above with AssertionError
-        if result["data"] is None:
-            raise GqlApiError("`data` not received in GraphQL payload")
+    def query_many(
+        self,
+        queries: Sequence[tuple[str, Optional[dict[str, Any]]]],
+        skip_validation: bool = False,
+        thread_pool_size: int = GQL_QUERY_MANY_THREAD_POOL_SIZE,
+    ) -> list[Optional[dict[str, Any]]]:
+        """Run independent (query, variables) pairs concurrently.
+
+        Results are returned in the order of `queries` and every query goes
+        through `query`, so schema validation, retries and caching apply to
+        each of them individually. Running them side by side means the whole
+        batch only costs about one round trip to the GraphQL server.
+        """
+        return threaded.run(
+            lambda q: self.query(q[0], q[1], skip_validation=skip_validation),
+            queries,
+            thread_pool_size,
+        )
 
-        return result["data"]
+    def query_many_typed(
+        self,
+        query_funcs: Sequence[Callable[[Callable], T]],
+        thread_pool_size: int = GQL_QUERY_MANY_THREAD_POOL_SIZE,
+    ) -> list[T]:
+        """Concurrent variant of `query_many` for qenerate generated `query()` helpers.
+
+        Every element is called with this API's `query` method as `query_func`,
+        e.g. `functools.partial(clusters.query, variables={"name": name})`.
+        """
+        return threaded.run(lambda f: f(self.query), query_funcs, thread_pool_size)
+
+    def query_stream(
+        self, query: str, root: str, variables=None, skip_validation=False
+    ) -> Iterator[Any]:
+        """Yield the elements of the list-rooted field `root` one at a time.
+
+        The response is decoded incrementally instead of being materialised
+        as a whole, which keeps memory flat for huge list queries. As the
+        response is consumed while it is read, there are no retries and no
+        caching. Errors and forbidden schemas are only known once the
+        response has been read completely, so they are raised at the end of
+        the iteration.
+        """
+        payload: dict[str, Any] = {"query": query}
+        if variables:
+            payload["variables"] = variables
+        headers = {"Authorization": self.token} if self.token else None
+        try:
+            with self._session.post(
+                self.url, json=payload, headers=headers, timeout=30, stream=True
+            ) as response:
+                response.raise_for_status()
+                stream = JsonArrayStream(
+                    response.iter_content(chunk_size=GQL_STREAM_CHUNK_SIZE),
+                    ("data", root),
+                )
+                yield from stream
+        except requests.exceptions.RequestException as e:
+            raise GqlApiError("Could not connect to GraphQL server ({})".format(e))
+        except (JsonStreamError, ValueError) as e:
+            raise GqlApiError("Unable to decode GraphQL response") from e
+
+        if stream.top_level.get("errors"):
+            raise GqlApiError(
+                "`error` returned with GraphQL response {}".format(
+                    stream.top_level["errors"]
+                )
+            )
+        self._check_schemas(stream.top_level, skip_validation)
+
+    def query_stream_typed(
+        self,
+        definition: str,
+        data_cls: Type[BaseModel],
+        root: str,
+        variables=None,
+    ) -> Iterator[Any]:
+        """Stream parsed models of a qenerate generated query.
+
+        `data_cls` is the generated `...QueryData` class of `definition`, the
+        elements are parsed into the model of its list field aliased `root`,
+        e.g. `query_stream_typed(DEFINITION, ClustersQueryData, "clusters")`
+        yields `ClusterV1` objects.
+        """
+        item_cls = next(
+            (f.type_ for f in data_cls.__fields__.values() if f.alias == root), None
+        )
+        if item_cls is None:
+            raise GqlApiError(f"{data_cls.__name__} has no field aliased {root!r}")
+        for item in self.query_stream(definition, root, variables):
+            yield item_cls(**item)
 
     def get_resource(self, path: str) -> dict[str, Any]:
         query = """
@@ -190,6 +437,39 @@ class GqlApi:
 
         return resources[0]
 
+    def get_resources(self, paths: Iterable[str]) -> dict[str, dict[str, Any]]:
+        """Return the resources at the given paths, fetched in a single query.
+
+        Paths that do not resolve to exactly one resource are left out of the
+        result, `get_resource` raises the appropriate error for them.
+        """
+        paths = sorted(set(paths))
+        if not paths:
+            return {}
+        variables = ", ".join(f"$p{i}: String" for i in range(len(paths)))
+        fields = "\n".join(
+            f"r{i}: resources_v1 (path: $p{i}) {{ path content sha256sum }}"
+            for i in range(len(paths))
+        )
+        query = f"query Resources({variables}) {{\n{fields}\n}}"
+
+        # Do not validate schema in resources since schema support in the
+        # resources is not complete.
+        data = (
+            self.query(
+                query,
+                {f"p{i}": path for i, path in enumerate(paths)},
+                skip_validation=True,
+            )
+            or {}
+        )
+        result = {}
+        for i, path in enumerate(paths):
+            resources = data.get(f"r{i}") or []
+            if len(resources) == 1:
+                result[path] = resources[0]
+        return result
+
     def get_resources_by_schema(self, schema: str) -> list[dict[str, str]]:
         """Return all resources (resources_v1) filtered by given schema."""
         query = """
@@ -238,6 +518,7 @@ def init(
         validate_schemas,
         commit=commit,
         commit_timestamp=commit_timestamp,
+        query_cache=init_query_cache_from_env(),
     )
     return _gqlapi
 
@@ -246,13 +527,32 @@ def get_resource(path: str) -> dict[str, Any]:
     return get_api().get_resource(path)
 
 
-def _init_gql_client(url: str, token: Optional[str]) -> Client:
+def _init_gql_session() -> requests.Session:
+    # This is a threaded world. Size the connections pool so that every
+    # worker thread can keep its connection alive
+    # (this avoids the warning "Connection pool is full, discarding connection")
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=GQL_POOL_CONNECTIONS, pool_maxsize=GQL_POOL_MAXSIZE
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _init_gql_client(
+    url: str, token: Optional[str], session: requests.Session
+) -> Client:
     req_headers = None
     if token:
         # The token stored in vault is already in the format 'Basic ...'
         req_headers = {"Authorization": token}
     # Here we are explicitly using sync strategy
-    return Client(transport=RequestsHTTPTransport(url, headers=req_headers, timeout=30))
+    return Client(
+        transport=PooledRequestsHTTPTransport(
+            url, session, headers=req_headers, timeout=30
+        )
+    )
 
 
 @retry(exceptions=requests.exceptions.HTTPError, max_attempts=5)
@@ -346,6 +646,7 @@ def get_api_for_sha(
         validate_schemas,
         commit=commit,
         commit_timestamp=timestamp,
+        query_cache=init_query_cache_from_env(),
     )
 
 
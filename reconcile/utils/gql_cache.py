@@ -0,0 +1,122 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import (
+    Any,
+    Mapping,
+    Optional,
+)
+from urllib.parse import urlparse
+
+from reconcile.utils.cache_helpers import write_atomically
+
+GQL_QUERY_CACHE_DIR = os.environ.get("GQL_QUERY_CACHE_DIR")
+GQL_QUERY_CACHE_MAX_SIZE_MB = int(os.environ.get("GQL_QUERY_CACHE_MAX_SIZE_MB", 512))
+# in-memory memo of GqlApi, 0 disables it
+GQL_QUERY_MEMO_MAX_SIZE_MB = int(os.environ.get("GQL_QUERY_MEMO_MAX_SIZE_MB", 64))
+
+
+def sha_from_url(url: str) -> Optional[str]:
+    """Return the bundle SHA of a /graphqlsha/{sha} endpoint, None otherwise.
+
+    Only queries against such endpoints are immutable and safe to cache.
+    """
+    parts = urlparse(url).path.strip("/").split("/")
+    if len(parts) == 2 and parts[0] == "graphqlsha" and parts[1]:
+        return parts[1]
+    return None
+
+
+class GqlQueryCache:
+    """Content-addressed on-disk cache of GraphQL query results.
+
+    Entries are keyed by (bundle sha, query, variables). Since a bundle
+    never changes, entries never have to be invalidated, they are only
+    evicted in least-recently-used order (based on file mtime) once the
+    cache directory grows beyond max_size bytes.
+    """
+
+    def __init__(self, directory: str, max_size: int) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._size = sum(size for _, _, size in self._entries())
+
+    @staticmethod
+    def key(sha: str, query: str, variables: Optional[Mapping[str, Any]]) -> str:
+        payload = json.dumps(
+            {"sha": sha, "query": query, "variables": variables or {}},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _entries(self) -> list[tuple[float, str, int]]:
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for f in files:
+                if not f.endswith(".json"):
+                    continue
+                path = os.path.join(root, f)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f)
+            # mark entry as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.debug(f"ignoring unreadable gql cache entry {path}: {e}")
+            return None
+        return value
+
+    def set(self, key: str, value: Mapping[str, Any]) -> None:
+        path = self._path(key)
+        data = json.dumps(value).encode("utf-8")
+        if len(data) > self.max_size:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            write_atomically(path, data)
+        except OSError as e:
+            logging.debug(f"unable to write gql cache entry {path}: {e}")
+            return
+
+        with self._lock:
+            self._size += len(data)
+            if self._size > self.max_size:
+                self._evict()
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        self._size = sum(size for _, _, size in entries)
+        for _, path, size in entries:
+            if self._size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+
+
+def init_query_cache_from_env() -> Optional[GqlQueryCache]:
+    if not GQL_QUERY_CACHE_DIR:
+        return None
+    return GqlQueryCache(
+        GQL_QUERY_CACHE_DIR, max_size=GQL_QUERY_CACHE_MAX_SIZE_MB * 1024 * 1024
+    )
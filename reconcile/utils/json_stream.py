@@ -0,0 +1,250 @@
+"""
+Incremental decoding of large JSON documents.
+
+Some documents we deal with (GraphQL responses, terraform plans) are
+objects with one huge list somewhere inside. `JsonArrayStream` walks such a
+document chunk by chunk and yields the elements of that list one at a time,
+so only a single element (plus one read chunk) has to be held in memory.
+"""
+import codecs
+import json
+import re
+from collections.abc import (
+    Iterable,
+    Iterator,
+    Mapping,
+    Sequence,
+)
+from typing import (
+    Any,
+    Optional,
+    Union,
+)
+
+_WHITESPACE = " \t\n\r"
+_STRUCTURE_RE = re.compile(r'[\[\]{}"]')
+_STRING_END_RE = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+
+
+class JsonStreamError(Exception):
+    pass
+
+
+class _Reader:
+    def __init__(self, chunks: Iterable[Union[bytes, str]]) -> None:
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        try:
+            chunk = next(self._chunks)
+            text = self._utf8.decode(chunk) if isinstance(chunk, bytes) else chunk
+        except StopIteration:
+            self._eof = True
+            text = self._utf8.decode(b"", final=True)
+        # drop everything that has been consumed already
+        self._buf = self._buf[self._pos :] + text
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise JsonStreamError(
+                f"expected {char!r} but found {found!r} at position {self._pos}"
+            )
+        self._pos += 1
+
+    def _read_on(self, scan: int, consume: bool, error: str) -> int:
+        """Read the next chunk, `scan` is rebased to the new buffer."""
+        if consume:
+            self._pos = scan
+        offset = self._pos
+        if not self._fill():
+            raise JsonStreamError(error)
+        return scan - offset
+
+    def _scan(self, consume: bool) -> int:
+        """
+        Return the end of the string, array or object at the current
+        position, reading chunks until it is complete. With `consume`, the
+        scanned data is dropped on the way, otherwise the current position
+        is kept, so the value can be decoded afterwards.
+        """
+        depth = 0
+        scan = self._pos
+        while True:
+            match = _STRUCTURE_RE.search(self._buf, scan)
+            if match is None:
+                scan = self._read_on(
+                    len(self._buf), consume, "unexpected end of document"
+                )
+                continue
+            if match.group() == '"':
+                end = _STRING_END_RE.match(self._buf, match.end())
+                if end is None:
+                    # the string continues in the next chunk
+                    scan = self._read_on(match.start(), consume, "unterminated string")
+                    continue
+                scan = end.end()
+            else:
+                scan = match.end()
+                depth += 1 if match.group() in "[{" else -1
+            if depth == 0:
+                return scan
+
+    def skip(self) -> None:
+        """Skip over a value without decoding it."""
+        if self.peek() not in ("[", "{"):
+            # strings and literals are cheap to decode
+            self.value()
+            return
+        self._pos = self._scan(consume=True)
+
+    def value(self) -> Any:
+        if self.peek() in ('"', "[", "{"):
+            # read the whole value before decoding it once
+            self._scan(consume=False)
+            value, self._pos = self._decoder.raw_decode(self._buf, self._pos)
+            return value
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number or literal at the very end of the buffer might continue
+            # in the next chunk. In a well-formed document every value is
+            # followed by at least a closing bracket, so read on.
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+
+class JsonArrayStream:
+    """Iterate over the elements of the list found under `path`.
+
+    `path` is a sequence of object keys leading from the document root to
+    the list, e.g. `("data", "namespaces")`. A missing key or a `null`
+    value results in an empty iteration. Other values at the top level of
+    the document (like `errors` or `extensions`) are decoded and kept in
+    `top_level` once iteration finished, everything else is skipped.
+
+    `keep` restricts which values are decoded to the given paths, e.g.
+    `[("format_version",), ("prior_state", "values", "outputs")]`. `top_level`
+    then holds the document pruned to these paths. Everything else is
+    skipped without being decoded.
+    """
+
+    def __init__(
+        self,
+        chunks: Iterable[Union[bytes, str]],
+        path: Sequence[str],
+        keep: Optional[Iterable[Sequence[str]]] = None,
+    ) -> None:
+        if not path:
+            raise ValueError("path must not be empty")
+        self._reader = _Reader(chunks)
+        self.path = path
+        self.top_level: dict[str, Any] = {}
+        self._keep: Optional[dict[str, Any]] = None
+        if keep is not None:
+            self._keep = {}
+            for keep_path in keep:
+                self._add_keep_path(self._keep, keep_path)
+
+    @staticmethod
+    def _add_keep_path(tree: dict[str, Any], keep_path: Sequence[str]) -> None:
+        # leafs are True, a leaf covers all longer paths below it
+        for i, key in enumerate(keep_path):
+            if i == len(keep_path) - 1:
+                tree[key] = True
+            elif tree.get(key) is True:
+                return
+            else:
+                tree = tree.setdefault(key, {})
+
+    def __iter__(self) -> Iterator[Any]:
+        yield from self._walk_object(self.path, self._keep, self.top_level, root=True)
+        if self._reader.peek() != "":
+            raise JsonStreamError("unexpected data after the end of the document")
+
+    def _walk_object(
+        self,
+        path: Sequence[str],
+        keep: Optional[Mapping[str, Any]],
+        kept: dict[str, Any],
+        root: bool = False,
+    ) -> Iterator[Any]:
+        reader = self._reader
+        if not root and reader.peek() == "n":
+            reader.value()
+            return
+        reader.expect("{")
+        if reader.peek() == "}":
+            reader.expect("}")
+            return
+        while True:
+            key = reader.value()
+            reader.expect(":")
+            # None keeps everything on this level
+            sub_keep = True if keep is None else keep.get(key)
+            if path and key == path[0]:
+                if len(path) == 1:
+                    yield from self._walk_array()
+                else:
+                    nested: dict[str, Any] = {}
+                    yield from self._walk_object(
+                        path[1:], sub_keep if isinstance(sub_keep, dict) else {}, nested
+                    )
+                    if nested:
+                        kept[key] = nested
+            elif sub_keep is True:
+                kept[key] = reader.value()
+            elif sub_keep and reader.peek() == "{":
+                nested = {}
+                # there is no path below here, so nothing is yielded
+                for _ in self._walk_object((), sub_keep, nested):
+                    pass
+                kept[key] = nested
+            else:
+                reader.skip()
+            if reader.peek() == ",":
+                reader.expect(",")
+                continue
+            reader.expect("}")
+            return
+
+    def _walk_array(self) -> Iterator[Any]:
+        reader = self._reader
+        if reader.peek() == "n":
+            reader.value()
+            return
+        reader.expect("[")
+        if reader.peek() == "]":
+            reader.expect("]")
+            return
+        while True:
+            yield reader.value()
+            if reader.peek() == ",":
+                reader.expect(",")
+                continue
+            reader.expect("]")
+            return
@@ -1,6 +1,10 @@
 import json
 import logging
 import subprocess
+import tempfile
+from collections.abc import Iterator
+
+SHOW_JSON_CHUNK_SIZE = 1024 * 1024
 
 
 def state_rm_access_key(working_dirs, account, user):
@@ -25,3 +29,23 @@ def show_json(working_dir, out_file):
         logging.warning(msg)
         raise Exception(msg)
     return json.loads(result.stdout)
+
+
+def show_json_chunks(working_dir: str, out_file: str) -> Iterator[bytes]:
+    """Same as show_json, but yield the raw output in chunks while it is
+    produced instead of decoding it as a whole."""
+    # stderr is not read before stdout is done, so it must not be a pipe
+    with tempfile.TemporaryFile() as stderr, subprocess.Popen(
+        ["terraform", "show", "-no-color", "-json", out_file],
+        stdout=subprocess.PIPE,
+        stderr=stderr,
+        cwd=working_dir,
+    ) as process:
+        assert process.stdout
+        while chunk := process.stdout.read(SHOW_JSON_CHUNK_SIZE):
+            yield chunk
+        if process.wait() != 0:
+            stderr.seek(0)
+            msg = f"[{out_file}] terraform show failed: {stderr.read().decode('utf-8')}"
+            logging.warning(msg)
+            raise Exception(msg)
@@ -83,6 +83,48 @@ copy_count = Counter(
     labelnames=["integration", "shard", "shard_id"],
 )
 
+image_comparisons = Counter(
+    name="qontract_reconcile_image_comparisons_total",
+    documentation="Number of image manifest comparisons by result",
+    labelnames=["integration", "shards", "shard_id", "result"],
+)
+
+image_copies = Counter(
+    name="qontract_reconcile_image_copies_total",
+    documentation="Number of image copy attempts by destination org and result",
+    labelnames=["integration", "shards", "shard_id", "org", "result"],
+)
+
+image_copies_pending = Gauge(
+    name="qontract_reconcile_image_copies_pending",
+    documentation="Number of scheduled image copies not finished yet",
+    labelnames=["integration", "shards", "shard_id"],
+)
+
+gql_query_cache_hits = Counter(
+    name="qontract_reconcile_gql_query_cache_hits_total",
+    documentation="Number of GraphQL queries served from a cache",
+    labelnames=["integration", "cache"],
+)
+
+gql_query_cache_misses = Counter(
+    name="qontract_reconcile_gql_query_cache_misses_total",
+    documentation="Number of GraphQL queries not found in a cache",
+    labelnames=["integration", "cache"],
+)
+
+image_existence_cache_hits = Counter(
+    name="qontract_reconcile_image_existence_cache_hits_total",
+    documentation="Number of image existence checks served from a cache",
+    labelnames=["integration"],
+)
+
+image_existence_cache_misses = Counter(
+    name="qontract_reconcile_image_existence_cache_misses_total",
+    documentation="Number of image existence checks not found in a cache",
+    labelnames=["integration"],
+)
+
 gitlab_request = Counter(
     name="qontract_reconcile_gitlab_request_total",
     documentation="Number of calls made to Gitlab API",
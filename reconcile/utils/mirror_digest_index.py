@@ -0,0 +1,193 @@
+"""
+Index of manifest digests of mirrored image tags.
+
+Comparing a mirrored tag with its upstream fetches both manifests. For tags
+found in sync, `MirrorDigestIndex` remembers the upstream and downstream
+digests. As long as HEAD requests for both tags return the same digests, the
+tags are still in sync and the manifests are not fetched again, so tag
+comparisons only fetch the manifests of tags that changed on either side.
+
+The index is stored as a JSON file, usually next to the control file of the
+mirror integration. Runs covering all mirrored tags only save the entries
+looked up or recorded, so entries of tags not mirrored anymore are dropped.
+"""
+import json
+import logging
+import re
+import threading
+from dataclasses import (
+    asdict,
+    dataclass,
+)
+from typing import Optional
+
+import requests
+from sretoolbox.container import Image
+from sretoolbox.container.image import (
+    OCI_IMAGE_INDEX_MEDIA_TYPE,
+    OCI_MANIFEST_MEDIA_TYPE,
+    SCHEMA1_MANIFEST_MEDIA_TYPE,
+    SCHEMA1_SIGNED_MANIFEST_MEDIA_TYPE,
+    SCHEMA2_MANIFEST_LIST_MEDIA_TYPE,
+    SCHEMA2_MANIFEST_MEDIA_TYPE,
+)
+
+from reconcile.utils.cache_helpers import write_atomically
+
+_LOG = logging.getLogger(__name__)
+
+DIGEST_HEADER = "Docker-Content-Digest"
+MANIFEST_MEDIA_TYPES = ",".join(
+    [
+        SCHEMA1_MANIFEST_MEDIA_TYPE,
+        SCHEMA1_SIGNED_MANIFEST_MEDIA_TYPE,
+        SCHEMA2_MANIFEST_MEDIA_TYPE,
+        SCHEMA2_MANIFEST_LIST_MEDIA_TYPE,
+        OCI_MANIFEST_MEDIA_TYPE,
+        OCI_IMAGE_INDEX_MEDIA_TYPE,
+    ]
+)
+REQUEST_TIMEOUT = 60
+_CHALLENGE_PARAM_RE = re.compile(r'(\w+)="([^"]*)"')
+
+
+@dataclass(frozen=True)
+class DigestEntry:
+    upstream: str
+    downstream: str
+
+
+def _bearer_token(image: Image, www_authenticate: str) -> Optional[str]:
+    """Get a token for the challenge of a registry, see
+    https://distribution.github.io/distribution/spec/auth/token/"""
+    scheme, _, params = www_authenticate.partition(" ")
+    challenge = dict(_CHALLENGE_PARAM_RE.findall(params))
+    realm = challenge.pop("realm", None)
+    if scheme.lower() != "bearer" or not realm:
+        return None
+    response = requests.get(
+        realm, params=challenge, auth=image.auth, timeout=REQUEST_TIMEOUT
+    )
+    if response.status_code == 401 and image.auth:
+        response = requests.get(realm, params=challenge, timeout=REQUEST_TIMEOUT)
+    if not response.ok:
+        return None
+    data = response.json()
+    token = data.get("token") or data.get("access_token")
+    return f"{scheme} {token}" if token else None
+
+
+def manifest_digest(image: Image) -> Optional[str]:
+    """
+    Return the digest of the manifest of an image tag with a HEAD request,
+    which is cheaper than fetching the manifest and not rate limited by
+    Docker Hub. Returns None if the registry does not tell. Failures are
+    not retried, callers fall back to comparing the manifests.
+    """
+    url = f"{image.registry_api}/v2"
+    if image.repository is not None:
+        url += f"/{image.repository}"
+    url += f"/{image.image}/manifests/{image.tag}"
+    headers = {"Accept": MANIFEST_MEDIA_TYPES}
+    auth = image.auth
+    if image.auth_token:
+        headers["Authorization"] = image.auth_token
+        auth = None
+    try:
+        response = requests.head(
+            url,
+            headers=headers,
+            auth=auth,
+            verify=image.ssl_verify,
+            timeout=REQUEST_TIMEOUT,
+        )
+        www_authenticate = response.headers.get("Www-Authenticate")
+        if response.status_code == 401 and www_authenticate:
+            token = _bearer_token(image, www_authenticate)
+            if token is None:
+                return None
+            # later requests for the image reuse the token
+            image.auth_token = headers["Authorization"] = token
+            response = requests.head(
+                url, headers=headers, verify=image.ssl_verify, timeout=REQUEST_TIMEOUT
+            )
+    except (requests.RequestException, ValueError) as e:
+        _LOG.debug("unable to get the manifest digest of %s: %s", image, e)
+        return None
+    if not response.ok:
+        _LOG.debug(
+            "unable to get the manifest digest of %s: %s", image, response.status_code
+        )
+        return None
+    return response.headers.get(DIGEST_HEADER)
+
+
+def mirror_digests(upstream: Image, downstream: Image) -> Optional[DigestEntry]:
+    """Return the current digests of a mirrored tag, if both are known."""
+    upstream_digest = manifest_digest(upstream)
+    if not upstream_digest:
+        return None
+    downstream_digest = manifest_digest(downstream)
+    if not downstream_digest:
+        return None
+    return DigestEntry(upstream=upstream_digest, downstream=downstream_digest)
+
+
+class MirrorDigestIndex:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: dict[str, DigestEntry] = {}
+        self._used: dict[str, DigestEntry] = {}
+        try:
+            with open(path) as f:
+                self._entries = {k: DigestEntry(**v) for k, v in json.load(f).items()}
+        except FileNotFoundError:
+            pass
+        except (ValueError, TypeError) as e:
+            _LOG.warning(f"ignoring unreadable digest index {path}: {e}")
+
+    @staticmethod
+    def _key(upstream: str, downstream: str) -> str:
+        return f"{upstream} -> {downstream}"
+
+    def is_unchanged(
+        self, upstream: str, downstream: str, digests: DigestEntry
+    ) -> bool:
+        """
+        Whether the upstream and downstream tags still have the digests
+        they had when they were last found in sync.
+        """
+        key = self._key(upstream, downstream)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry != digests:
+                return False
+            self._used[key] = entry
+            return True
+
+    def record(self, upstream: str, downstream: str, entry: DigestEntry) -> None:
+        """Remember the digests of tags found in sync."""
+        key = self._key(upstream, downstream)
+        with self._lock:
+            self._entries[key] = entry
+            self._used[key] = entry
+
+    def forget(self, upstream: str, downstream: str) -> None:
+        key = self._key(upstream, downstream)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._used.pop(key, None)
+
+    def save(self, prune: bool = True) -> None:
+        """
+        Write the entries used during this run. Runs not covering all
+        mirrored tags keep the other entries with `prune=False`.
+        """
+        with self._lock:
+            entries = self._used if prune else self._entries
+            data = {k: asdict(v) for k, v in entries.items()}
+        try:
+            write_atomically(self.path, json.dumps(data).encode("utf-8"))
+        except OSError as e:
+            _LOG.warning(f"unable to write digest index {self.path}: {e}")
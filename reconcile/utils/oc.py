@@ -1,4 +1,5 @@
 import copy
+import hashlib
 import json
 import logging
 import os
@@ -19,21 +20,26 @@ from subprocess import Popen
 from threading import Lock
 from typing import (
     Any,
+    NoReturn,
     Optional,
     Union,
 )
 
 import urllib3
+from kubernetes import watch
 from kubernetes.client import (
     ApiClient,
     Configuration,
 )
+from kubernetes.client.rest import ApiException
 from kubernetes.dynamic.client import DynamicClient
 from kubernetes.dynamic.discovery import (
     LazyDiscoverer,
     ResourceGroup,
 )
 from kubernetes.dynamic.exceptions import (
+    ConflictError,
+    DynamicApiError,
     ForbiddenError,
     InternalServerError,
     NotFoundError,
@@ -55,6 +61,10 @@ from reconcile.utils.jump_host import (
 )
 from reconcile.utils.metrics import reconcile_time
 from reconcile.utils.oc_connection_parameters import OCConnectionParameters
+from reconcile.utils.openshift_template import (
+    TemplateProcessingError,
+    process_template,
+)
 from reconcile.utils.secret_reader import (
     SecretNotFound,
     SecretReader,
@@ -64,6 +74,18 @@ from reconcile.utils.unleash import get_feature_toggle_state
 urllib3.disable_warnings()
 
 GET_REPLICASET_MAX_ATTEMPTS = 20
+LAST_APPLIED_CONFIGURATION = "kubectl.kubernetes.io/last-applied-configuration"
+SERVER_SIDE_APPLY_FIELD_MANAGER = "qontract-reconcile"
+# keep current state in memory across integration loops, see InformerCache
+OC_INFORMER_CACHE = os.environ.get("OC_INFORMER_CACHE", "").lower() in ["true", "yes"]
+OC_INFORMER_WATCH_TIMEOUT = int(os.environ.get("OC_INFORMER_WATCH_TIMEOUT", 300))
+HTTP_STATUS_GONE = 410
+# how OCLocal processes templates:
+# - native: in-process, see reconcile.utils.openshift_template
+# - oc: using `oc process`
+# - compare: both, log differences and use the result of `oc process` (default
+#   until both are known to process all our templates the same way)
+OC_PROCESS_IMPLEMENTATION = os.environ.get("OC_PROCESS_IMPLEMENTATION", "compare")
 
 
 class StatusCodeError(Exception):
@@ -221,6 +243,220 @@ class OCProcessReconcileTimeDecoratorMsg:
         self.is_log_slow_oc_reconcile = is_log_slow_oc_reconcile
 
 
+def raise_for_apply_error(server: Optional[str], err: str) -> None:
+    """Raise the specific exception for known errors of apply-like operations.
+
+    Returns if `err` does not match any of them.
+    """
+    if "Invalid value: 0x0" in err:
+        raise InvalidValueApplyError(f"[{server}]: {err}")
+    if "Invalid value: " in err:
+        if ": field is immutable" in err:
+            if "The Deployment" in err:
+                raise DeploymentFieldIsImmutableError(f"[{server}]: {err}")
+            raise FieldIsImmutableError(f"[{server}]: {err}")
+        if ": may not change once set" in err:
+            raise MayNotChangeOnceSetError(f"[{server}]: {err}")
+        if ": primary clusterIP can not be unset" in err:
+            raise PrimaryClusterIPCanNotBeUnsetError(f"[{server}]: {err}")
+        raise StatusCodeError(f"[{server}]: {err}")
+    if "metadata.annotations: Too long" in err:
+        raise MetaDataAnnotationsTooLongApplyError(f"[{server}]: {err}")
+    if "UnsupportedMediaType" in err:
+        raise UnsupportedMediaTypeError(f"[{server}]: {err}")
+    if "updates to statefulset spec for fields other than" in err:
+        raise StatefulSetUpdateForbidden(f"[{server}]: {err}")
+    if "the object has been modified" in err:
+        raise ObjectHasBeenModifiedError(f"[{server}]: {err}")
+
+
+def format_api_error(e: DynamicApiError) -> str:
+    """Format an API error the way `oc` reports it on stderr."""
+    try:
+        status = json.loads(e.body)
+    except (TypeError, ValueError):
+        return str(e.body or f"{e.status} Reason: {e.reason}")
+    message = status.get("message", "")
+    reason = status.get("reason", e.reason)
+    details = status.get("details") or {}
+    if reason == "Invalid" and details.get("kind"):
+        return (
+            f'The {details["kind"]} "{details.get("name", "")}" is invalid: {message}'
+        )
+    return f"Error from server ({reason}): {message}"
+
+
+def three_way_merge_patch(
+    original: Mapping[str, Any], modified: Mapping[str, Any], current: Any
+) -> dict[str, Any]:
+    """JSON merge patch (RFC 7386) that makes `current` match `modified`.
+
+    Fields which were part of the `original` (last applied) configuration
+    but are gone from `modified` are removed. Fields set by others (e.g.
+    defaults and status) are left alone, the same way `oc apply` does it.
+    Lists can't be merged with a JSON merge patch and are replaced as a whole.
+    """
+    if not isinstance(current, Mapping):
+        current = {}
+    patch: dict[str, Any] = {}
+    for key, value in modified.items():
+        current_value = current.get(key)
+        if isinstance(value, Mapping) and isinstance(current_value, Mapping):
+            original_value = original.get(key)
+            sub_patch = three_way_merge_patch(
+                original_value if isinstance(original_value, Mapping) else {},
+                value,
+                current_value,
+            )
+            if sub_patch:
+                patch[key] = sub_patch
+        elif current_value != value or key not in current:
+            patch[key] = value
+    for key in original:
+        if key not in modified and key in current:
+            patch[key] = None
+    return patch
+
+
+# API groups served by the Kubernetes and OpenShift API servers. Their
+# resources support strategic merge patches, custom resources do not.
+STRATEGIC_MERGE_PATCH_GROUPS = frozenset(
+    [
+        "",
+        "admissionregistration.k8s.io",
+        "apps",
+        "apps.openshift.io",
+        "authorization.openshift.io",
+        "autoscaling",
+        "batch",
+        "build.openshift.io",
+        "certificates.k8s.io",
+        "coordination.k8s.io",
+        "discovery.k8s.io",
+        "image.openshift.io",
+        "networking.k8s.io",
+        "oauth.openshift.io",
+        "policy",
+        "project.openshift.io",
+        "quota.openshift.io",
+        "rbac.authorization.k8s.io",
+        "route.openshift.io",
+        "scheduling.k8s.io",
+        "security.openshift.io",
+        "storage.k8s.io",
+        "template.openshift.io",
+        "user.openshift.io",
+    ]
+)
+
+# patch merge keys of the lists of built-in kinds we manage, by field name.
+# other lists are replaced as a whole, like with a JSON merge patch.
+STRATEGIC_MERGE_KEYS = {
+    "containers": "name",
+    "ephemeralContainers": "name",
+    "env": "name",
+    "hostAliases": "ip",
+    "imagePullSecrets": "name",
+    "initContainers": "name",
+    "volumeDevices": "devicePath",
+    "volumeMounts": "mountPath",
+    "volumes": "name",
+}
+_CONTAINER_LISTS = {"containers", "ephemeralContainers", "initContainers"}
+
+
+def _strategic_merge_key(path: list[str]) -> Optional[str]:
+    field = path[-1]
+    if field == "ports":
+        if len(path) > 1 and path[-2] in _CONTAINER_LISTS:
+            return "containerPort"
+        # Service
+        return "port" if path == ["spec", "ports"] else None
+    return STRATEGIC_MERGE_KEYS.get(field)
+
+
+def _three_way_strategic_merge_list(
+    original: Any, modified: list[Any], current: list[Any], key: str, path: list[str]
+) -> tuple[list[Any], list[Any]]:
+    """Return the patch of a list merged by `key` and its element order."""
+    if not isinstance(original, list):
+        original = []
+    if not all(
+        isinstance(i, Mapping) and key in i for i in [*original, *modified, *current]
+    ):
+        # can't be merged, replace the whole list
+        return modified + [{"$patch": "replace"}], []
+
+    original_by_key = {i[key]: i for i in original}
+    current_by_key = {i[key]: i for i in current}
+    modified_keys = [i[key] for i in modified]
+    patch: list[Any] = []
+    for item in modified:
+        current_item = current_by_key.get(item[key])
+        if current_item is None:
+            patch.append(item)
+            continue
+        sub_patch = three_way_strategic_merge_patch(
+            original_by_key.get(item[key], {}), item, current_item, path
+        )
+        if sub_patch:
+            patch.append({key: item[key], **sub_patch})
+    for k in original_by_key:
+        if k not in modified_keys and k in current_by_key:
+            patch.append({key: k, "$patch": "delete"})
+
+    order = [k for k in current_by_key if k in modified_keys]
+    if not patch and order == modified_keys:
+        return [], []
+    return patch, [{key: k} for k in modified_keys]
+
+
+def three_way_strategic_merge_patch(
+    original: Mapping[str, Any],
+    modified: Mapping[str, Any],
+    current: Any,
+    path: Optional[list[str]] = None,
+) -> dict[str, Any]:
+    """Strategic merge patch that makes `current` match `modified`.
+
+    Same as `three_way_merge_patch`, but the elements of lists with a patch
+    merge key (see STRATEGIC_MERGE_KEYS) are merged by their key, e.g.
+    containers by name. Elements added by others, like injected sidecar
+    containers, are left alone. Only built-in kinds support these patches.
+    """
+    if not isinstance(current, Mapping):
+        current = {}
+    path = path or []
+    patch: dict[str, Any] = {}
+    for key, value in modified.items():
+        current_value = current.get(key)
+        original_value = original.get(key)
+        merge_key = _strategic_merge_key(path + [key])
+        if isinstance(value, Mapping) and isinstance(current_value, Mapping):
+            sub_patch = three_way_strategic_merge_patch(
+                original_value if isinstance(original_value, Mapping) else {},
+                value,
+                current_value,
+                path + [key],
+            )
+            if sub_patch:
+                patch[key] = sub_patch
+        elif merge_key and isinstance(value, list) and isinstance(current_value, list):
+            list_patch, order = _three_way_strategic_merge_list(
+                original_value, value, current_value, merge_key, path + [key]
+            )
+            if list_patch:
+                patch[key] = list_patch
+            if order:
+                patch[f"$setElementOrder/{key}"] = order
+        elif current_value != value or key not in current:
+            patch[key] = value
+    for key in original:
+        if key not in modified and key in current:
+            patch[key] = None
+    return patch
+
+
 def oc_process(template, parameters=None):
     oc = OCLocal(cluster_name="cluster", server=None, token=None, local=True)
     return oc.process(template, parameters)
@@ -475,6 +711,8 @@ class OCCli:  # pylint: disable=too-many-public-methods
                 if not self.project_exists(namespace):
                     return []
                 cmd.extend(["-n", namespace])
+        elif kwargs.get("all_namespaces"):
+            cmd.append("--all-namespaces")
 
         if "labels" in kwargs:
             labels_list = [
@@ -523,7 +761,7 @@ class OCCli:  # pylint: disable=too-many-public-methods
             namespace,
             kind,
             name,
-            "kubectl.kubernetes.io/last-applied-configuration-",
+            f"{LAST_APPLIED_CONFIGURATION}-",
         ]
         self._run(cmd)
 
@@ -580,6 +818,35 @@ class OCCli:  # pylint: disable=too-many-public-methods
         self._run(cmd, stdin=resource.toJSON(), apply=True)
         return self._msg_to_process_reconcile_time(namespace, resource.body)
 
+    @OCDecorators.process_reconcile_time
+    def apply_server_side(self, namespace, resource):
+        cmd = self._server_side_apply_cmd(namespace)
+        self._run(cmd, stdin=resource.toJSON(), apply=True)
+        return self._msg_to_process_reconcile_time(namespace, resource.body)
+
+    def apply_server_side_dry_run(self, namespace, body):
+        """Return the object as it would look like after a server-side apply."""
+        cmd = self._server_side_apply_cmd(namespace) + [
+            "--dry-run=server",
+            "-o",
+            "json",
+        ]
+        result = self._run(cmd, stdin=json.dumps(body), apply=True)
+        return json.loads(result)
+
+    @staticmethod
+    def _server_side_apply_cmd(namespace):
+        return [
+            "apply",
+            "--server-side",
+            "--force-conflicts",
+            f"--field-manager={SERVER_SIDE_APPLY_FIELD_MANAGER}",
+            "-n",
+            namespace,
+            "-f",
+            "-",
+        ]
+
     @OCDecorators.process_reconcile_time
     def create(self, namespace, resource):
         cmd = ["create", "-n", namespace, "-f", "-"]
@@ -1076,32 +1343,7 @@ class OCCli:  # pylint: disable=too-many-public-methods
             if "Unable to connect to the server" in err:
                 raise StatusCodeError(f"[{self.server}]: {err}")
             if kwargs.get("apply"):
-                if "Invalid value: 0x0" in err:
-                    raise InvalidValueApplyError(f"[{self.server}]: {err}")
-                if "Invalid value: " in err:
-                    if ": field is immutable" in err:
-                        if "The Deployment" in err:
-                            raise DeploymentFieldIsImmutableError(
-                                f"[{self.server}]: {err}"
-                            )
-                        raise FieldIsImmutableError(f"[{self.server}]: {err}")
-                    if ": may not change once set" in err:
-                        raise MayNotChangeOnceSetError(f"[{self.server}]: {err}")
-                    if ": primary clusterIP can not be unset" in err:
-                        raise PrimaryClusterIPCanNotBeUnsetError(
-                            f"[{self.server}]: {err}"
-                        )
-                    raise StatusCodeError(f"[{self.server}]: {err}")
-                if "metadata.annotations: Too long" in err:
-                    raise MetaDataAnnotationsTooLongApplyError(
-                        f"[{self.server}]: {err}"
-                    )
-                if "UnsupportedMediaType" in err:
-                    raise UnsupportedMediaTypeError(f"[{self.server}]: {err}")
-                if "updates to statefulset spec for fields other than" in err:
-                    raise StatefulSetUpdateForbidden(f"[{self.server}]: {err}")
-                if "the object has been modified" in err:
-                    raise ObjectHasBeenModifiedError(f"[{self.server}]: {err}")
+                raise_for_apply_error(self.server, err)
             if not (allow_not_found and "NotFound" in err):
                 raise StatusCodeError(f"[{self.server}]: {err}")
 
@@ -1194,6 +1436,168 @@ class OCCli:  # pylint: disable=too-many-public-methods
         return kind_resources[0].namespaced
 
 
+class ResourceInformer:
+    """
+    Keeps the resources of a kind in a namespace in memory.
+
+    The resources are listed once and then kept up to date by following
+    WATCH events, resuming from the last seen resourceVersion (bookmarks
+    included). If the resourceVersion is too old (410 Gone), the resources
+    are listed again. Any other error stops the watch and marks the
+    informer as out of sync, the next read will list again.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        label_selector: str = "",
+        watch_timeout: int = OC_INFORMER_WATCH_TIMEOUT,
+    ):
+        self.namespace = namespace
+        self.label_selector = label_selector
+        self.watch_timeout = watch_timeout
+        self.obj_client: Any = None
+        self._items: dict[str, dict[str, Any]] = {}
+        self._resource_version: Optional[str] = None
+        self._synced = False
+        self._lock = Lock()
+        self._start_lock = Lock()
+        self._stopped = threading.Event()
+        self._watcher: Optional[watch.Watch] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _key(item: Mapping[str, Any]) -> str:
+        metadata = item["metadata"]
+        return f"{metadata.get('namespace', '')}/{metadata['name']}"
+
+    @property
+    def synced(self) -> bool:
+        return (
+            self._synced
+            and self._thread is not None
+            and self._thread.is_alive()
+            and not self._stopped.is_set()
+        )
+
+    def items(self, obj_client: Any) -> list[dict[str, Any]]:
+        with self._start_lock:
+            if not self.synced:
+                self._start(obj_client)
+        with self._lock:
+            # callers are free to modify what they get
+            return copy.deepcopy(list(self._items.values()))
+
+    def _start(self, obj_client: Any) -> None:
+        self.stop()
+        self.obj_client = obj_client
+        self._stopped = threading.Event()
+        self.list()
+        self._thread = threading.Thread(
+            target=self._run, args=(self._stopped,), daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._watcher:
+            self._watcher.stop()
+
+    def list(self) -> None:
+        result = self.obj_client.get(
+            namespace=self.namespace, label_selector=self.label_selector
+        ).to_dict()
+        items = {self._key(i): i for i in result["items"]}
+        with self._lock:
+            self._items = items
+            self._resource_version = result["metadata"].get("resourceVersion")
+            self._synced = True
+
+    def handle_event(self, event: Mapping[str, Any]) -> None:
+        obj = event["raw_object"]
+        with self._lock:
+            if event["type"] in ["ADDED", "MODIFIED"]:
+                self._items[self._key(obj)] = obj
+            elif event["type"] == "DELETED":
+                self._items.pop(self._key(obj), None)
+            # BOOKMARK events only carry a resourceVersion
+            resource_version = obj.get("metadata", {}).get("resourceVersion")
+            if resource_version:
+                self._resource_version = resource_version
+
+    def _watch(self) -> None:
+        self._watcher = watch.Watch()
+        for event in self._watcher.stream(
+            self.obj_client.get,
+            namespace=self.namespace,
+            label_selector=self.label_selector,
+            resource_version=self._resource_version,
+            timeout_seconds=self.watch_timeout,
+            query_params=[("allowWatchBookmarks", "true")],
+            serialize=False,
+        ):
+            self.handle_event(event)
+
+    def _run(self, stopped: threading.Event) -> None:
+        try:
+            while not stopped.is_set():
+                try:
+                    self._watch()
+                except (ApiException, DynamicApiError) as e:
+                    if e.status != HTTP_STATUS_GONE:
+                        raise
+                    self.list()
+        except Exception as e:
+            logging.warning(
+                f"informer for {self.namespace or 'all namespaces'} stopped: {e}"
+            )
+        finally:
+            with self._lock:
+                # a newer watch might already be running
+                if stopped is self._stopped:
+                    self._synced = False
+
+
+class InformerCache:
+    """
+    Process wide registry of ResourceInformers.
+
+    Informers outlive the OC clients that created them, so integrations
+    running in a loop only LIST each resource once and read the current
+    state from memory afterwards. Reads are eventually consistent: changes
+    show up as soon as the corresponding WATCH event was received.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._informers: dict[tuple[str, ...], ResourceInformer] = {}
+
+    def get_items(
+        self,
+        scope: str,
+        kind: str,
+        obj_client: Any,
+        namespace: str,
+        label_selector: str = "",
+    ) -> list[dict[str, Any]]:
+        key = (scope, kind, namespace, label_selector)
+        with self._lock:
+            informer = self._informers.get(key)
+            if informer is None:
+                informer = ResourceInformer(namespace, label_selector)
+                self._informers[key] = informer
+        return informer.items(obj_client)
+
+    def stop(self) -> None:
+        with self._lock:
+            for informer in self._informers.values():
+                informer.stop()
+            self._informers = {}
+
+
+_informer_cache = InformerCache()
+
+
 class OCNative(OCCli):
     def __init__(
         self,
@@ -1206,7 +1610,14 @@ class OCNative(OCCli):
         local: bool = False,
         insecure_skip_tls_verify: bool = False,
         connection_parameters: Optional[OCConnectionParameters] = None,
+        native_writes: bool = False,
+        informer_cache: Optional[InformerCache] = None,
     ):
+        """
+        Reads always go through the kubernetes API client. Writes only do so if
+        `native_writes` is set, otherwise they are delegated to the `oc` binary.
+        With an `informer_cache`, listing resources is served from memory.
+        """
         super().__init__(
             cluster_name,
             server,
@@ -1230,11 +1641,16 @@ class OCNative(OCCli):
         if server:
             self.client = self._get_client(server, token)
             self.api_resources = self.get_api_resources()
+            # informers are shared by clients for the same server and token
+            token_hash = hashlib.sha256((token or "").encode()).hexdigest()
+            self._informer_scope = f"{server}/{token_hash}"
 
         else:
             raise Exception("A method relies on client/api_kind_version to be set")
 
         self.object_clients: dict[Any, Any] = {}
+        self.native_writes = native_writes
+        self.informer_cache = informer_cache
 
         self.init_projects = init_projects
         if self.init_projects:
@@ -1317,6 +1733,14 @@ class OCNative(OCCli):
             labels = ",".join(labels_list)
 
         resource_names = kwargs.get("resource_names")
+        if self.informer_cache is not None:
+            items = self.informer_cache.get_items(
+                self._informer_scope, kind, obj_client, namespace, labels
+            )
+            if resource_names:
+                items = [i for i in items if i["metadata"]["name"] in resource_names]
+            return items
+
         if resource_names:
             items = []
             for resource_name in resource_names:
@@ -1360,6 +1784,269 @@ class OCNative(OCCli):
         except NotFoundError as e:
             raise StatusCodeError(f"[{self.server}]: {e}")
 
+    def _get_body_client(self, body):
+        return self._get_obj_client(kind=body["kind"], group_version=body["apiVersion"])
+
+    def _get_kind_client(self, kind):
+        k, group_version = self._parse_kind(kind)
+        return self._get_obj_client(group_version=group_version, kind=k)
+
+    @staticmethod
+    def _obj_namespace(obj_client, namespace):
+        # cluster scoped resources are applied with namespace "cluster"
+        return namespace if obj_client.namespaced else None
+
+    def _raise_api_error(self, e: DynamicApiError, apply: bool = False) -> NoReturn:
+        err = format_api_error(e)
+        if apply:
+            raise_for_apply_error(self.server, err)
+        raise StatusCodeError(f"[{self.server}]: {err}") from e
+
+    def apply(self, namespace, resource):
+        if not self.native_writes:
+            return super().apply(namespace, resource)
+        return self._native_apply(namespace, resource)
+
+    @OCDecorators.process_reconcile_time
+    def _native_apply(self, namespace, resource):
+        body = copy.deepcopy(resource.body)
+        annotations = body["metadata"].setdefault("annotations", {})
+        annotations.pop(LAST_APPLIED_CONFIGURATION, None)
+        last_applied = json.dumps(body, sort_keys=True)
+        annotations[LAST_APPLIED_CONFIGURATION] = last_applied
+
+        obj_client = self._get_body_client(body)
+        ns = self._obj_namespace(obj_client, namespace)
+        try:
+            try:
+                current = obj_client.get(name=resource.name, namespace=ns).to_dict()
+            except NotFoundError:
+                obj_client.create(body=body, namespace=ns)
+            else:
+                try:
+                    original = json.loads(
+                        current["metadata"]
+                        .get("annotations", {})
+                        .get(LAST_APPLIED_CONFIGURATION, "{}")
+                    )
+                except ValueError:
+                    original = {}
+                if obj_client.group in STRATEGIC_MERGE_PATCH_GROUPS:
+                    patch = three_way_strategic_merge_patch(original, body, current)
+                    content_type = "application/strategic-merge-patch+json"
+                else:
+                    # custom resources only support JSON merge patches
+                    patch = three_way_merge_patch(original, body, current)
+                    content_type = "application/merge-patch+json"
+                if patch:
+                    obj_client.patch(
+                        body=patch,
+                        name=resource.name,
+                        namespace=ns,
+                        content_type=content_type,
+                    )
+        except DynamicApiError as e:
+            self._raise_api_error(e, apply=True)
+        return self._msg_to_process_reconcile_time(namespace, resource.body)
+
+    def apply_server_side(self, namespace, resource):
+        if not self.native_writes:
+            return super().apply_server_side(namespace, resource)
+        return self._native_apply_server_side(namespace, resource)
+
+    @OCDecorators.process_reconcile_time
+    def _native_apply_server_side(self, namespace, resource):
+        self._server_side_apply(namespace, resource.body)
+        return self._msg_to_process_reconcile_time(namespace, resource.body)
+
+    def apply_server_side_dry_run(self, namespace, body):
+        if not self.native_writes:
+            return super().apply_server_side_dry_run(namespace, body)
+        return self._server_side_apply(namespace, body, dry_run=True)
+
+    def _server_side_apply(self, namespace, body, dry_run=False):
+        obj_client = self._get_body_client(body)
+        try:
+            result = obj_client.server_side_apply(
+                # the content type is YAML, which JSON is a subset of
+                body=json.dumps(body),
+                name=body["metadata"]["name"],
+                namespace=self._obj_namespace(obj_client, namespace),
+                field_manager=SERVER_SIDE_APPLY_FIELD_MANAGER,
+                force_conflicts=True,
+                dry_run="All" if dry_run else None,
+            )
+        except DynamicApiError as e:
+            self._raise_api_error(e, apply=True)
+        return result.to_dict()
+
+    def create(self, namespace, resource):
+        if not self.native_writes:
+            return super().create(namespace, resource)
+        return self._native_create(namespace, resource)
+
+    @OCDecorators.process_reconcile_time
+    def _native_create(self, namespace, resource):
+        obj_client = self._get_body_client(resource.body)
+        try:
+            obj_client.create(
+                body=resource.body, namespace=self._obj_namespace(obj_client, namespace)
+            )
+        except DynamicApiError as e:
+            self._raise_api_error(e, apply=True)
+        return self._msg_to_process_reconcile_time(namespace, resource.body)
+
+    def replace(self, namespace, resource):
+        if not self.native_writes:
+            return super().replace(namespace, resource)
+        return self._native_replace(namespace, resource)
+
+    @OCDecorators.process_reconcile_time
+    def _native_replace(self, namespace, resource):
+        obj_client = self._get_body_client(resource.body)
+        try:
+            obj_client.replace(
+                body=resource.body, namespace=self._obj_namespace(obj_client, namespace)
+            )
+        except DynamicApiError as e:
+            self._raise_api_error(e, apply=True)
+        return self._msg_to_process_reconcile_time(namespace, resource.body)
+
+    def patch(self, namespace, kind, name, patch):
+        if not self.native_writes:
+            return super().patch(namespace, kind, name, patch)
+        return self._native_patch(namespace, kind, name, patch)
+
+    @OCDecorators.process_reconcile_time
+    def _native_patch(self, namespace, kind, name, patch):
+        obj_client = self._get_kind_client(kind)
+        try:
+            obj_client.patch(
+                body=patch,
+                name=name,
+                namespace=self._obj_namespace(obj_client, namespace),
+                content_type="application/merge-patch+json",
+            )
+        except DynamicApiError as e:
+            self._raise_api_error(e)
+        resource = {"kind": kind, "metadata": {"name": name}}
+        return self._msg_to_process_reconcile_time(namespace, resource)
+
+    def remove_last_applied_configuration(self, namespace, kind, name):
+        if not self.native_writes:
+            return super().remove_last_applied_configuration(namespace, kind, name)
+        obj_client = self._get_kind_client(kind)
+        try:
+            obj_client.patch(
+                body={"metadata": {"annotations": {LAST_APPLIED_CONFIGURATION: None}}},
+                name=name,
+                namespace=self._obj_namespace(obj_client, namespace),
+                content_type="application/merge-patch+json",
+            )
+        except DynamicApiError as e:
+            self._raise_api_error(e)
+
+    def delete(self, namespace, kind, name, cascade=True):
+        if not self.native_writes:
+            return super().delete(namespace, kind, name, cascade=cascade)
+        return self._native_delete(namespace, kind, name, cascade=cascade)
+
+    @OCDecorators.process_reconcile_time
+    def _native_delete(self, namespace, kind, name, cascade=True):
+        obj_client = self._get_kind_client(kind)
+        body = None if cascade else {"propagationPolicy": "Orphan"}
+        try:
+            obj_client.delete(
+                name=name,
+                namespace=self._obj_namespace(obj_client, namespace),
+                body=body,
+            )
+        except DynamicApiError as e:
+            self._raise_api_error(e)
+        resource = {"kind": kind, "metadata": {"name": name}}
+        return self._msg_to_process_reconcile_time(namespace, resource)
+
+    def label(self, namespace, kind, name, labels, overwrite=False):
+        if not self.native_writes:
+            return super().label(namespace, kind, name, labels, overwrite=overwrite)
+        return self._native_label(namespace, kind, name, labels, overwrite=overwrite)
+
+    @OCDecorators.process_reconcile_time
+    def _native_label(self, namespace, kind, name, labels, overwrite=False):
+        obj_client = self._get_kind_client(kind)
+        ns = self._obj_namespace(obj_client, namespace)
+        try:
+            if not overwrite:
+                current = obj_client.get(name=name, namespace=ns).to_dict()
+                current_labels = current["metadata"].get("labels") or {}
+                for k, v in labels.items():
+                    if v is not None and current_labels.get(k, v) != v:
+                        raise StatusCodeError(
+                            f"[{self.server}]: '{k}' already has a value "
+                            f"({current_labels[k]}), and --overwrite is false"
+                        )
+            obj_client.patch(
+                body={"metadata": {"labels": labels}},
+                name=name,
+                namespace=ns,
+                content_type="application/merge-patch+json",
+            )
+        except DynamicApiError as e:
+            self._raise_api_error(e)
+        resource = {"kind": kind, "metadata": {"name": name}}
+        return self._msg_to_process_reconcile_time(namespace, resource)
+
+    def new_project(self, namespace):
+        if not self.native_writes:
+            return super().new_project(namespace)
+        return self._native_new_project(namespace)
+
+    @OCDecorators.process_reconcile_time
+    def _native_new_project(self, namespace):
+        if self.is_kind_supported("Project"):
+            body = {
+                "apiVersion": "project.openshift.io/v1",
+                "kind": "ProjectRequest",
+                "metadata": {"name": namespace},
+            }
+        else:
+            body = {
+                "apiVersion": "v1",
+                "kind": "Namespace",
+                "metadata": {"name": namespace},
+            }
+        try:
+            self._get_body_client(body).create(body=body)
+        except ConflictError:
+            # AlreadyExists
+            pass
+        except DynamicApiError as e:
+            self._raise_api_error(e)
+
+        # This return will be removed by the last decorator
+        resource = {"kind": "Namespace", "metadata": {"name": namespace}}
+        return self._msg_to_process_reconcile_time(namespace, resource)
+
+    def delete_project(self, namespace):
+        if not self.native_writes:
+            return super().delete_project(namespace)
+        return self._native_delete_project(namespace)
+
+    @OCDecorators.process_reconcile_time
+    def _native_delete_project(self, namespace):
+        if self.is_kind_supported("Project"):
+            kind = "Project.project.openshift.io"
+        else:
+            kind = "Namespace"
+        try:
+            self._get_kind_client(kind).delete(name=namespace)
+        except DynamicApiError as e:
+            self._raise_api_error(e)
+
+        # This return will be removed by the last decorator
+        resource = {"kind": "Namespace", "metadata": {"name": namespace}}
+        return self._msg_to_process_reconcile_time(namespace, resource)
+
 
 OCClient = Union[OCNative, OCCli]
 
@@ -1379,6 +2066,25 @@ class OCLocal(OCCli):
             local=local,
         )
 
+    def process(self, template, parameters=None):
+        if OC_PROCESS_IMPLEMENTATION == "oc":
+            return super().process(template, parameters)
+
+        try:
+            items = process_template(template, parameters)
+        except TemplateProcessingError as e:
+            raise StatusCodeError(f"error: {e}")
+
+        generated = any(p.get("generate") for p in template.get("parameters") or [])
+        if OC_PROCESS_IMPLEMENTATION == "compare" and not generated:
+            expected = super().process(template, parameters)
+            if items != expected:
+                name = template.get("metadata", {}).get("name")
+                logging.warning(f"template {name} processed differently than oc does")
+            return expected
+
+        return items
+
 
 class OC:
     client_status = Counter(
@@ -1414,6 +2120,10 @@ class OC:
             cluster_name = connection_parameters.cluster_name
 
         if use_native:
+            native_writes = os.environ.get("USE_NATIVE_CLIENT_WRITES", "").lower() in [
+                "true",
+                "yes",
+            ]
             OC.client_status.labels(cluster_name=cluster_name, native_client=True).inc()
             return OCNative(
                 cluster_name=cluster_name,
@@ -1425,6 +2135,8 @@ class OC:
                 local=local,
                 insecure_skip_tls_verify=insecure_skip_tls_verify,
                 connection_parameters=connection_parameters,
+                native_writes=native_writes,
+                informer_cache=_informer_cache if OC_INFORMER_CACHE else None,
             )
 
         OC.client_status.labels(cluster_name=cluster_name, native_client=False).inc()
@@ -7,6 +7,7 @@ import re
 import string
 from abc import abstractmethod
 from collections.abc import (
+    Generator,
     Iterable,
     Mapping,
 )
@@ -37,6 +38,7 @@ from reconcile.utils.exceptions import ParameterError
 from reconcile.utils.ocm_base_client import (
     OCMAPIClientConfiguration,
     OCMBaseClient,
+    fetch_remaining_pages,
     init_ocm_base_client,
 )
 from reconcile.utils.secret_reader import SecretReader
@@ -1042,9 +1044,7 @@ class OCM:  # pylint: disable=too-many-public-methods
 
     def is_cluster_admin_enabled(self, cluster: str) -> bool:
         api = self._get_subscription_labels_api(cluster)
-        subcription_labels = self._get_json(api).get("items")
-
-        for sl in subcription_labels or []:
+        for sl in self._get_json_items(api):
             if sl["key"] == CLUSTER_ADMIN_LABEL_KEY and sl["value"] == "true":
                 return True
 
@@ -1592,21 +1592,7 @@ class OCM:  # pylint: disable=too-many-public-methods
     def _get_json(
         self, api: str, params: Optional[dict[str, Any]] = None, page_size: int = 100
     ) -> dict[str, Any]:
-        responses = []
-        if not params:
-            params = {}
-        params["size"] = page_size
-        while True:
-            rs = self._do_get_request(api, params=params)
-            responses.append(rs)
-            if (
-                self._response_is_list(rs)
-                and rs.get("size", len(rs.get("items", []))) == params["size"]
-            ):
-                params["page"] = rs.get("page", 1) + 1
-            else:
-                break
-
+        responses = list(self._get_json_pages(api, params, page_size))
         if self._response_is_list(responses[0]):
             items = []
             for resp in responses:
@@ -1622,6 +1608,28 @@ class OCM:  # pylint: disable=too-many-public-methods
             return ret_items
         return responses[0]
 
+    def _get_json_items(
+        self, api: str, params: Optional[dict[str, Any]] = None, page_size: int = 100
+    ) -> Generator[dict[str, Any], None, None]:
+        """Streaming variant of `_get_json` for list endpoints, yields the
+        items while the following pages are being fetched."""
+        for rs in self._get_json_pages(api, params, page_size):
+            yield from rs.get("items") or []
+
+    def _get_json_pages(
+        self, api: str, params: Optional[dict[str, Any]], page_size: int
+    ) -> Generator[dict[str, Any], None, None]:
+        list_params: dict[str, Any] = {**(params or {}), "size": page_size}
+
+        def fetch_page(page: int) -> dict[str, Any]:
+            return self._do_get_request(api, params={**list_params, "page": page})
+
+        rs = self._do_get_request(api, params=list_params)
+        yield rs
+        if not self._response_is_list(rs):
+            return
+        yield from fetch_remaining_pages(fetch_page, rs, page_size=page_size)
+
     def _post(self, api, data=None, params=None):
         return self._ocm_client.post(
             api_path=api,
@@ -1,5 +1,9 @@
+import json
 import logging
+import math
+import os
 from collections.abc import (
+    Callable,
     Generator,
     Mapping,
 )
@@ -14,14 +18,63 @@ from requests import (
     Session,
     codes,
 )
-from sretoolbox.utils import retry
+from sretoolbox.utils import (
+    retry,
+    threaded,
+)
 
+from reconcile.utils.ocm_response_cache import (
+    OCMResponseCache,
+    ocm_response_cache,
+)
 from reconcile.utils.secret_reader import (
     HasSecret,
     SecretReaderBase,
 )
 
 REQUEST_TIMEOUT_SEC = 60
+OCM_PAGINATION_THREAD_POOL_SIZE = int(
+    os.environ.get("OCM_PAGINATION_THREAD_POOL_SIZE", 5)
+)
+
+
+def _page_is_full(rs: Mapping[str, Any], page_size: int) -> bool:
+    return rs.get("size", len(rs.get("items") or [])) == page_size
+
+
+def fetch_remaining_pages(
+    fetch_page: Callable[[int], dict[str, Any]],
+    first_page: Mapping[str, Any],
+    page_size: int,
+    max_pages: Optional[int] = None,
+    thread_pool_size: int = OCM_PAGINATION_THREAD_POOL_SIZE,
+) -> Generator[dict[str, Any], None, None]:
+    """
+    Yields the pages of an OCM list following `first_page`, in order.
+
+    The pages announced by the `total` of the first page are fetched
+    concurrently, `thread_pool_size` pages at a time. As long as the last
+    page is full, pagination continues, so lists growing in the meantime
+    (or responses without `total`) are still read completely.
+    """
+    current_page = first_page.get("page", 1)
+    latest: Mapping[str, Any] = first_page
+    while _page_is_full(latest, page_size) and (
+        max_pages is None or current_page < max_pages
+    ):
+        last_page = max(
+            math.ceil(latest.get("total", 0) / page_size) if page_size else 0,
+            current_page + 1,
+        )
+        if max_pages is not None:
+            last_page = min(last_page, max_pages)
+        pages = list(range(current_page + 1, last_page + 1))
+        for i in range(0, len(pages), thread_pool_size):
+            batch = pages[i : i + thread_pool_size]
+            for page in threaded.run(fetch_page, batch, len(batch)):
+                yield page
+                latest = page
+        current_page = last_page
 
 
 class OCMBaseClient:
@@ -37,12 +90,15 @@ class OCMBaseClient:
         access_token_url: str,
         access_token_client_id: str,
         session: Optional[Session] = None,
+        response_cache: Optional[OCMResponseCache] = None,
     ):
         self._access_token_client_secret = access_token_client_secret
         self._access_token_client_id = access_token_client_id
         self._access_token_url = access_token_url
         self._url = url
         self._session = session if session else Session()
+        self._response_cache = response_cache or ocm_response_cache
+        self._cache_identity = (url, access_token_url, access_token_client_id)
         self._init_access_token()
         self._init_request_headers()
 
@@ -68,12 +124,38 @@ class OCMBaseClient:
         )
 
     def get(self, api_path: str, params: Optional[Mapping[str, str]] = None) -> Any:
+        cache = self._response_cache
+        generation = cache.generation(self._cache_identity)
+        cached = cache.get(self._cache_identity, api_path, params)
+        if cached and cache.is_fresh(cached):
+            return json.loads(cached.body)
+
+        headers = {"If-None-Match": cached.etag} if cached and cached.etag else None
         r = self._session.get(
             f"{self._url}{api_path}",
             params=params,
+            headers=headers,
             timeout=REQUEST_TIMEOUT_SEC,
         )
+        if cached and r.status_code == codes.not_modified:
+            cache.put(
+                self._cache_identity,
+                api_path,
+                params,
+                cached.body,
+                cached.etag,
+                generation,
+            )
+            return json.loads(cached.body)
         r.raise_for_status()
+        cache.put(
+            self._cache_identity,
+            api_path,
+            params,
+            r.text,
+            r.headers.get("ETag"),
+            generation,
+        )
         return r.json()
 
     def get_paginated(
@@ -86,26 +168,19 @@ class OCMBaseClient:
         if not params:
             params_copy = {}
         else:
-            params_copy = params.copy()
+            params_copy = dict(params)
         params_copy["size"] = max_page_size
 
-        # fetch pages
-        records_seen = 0
-        while True:
-            rs = self.get(api_path, params=params)
-            for item in rs.get("items", []):
-                yield item
-            total_records = rs.get("total", 0)
-            current_page = rs.get("page", 0)
-            records_on_page = rs.get("size", len(rs.get("items", [])))
-            records_seen += records_on_page
-            if total_records > records_seen and (
-                max_pages and max_pages < current_page
-            ):
-                # more page available
-                params_copy["page"] = current_page + 1
-            else:
-                return
+        def fetch_page(page: int) -> dict[str, Any]:
+            page_params: dict[str, Any] = {**params_copy, "page": page}
+            return self.get(api_path, params=page_params)
+
+        first_page = self.get(api_path, params=params_copy)
+        yield from first_page.get("items") or []
+        for rs in fetch_remaining_pages(
+            fetch_page, first_page, page_size=max_page_size, max_pages=max_pages
+        ):
+            yield from rs.get("items") or []
 
     def post(
         self,
@@ -119,6 +194,7 @@ class OCMBaseClient:
             params=params,
             timeout=REQUEST_TIMEOUT_SEC,
         )
+        self._response_cache.invalidate(self._cache_identity)
         try:
             r.raise_for_status()
         except Exception as e:
@@ -140,6 +216,7 @@ class OCMBaseClient:
             params=params,
             timeout=REQUEST_TIMEOUT_SEC,
         )
+        self._response_cache.invalidate(self._cache_identity)
         try:
             r.raise_for_status()
         except Exception as e:
@@ -148,6 +225,7 @@ class OCMBaseClient:
 
     def delete(self, api_path: str):
         r = self._session.delete(f"{self._url}{api_path}", timeout=REQUEST_TIMEOUT_SEC)
+        self._response_cache.invalidate(self._cache_identity)
         r.raise_for_status()
 
 
@@ -0,0 +1,136 @@
+"""
+Response cache for GET requests against OCM.
+
+Many integrations list the same clusters, subscriptions, labels and addons
+from the same OCM instance. All OCMBaseClient instances of a process share
+`ocm_response_cache`, keyed by the OCM URL and the identity used to get the
+access token, so integrations running in the same process share responses.
+
+Responses are served from the cache for OCM_RESPONSE_CACHE_TTL seconds
+(default 0, i.e. never without asking OCM). Afterwards, responses with an
+ETag are revalidated with `If-None-Match`, so unchanged lists are not
+transferred again. Any POST, PATCH or DELETE through a client drops all
+cached responses of its identity. The least recently used responses are
+dropped once the cached bodies exceed OCM_RESPONSE_CACHE_MAX_SIZE_MB.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import (
+    Callable,
+    Mapping,
+)
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Optional,
+)
+
+OCM_RESPONSE_CACHE_TTL = int(os.environ.get("OCM_RESPONSE_CACHE_TTL", 0))
+OCM_RESPONSE_CACHE_MAX_SIZE_MB = int(
+    os.environ.get("OCM_RESPONSE_CACHE_MAX_SIZE_MB", 64)
+)
+
+Identity = tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: str
+    etag: Optional[str]
+    expiry: float
+
+
+class OCMResponseCache:
+    def __init__(
+        self,
+        ttl: int = OCM_RESPONSE_CACHE_TTL,
+        clock: Callable[[], float] = time.monotonic,
+        max_size: int = OCM_RESPONSE_CACHE_MAX_SIZE_MB * 1024 * 1024,
+    ) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self._clock = clock
+        self._lock = threading.Lock()
+        # in least recently used order
+        self._entries: OrderedDict[tuple[Identity, str], CachedResponse] = OrderedDict()
+        self._size = 0
+        # bumped on every invalidation, responses of requests sent before
+        # an invalidation are not stored
+        self._generations: dict[Identity, int] = {}
+
+    @staticmethod
+    def _key(api_path: str, params: Optional[Mapping[str, Any]]) -> str:
+        return json.dumps([api_path, params or {}], sort_keys=True, default=str)
+
+    def generation(self, identity: Identity) -> int:
+        with self._lock:
+            return self._generations.get(identity, 0)
+
+    def get(
+        self,
+        identity: Identity,
+        api_path: str,
+        params: Optional[Mapping[str, Any]] = None,
+    ) -> Optional[CachedResponse]:
+        """Return the cached response, which might need to be revalidated."""
+        key = (identity, self._key(api_path, params))
+        with self._lock:
+            response = self._entries.get(key)
+            if response is not None:
+                self._entries.move_to_end(key)
+            return response
+
+    def is_fresh(self, response: CachedResponse) -> bool:
+        return response.expiry > self._clock()
+
+    def put(
+        self,
+        identity: Identity,
+        api_path: str,
+        params: Optional[Mapping[str, Any]],
+        body: str,
+        etag: Optional[str],
+        generation: int,
+    ) -> None:
+        if self.ttl <= 0 and not etag:
+            # would never be used
+            return
+        if len(body) > self.max_size:
+            return
+        key = (identity, self._key(api_path, params))
+        with self._lock:
+            if generation != self._generations.get(identity, 0):
+                return
+            self._remove(key)
+            self._entries[key] = CachedResponse(
+                body=body,
+                etag=etag,
+                expiry=self._clock() + self.ttl,
+            )
+            self._size += len(body)
+            while self._size > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: tuple[Identity, str]) -> None:
+        response = self._entries.pop(key, None)
+        if response is not None:
+            self._size -= len(response.body)
+
+    def invalidate(self, identity: Identity) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == identity]:
+                self._remove(key)
+            self._generations[identity] = self._generations.get(identity, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            for identity, _ in self._entries:
+                self._generations[identity] = self._generations.get(identity, 0) + 1
+            self._entries.clear()
+            self._size = 0
+
+
+ocm_response_cache = OCMResponseCache()
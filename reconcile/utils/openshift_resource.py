@@ -68,8 +68,27 @@ class OpenshiftResource:
         if validate_k8s_object:
             self.verify_valid_k8s_object()
 
+    @property
+    def body(self):
+        return self._body
+
+    @body.setter
+    def body(self, body):
+        self._body = body
+        self._sha256sum = None
+
+    def invalidate_sha256sum(self):
+        """
+        The sha256sum is calculated once and cached. Call this after
+        modifying the body in place.
+        """
+        self._sha256sum = None
+
     def __eq__(self, other):
-        return self.obj_intersect_equal(self.body, other.body)
+        equal = self.obj_intersect_equal(self.body, other.body)
+        # the comparison normalizes env entries of other in place
+        other.invalidate_sha256sum()
+        return equal
 
     def obj_intersect_equal(self, obj1, obj2, depth=0):
         # obj1 == d_item
@@ -324,9 +343,7 @@ class OpenshiftResource:
                 annotations.
         """
 
-        # calculate sha256sum of canonical body
-        canonical_body = self.canonicalize(self.body)
-        sha256sum = self.calculate_sha256sum(self.serialize(canonical_body))
+        sha256sum = self.sha256sum()
 
         # create new body object
         body = copy.deepcopy(self.body)
@@ -347,45 +364,60 @@ class OpenshiftResource:
         if self.caller_name:
             annotations["qontract.caller_name"] = self.caller_name
 
-        return OpenshiftResource(body, self.integration, self.integration_version)
+        annotated = OpenshiftResource(body, self.integration, self.integration_version)
+        # the qontract annotations are not part of the canonical body
+        annotated._sha256sum = sha256sum
+        return annotated
 
     def sha256sum(self):
-        body = self.annotate().body
-
-        annotations = body["metadata"]["annotations"]
-        return annotations["qontract.sha256sum"]
+        """sha256sum of the canonical body"""
+        if self._sha256sum is None:
+            canonical_body = self.canonicalize(self.body)
+            self._sha256sum = self.calculate_sha256sum(self.serialize(canonical_body))
+        return self._sha256sum
 
     def toJSON(self):
         return self.serialize(self.body)
 
     @staticmethod
     def canonicalize(body):
-        body = copy.deepcopy(body)
+        """
+        Returns the canonical form of body, which is used to compare and hash
+        resources.
+
+        Only the parts of body that need changes are copied, all other parts
+        are shared with body. The result must not be modified in place.
+        """
+        body = dict(body)
+        metadata = body["metadata"] = dict(body["metadata"])
 
         # create annotations if not present
-        body["metadata"].setdefault("annotations", {})
-        if body["metadata"]["annotations"] is None:
-            body["metadata"]["annotations"] = {}
-        annotations = body["metadata"]["annotations"]
+        annotations = metadata["annotations"] = dict(metadata.get("annotations") or {})
 
         # remove openshift specific params
-        body["metadata"].pop("creationTimestamp", None)
-        body["metadata"].pop("resourceVersion", None)
-        body["metadata"].pop("generation", None)
-        body["metadata"].pop("selfLink", None)
-        body["metadata"].pop("uid", None)
-        body["metadata"].pop("namespace", None)
-        body["metadata"].pop("managedFields", None)
+        metadata.pop("creationTimestamp", None)
+        metadata.pop("resourceVersion", None)
+        metadata.pop("generation", None)
+        metadata.pop("selfLink", None)
+        metadata.pop("uid", None)
+        metadata.pop("namespace", None)
+        metadata.pop("managedFields", None)
         annotations.pop("kubectl.kubernetes.io/last-applied-configuration", None)
 
         # remove status
         body.pop("status", None)
 
         # remove controller managed labels
-        labels = body["metadata"].get("labels", {})
-        for label in set(labels.keys()):
-            if OpenshiftResource.is_controller_managed_label(body["kind"], label):
-                labels.pop(label)
+        labels = metadata.get("labels")
+        if labels and any(
+            OpenshiftResource.is_controller_managed_label(body["kind"], label)
+            for label in labels
+        ):
+            metadata["labels"] = {
+                k: v
+                for k, v in labels.items()
+                if not OpenshiftResource.is_controller_managed_label(body["kind"], k)
+            }
 
         # Default fields for specific resource types
         # ConfigMaps and Secrets are by default Opaque
@@ -395,17 +427,18 @@ class OpenshiftResource:
         if body["kind"] == "Secret":
             string_data = body.pop("stringData", None)
             if string_data:
-                body.setdefault("data", {})
+                data = body["data"] = dict(body.get("data", {}))
                 for k, v in string_data.items():
                     v = base64.b64encode(str(v).encode()).decode("utf-8")
-                    body["data"][k] = v
+                    data[k] = v
 
         if body["kind"] == "Deployment":
             annotations.pop("deployment.kubernetes.io/revision", None)
 
         if body["kind"] == "Route":
-            if body["spec"].get("wildcardPolicy") == "None":
-                body["spec"].pop("wildcardPolicy")
+            spec = body["spec"] = dict(body["spec"])
+            if spec.get("wildcardPolicy") == "None":
+                spec.pop("wildcardPolicy")
             # remove tls-acme specific params from Route
             if "kubernetes.io/tls-acme" in annotations:
                 annotations.pop(
@@ -414,13 +447,13 @@ class OpenshiftResource:
                 annotations.pop(
                     "kubernetes.io/tls-acme-awaiting-authorization-at-url", None
                 )
-                if "tls" in body["spec"]:
-                    tls = body["spec"]["tls"]
+                if "tls" in spec:
+                    tls = spec["tls"] = dict(spec["tls"])
                     tls.pop("key", None)
                     tls.pop("certificate", None)
-            subdomain = body["spec"].get("subdomain", None)
+            subdomain = spec.get("subdomain", None)
             if subdomain == "":
-                body["spec"].pop("subdomain", None)
+                spec.pop("subdomain", None)
 
         if body["kind"] == "ServiceAccount":
             if "imagePullSecrets" in body:
@@ -436,12 +469,13 @@ class OpenshiftResource:
                 body.pop("secrets")
 
         if body["kind"] == "Role":
-            for rule in body["rules"]:
+            rules = body["rules"] = [dict(rule) for rule in body["rules"]]
+            for rule in rules:
                 if "resources" in rule:
-                    rule["resources"].sort()
+                    rule["resources"] = sorted(rule["resources"])
 
                 if "verbs" in rule:
-                    rule["verbs"].sort()
+                    rule["verbs"] = sorted(rule["verbs"])
 
                 if (
                     "attributeRestrictions" in rule
@@ -461,14 +495,15 @@ class OpenshiftResource:
             if "userNames" in body:
                 body.pop("userNames")
             if "roleRef" in body:
-                roleRef = body["roleRef"]
+                roleRef = body["roleRef"] = dict(body["roleRef"])
                 if "namespace" in roleRef:
                     roleRef.pop("namespace")
                 if "apiGroup" in roleRef and roleRef["apiGroup"] in body["apiVersion"]:
                     roleRef.pop("apiGroup")
                 if "kind" in roleRef:
                     roleRef.pop("kind")
-            for subject in body["subjects"]:
+            subjects = body["subjects"] = [dict(s) for s in body["subjects"]]
+            for subject in subjects:
                 if "namespace" in subject:
                     subject.pop("namespace")
                 if "apiGroup" in subject and (
@@ -487,7 +522,7 @@ class OpenshiftResource:
             if "userNames" in body:
                 body.pop("userNames")
             if "roleRef" in body:
-                roleRef = body["roleRef"]
+                roleRef = body["roleRef"] = dict(body["roleRef"])
                 if "apiGroup" in roleRef and roleRef["apiGroup"] in body["apiVersion"]:
                     roleRef.pop("apiGroup")
                 if "kind" in roleRef:
@@ -495,7 +530,7 @@ class OpenshiftResource:
             if "groupNames" in body:
                 body.pop("groupNames")
         if body["kind"] == "Service":
-            spec = body["spec"]
+            spec = body["spec"] = dict(body["spec"])
             if spec.get("sessionAffinity") == "None":
                 spec.pop("sessionAffinity")
             if spec.get("type") == "ClusterIP":
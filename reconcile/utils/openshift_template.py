@@ -0,0 +1,200 @@
+"""
+Processing of OpenShift templates, equivalent to
+`oc process --local --ignore-unknown-parameters -f - KEY=VALUE ...`
+
+This follows the template processor of OpenShift (library-go
+pkg/template/templateprocessing), without forking the `oc` binary.
+"""
+import json
+import random
+import re
+from collections.abc import Mapping
+from typing import (
+    Any,
+    Optional,
+)
+
+# ${PARAM} can be used anywhere within a string, ${{PARAM}} has to be the
+# whole string and replaces it with the (JSON decoded) parameter value
+STRING_PARAMETER_RE = re.compile(r"\$\{([a-zA-Z0-9\_]+?)\}")
+NON_STRING_PARAMETER_RE = re.compile(r"\$\{\{([a-zA-Z0-9\_]+)\}\}")
+
+GENERATOR_EXPRESSION = "expression"
+_ALPHABET = "abcdefghijklmnopqrstuvwxyz"
+_NUMERALS = "0123456789"
+_SYMBOLS = "~!@#$%^&*()-_+={}[]\\|<,>.?/\"';:`"
+_ASCII = _ALPHABET + _ALPHABET.upper() + _NUMERALS + _SYMBOLS
+_GENERATOR_RE = re.compile(r"\[([a-zA-Z0-9\-\\]+)\](\{(\w+)\})")
+_EXPRESSION_RE = re.compile(r"\[(\\w|\\d|\\a|\\A)|([a-zA-Z0-9]\-[a-zA-Z0-9])+\]")
+_RANGE_RE = re.compile(r"([\\]?[a-zA-Z0-9]\-?[a-zA-Z0-9]?)")
+
+_random = random.SystemRandom()
+
+
+class TemplateProcessingError(Exception):
+    pass
+
+
+def _alphabet(expression: str) -> str:
+    alphabet = ""
+    for r in _RANGE_RE.findall(expression):
+        first, last = r[0], r[-1]
+        if first + last == "\\w":
+            alphabet += _ALPHABET + _ALPHABET.upper() + _NUMERALS + "_"
+        elif first + last == "\\d":
+            alphabet += _NUMERALS
+        elif first + last == "\\a":
+            alphabet += _ALPHABET + _ALPHABET.upper()
+        elif first + last == "\\A":
+            alphabet += _SYMBOLS
+        else:
+            left, right = _ASCII.find(first), _ASCII.rfind(last)
+            if left < 0 or left > right:
+                raise TemplateProcessingError(f"invalid range specified: {r}")
+            alphabet += _ASCII[left : right + 1]
+    # remove duplicates, keep order
+    return "".join(dict.fromkeys(alphabet))
+
+
+def generate_value(expression: str) -> str:
+    """Generate a random value from an expression like `[a-zA-Z0-9]{12}`."""
+    while match := _GENERATOR_RE.search(expression):
+        ranges, length = match.group(1), int(match.group(3))
+        if not _EXPRESSION_RE.search(f"[{ranges}]"):
+            raise TemplateProcessingError(
+                f"malformed expression syntax: {match.group(0)}"
+            )
+        if not 0 < length <= 255:
+            raise TemplateProcessingError(
+                f"range must be within [1-255] characters ({length})"
+            )
+        alphabet = _alphabet(ranges)
+        generated = "".join(_random.choice(alphabet) for _ in range(length))
+        expression = expression.replace(match.group(0), generated, 1)
+    return expression
+
+
+def _parameter_values(
+    template: Mapping[str, Any], parameters: Mapping[str, Any]
+) -> dict[str, str]:
+    values = {}
+    errors = []
+    for i, parameter in enumerate(template.get("parameters") or []):
+        name = parameter["name"]
+        generate = parameter.get("generate")
+        passed = f"{parameters[name]}" if name in parameters else None
+        # `oc process` treats an empty value of a generated parameter as unset
+        if passed is not None and (passed or not generate):
+            # same as passing KEY=VALUE on the command line
+            value = passed
+            generate = None
+        else:
+            value = parameter.get("value") or ""
+            if not isinstance(value, str):
+                value = f"{value}"
+
+        if not value and generate:
+            if generate != GENERATOR_EXPRESSION:
+                errors.append(
+                    f"template.parameters[{i}]: Invalid value: {generate!r}: "
+                    "Unknown generator name"
+                )
+                continue
+            if not parameter.get("from"):
+                errors.append(
+                    f"template.parameters[{i}].from: Required value: "
+                    "from is required for generated parameters"
+                )
+                continue
+            value = generate_value(parameter["from"])
+
+        if not value and parameter.get("required"):
+            errors.append(
+                f"template.parameters[{i}]: Required value: template.parameters[{i}]: "
+                f"parameter {name} is required and must be specified"
+            )
+        values[name] = value
+
+    if errors:
+        raise TemplateProcessingError(
+            "unable to process template\n" + "\n".join(f"  {e}" for e in errors)
+        )
+    return values
+
+
+def substitute(value: str, values: Mapping[str, str]) -> Any:
+    """Substitute parameter references in a single string value."""
+    match = NON_STRING_PARAMETER_RE.fullmatch(value)
+    if match and match.group(1) in values:
+        result = values[match.group(1)]
+        try:
+            return json.loads(result, parse_constant=_reject_constant)
+        except ValueError:
+            # not a JSON value, i.e. an unquoted string
+            return result
+
+    result = value
+    for match in STRING_PARAMETER_RE.finditer(value):
+        if match.group(1) in values:
+            result = result.replace(match.group(0), values[match.group(1)], 1)
+    return result
+
+
+def _reject_constant(constant: str) -> Any:
+    # Go's JSON decoder does not know NaN and Infinity
+    raise ValueError(constant)
+
+
+def _substitute_string(value: str, values: Mapping[str, str]) -> str:
+    result = substitute(value, values)
+    return result if isinstance(result, str) else value
+
+
+def _visit(obj: Any, values: Mapping[str, str]) -> Any:
+    if isinstance(obj, str):
+        return substitute(obj, values)
+    if isinstance(obj, dict):
+        return {
+            _substitute_string(k, values)
+            if isinstance(k, str)
+            else k: _visit(v, values)
+            for k, v in obj.items()
+        }
+    if isinstance(obj, list):
+        return [_visit(v, values) for v in obj]
+    return obj
+
+
+def process_template(
+    template: Mapping[str, Any], parameters: Optional[Mapping[str, Any]] = None
+) -> list[dict[str, Any]]:
+    """Process an OpenShift template and return the resulting objects.
+
+    Parameters that are not part of the template are ignored.
+    """
+    values = _parameter_values(template, parameters or {})
+
+    labels = {
+        _substitute_string(k, values): _substitute_string(v, values)
+        for k, v in (template.get("labels") or {}).items()
+    }
+
+    items = []
+    for obj in template.get("objects") or []:
+        # hardcoded namespaces are stripped, parameterized ones are kept
+        namespace = (obj.get("metadata") or {}).get("namespace")
+        strip_namespace = bool(namespace) and not (
+            isinstance(namespace, str) and STRING_PARAMETER_RE.search(namespace)
+        )
+
+        item = _visit(obj, values)
+        metadata = item.get("metadata")
+        if strip_namespace and metadata:
+            metadata.pop("namespace", None)
+        if labels:
+            if metadata is None:
+                metadata = item["metadata"] = {}
+            metadata["labels"] = {**(metadata.get("labels") or {}), **labels}
+        items.append(item)
+
+    return items
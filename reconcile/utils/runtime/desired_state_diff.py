@@ -1,3 +1,5 @@
+import hashlib
+import json
 import logging
 import multiprocessing
 from dataclasses import dataclass
@@ -9,6 +11,7 @@ from typing import (
     Optional,
 )
 
+import jsonpath_ng
 from deepdiff import DeepHash
 from jsonpath_ng.ext.parser import parse
 
@@ -17,7 +20,11 @@ from reconcile.change_owners.diff import (
     DiffType,
     extract_diffs,
 )
-from reconcile.utils.jsonpath import apply_constraint_to_path
+from reconcile.utils.jsonpath import (
+    apply_constraint_to_path,
+    jsonpath_parts,
+    parse_jsonpath,
+)
 from reconcile.utils.runtime.integration import (
     DesiredStateShardConfig,
     ShardedRunProposal,
@@ -85,6 +92,143 @@ def find_changed_shards(
     return affected_shards
 
 
+def _shard_selector_steps(selector: str) -> Optional[list[Optional[str]]]:
+    """
+    Splits a shard path selector into field names and `None` for `[*]`.
+    Returns `None` for selectors using any other JSONPath feature.
+    """
+    steps: list[Optional[str]] = []
+    for part in jsonpath_parts(parse_jsonpath(selector), ignore_root=True):
+        if (
+            isinstance(part, jsonpath_ng.Fields)
+            and len(part.fields) == 1
+            and part.fields[0] != "*"
+        ):
+            steps.append(part.fields[0])
+        elif isinstance(part, jsonpath_ng.Slice) and (
+            part.start is None and part.end is None and part.step is None
+        ):
+            steps.append(None)
+        else:
+            return None
+    return steps
+
+
+def _digest(*parts: Any) -> str:
+    return hashlib.sha256(
+        json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+_MISSING = object()
+
+
+def _follow(node: Any, fields: list[Optional[str]]) -> Any:
+    for field in fields:
+        if not isinstance(node, Mapping) or field not in node:
+            return _MISSING
+        node = node[field]
+    return node
+
+
+def _without(node: Any, fields: list[Optional[str]]) -> Any:
+    """Returns a shallow copy of `node` without the value at `fields`."""
+    if not fields or not isinstance(node, Mapping) or fields[0] not in node:
+        return node
+    if len(fields) == 1:
+        return {k: v for k, v in node.items() if k != fields[0]}
+    return {**node, fields[0]: _without(node[fields[0]], fields[1:])}
+
+
+def _without_keys(data: Mapping[str, Any], keys: set[Optional[str]]) -> dict:
+    return {k: v for k, v in data.items() if k not in keys}
+
+
+def _partition_by_shard(
+    node: Any,
+    steps: list[Optional[str]],
+    context: str,
+    partitions: dict[Any, list[str]],
+) -> None:
+    """
+    Adds the digests of the data in `node` that belongs to a shard to
+    `partitions`.
+
+    Every list element selected by a `[*]` is hashed together with the digest
+    of its parents (without the list), so changes to a parent affect all the
+    shards below it, like in a Merkle tree.
+    """
+    if None not in steps:
+        shard = _follow(node, steps)
+        if shard is not _MISSING and not isinstance(shard, (Mapping, list)):
+            partitions.setdefault(shard, []).append(_digest(context, node))
+        return
+
+    wildcard = steps.index(None)
+    elements = _follow(node, steps[:wildcard])
+    if not isinstance(elements, list):
+        return
+    element_context = _digest(context, _without(node, steps[:wildcard]))
+    for element in elements:
+        _partition_by_shard(element, steps[wildcard + 1 :], element_context, partitions)
+
+
+def _shard_digests(
+    desired_state: Mapping[str, Any],
+    selectors: Mapping[str, list[Optional[str]]],
+) -> dict[Any, str]:
+    partitions: dict[Any, list[str]] = {}
+    for selector, steps in selectors.items():
+        elements = _follow(desired_state, steps[:1])
+        if elements is _MISSING:
+            continue
+        # only the top level key of a selector is relevant for its shards
+        _partition_by_shard({steps[0]: elements}, steps, _digest(selector), partitions)
+    return {shard: _digest(sorted(digests)) for shard, digests in partitions.items()}
+
+
+class ShardDetectionNotSupported(Exception):
+    """
+    Raised when the shards can't be derived from shard digests.
+    """
+
+
+def find_changed_shards_by_digest(
+    previous_desired_state: Mapping[str, Any],
+    current_desired_state: Mapping[str, Any],
+    sharding_config: DesiredStateShardConfig,
+) -> set[str]:
+    """
+    Finds the affected desired state shards by partitioning both desired
+    states by the shard path selectors of the `DesiredStateShardConfig` and
+    comparing the digests of each shard. This is linear in the size of the
+    desired states.
+
+    Raises `ShardDetectionNotSupported` if a selector is not made of fields
+    and `[*]` only, or if data outside of all selectors changed.
+    """
+    selectors = {}
+    for selector in sharding_config.shard_path_selectors:
+        steps = _shard_selector_steps(selector)
+        if not steps:
+            raise ShardDetectionNotSupported(f"unsupported selector {selector}")
+        selectors[selector] = steps
+
+    top_level_keys = {steps[0] for steps in selectors.values()}
+    if _without_keys(previous_desired_state, top_level_keys) != _without_keys(
+        current_desired_state, top_level_keys
+    ):
+        raise ShardDetectionNotSupported("data outside of the shards changed")
+
+    previous_shards = _shard_digests(previous_desired_state, selectors)
+    current_shards = _shard_digests(current_desired_state, selectors)
+    return {
+        shard
+        for shard in previous_shards.keys() | current_shards.keys()
+        if previous_shards.get(shard) != current_shards.get(shard)
+    }
+
+
 EXTRACT_TASK_RESULT_KEY_DIFFS = "diffs"
 EXTRACT_TASK_RESULT_KEY_ERROR = "error"
 
@@ -182,6 +326,29 @@ def extract_diffs_with_timeout(
     raise DiffDetectionFailure("unknown error during fine grained diff detection")
 
 
+def _find_changed_shards_by_diffs(
+    previous_desired_state: Mapping[str, Any],
+    current_desired_state: Mapping[str, Any],
+    sharding_config: DesiredStateShardConfig,
+    timeout_seconds: int,
+) -> set[str]:
+    """
+    Finds the affected desired state shards based on fine grained diffs.
+    """
+    diffs = extract_diffs_with_timeout(
+        extraction_function=extract_diffs,
+        previous_desired_state=previous_desired_state,
+        current_desired_state=current_desired_state,
+        timeout_seconds=timeout_seconds,
+    )
+    return find_changed_shards(
+        diffs=diffs,
+        previous_desired_state=previous_desired_state,
+        current_desired_state=current_desired_state,
+        sharding_config=sharding_config,
+    )
+
+
 def build_desired_state_diff(
     sharding_config: Optional[DesiredStateShardConfig],
     previous_desired_state: Mapping[str, Any],
@@ -203,19 +370,20 @@ def build_desired_state_diff(
     exract_diff_timeout_seconds = 10
     try:
         if desired_state_diff_found and sharding_config:
-            # detect shards based on fine grained diffs
-            diffs = extract_diffs_with_timeout(
-                extraction_function=extract_diffs,
-                previous_desired_state=previous_desired_state,
-                current_desired_state=current_desired_state,
-                timeout_seconds=exract_diff_timeout_seconds,
-            )
-            changed_shards = find_changed_shards(
-                diffs=diffs,
-                previous_desired_state=previous_desired_state,
-                current_desired_state=current_desired_state,
-                sharding_config=sharding_config,
-            )
+            try:
+                changed_shards = find_changed_shards_by_digest(
+                    previous_desired_state=previous_desired_state,
+                    current_desired_state=current_desired_state,
+                    sharding_config=sharding_config,
+                )
+            except ShardDetectionNotSupported as e:
+                logging.info(f"unable to compare shard digests: {e}")
+                changed_shards = _find_changed_shards_by_diffs(
+                    previous_desired_state=previous_desired_state,
+                    current_desired_state=current_desired_state,
+                    sharding_config=sharding_config,
+                    timeout_seconds=exract_diff_timeout_seconds,
+                )
             if changed_shards:
                 # let the integration decide if the sharding proposal is fine
                 if sharding_config.sharded_run_review(
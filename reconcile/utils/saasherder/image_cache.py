@@ -0,0 +1,142 @@
+import hashlib
+import os
+import threading
+import time
+from collections.abc import Callable
+from typing import Optional
+
+from reconcile.utils import metrics
+from reconcile.utils.cache_helpers import SingleFlight
+from reconcile.utils.saasherder.models import ImageAuth
+
+SAASHERDER_IMAGE_CACHE_TTL = int(os.environ.get("SAASHERDER_IMAGE_CACHE_TTL", 600))
+SAASHERDER_IMAGE_CACHE_NEGATIVE_TTL = int(
+    os.environ.get("SAASHERDER_IMAGE_CACHE_NEGATIVE_TTL", 60)
+)
+
+
+def _is_digest_reference(image: str) -> bool:
+    return "@sha256:" in image
+
+
+class ImageExistenceCache:
+    """Thread-safe cache for image existence lookups.
+
+    Results are keyed by image reference and the credentials used to look
+    them up. Images referenced by digest never change, so once found they
+    stay cached. Tags can be moved or deleted and are cached for `ttl`
+    seconds, missing images for `negative_ttl` seconds. Lookups raising
+    an exception are not cached.
+
+    Concurrent lookups of the same key are only done once, all other
+    callers wait for the result.
+    """
+
+    def __init__(
+        self,
+        ttl: int = SAASHERDER_IMAGE_CACHE_TTL,
+        negative_ttl: int = SAASHERDER_IMAGE_CACHE_NEGATIVE_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (exists, expiry), expiry None means the entry never expires
+        self._values: dict[tuple[str, ...], tuple[bool, Optional[float]]] = {}
+        self._single_flight = SingleFlight(self._lock)
+
+    @staticmethod
+    def _key(image: str, image_auth: ImageAuth) -> tuple[str, ...]:
+        # do not keep credentials around in plain text
+        password = hashlib.sha256((image_auth.password or "").encode()).hexdigest()
+        return (
+            image,
+            image_auth.username or "",
+            image_auth.auth_server or "",
+            password,
+        )
+
+    def _cached(self, key: tuple[str, ...]) -> Optional[bool]:
+        entry = self._values.get(key)
+        if entry is None:
+            return None
+        exists, expiry = entry
+        if expiry is not None and expiry <= self._clock():
+            del self._values[key]
+            return None
+        return exists
+
+    def exists(
+        self,
+        image: str,
+        image_auth: ImageAuth,
+        lookup: Callable[[], bool],
+        integration: str = "",
+    ) -> bool:
+        """Return whether `image` exists, `lookup` asks the registry."""
+        key = self._key(image, image_auth)
+
+        def cached() -> Optional[bool]:
+            exists = self._cached(key)
+            if exists is not None:
+                metrics.image_existence_cache_hits.labels(integration=integration).inc()
+            return exists
+
+        def lookup_and_store() -> bool:
+            metrics.image_existence_cache_misses.labels(integration=integration).inc()
+            exists = bool(lookup())
+            if not exists:
+                expiry: Optional[float] = self._clock() + self.negative_ttl
+            elif _is_digest_reference(image):
+                expiry = None
+            else:
+                expiry = self._clock() + self.ttl
+            with self._lock:
+                self._values[key] = (exists, expiry)
+            return exists
+
+        return self._single_flight.get(key, cached, lookup_and_store)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class ImageDigestCache:
+    """Thread-safe cache for image digest lookups of a single run.
+
+    Tags can be moved at any time, so digests are only cached for the
+    lifetime of the cache, which is meant to be created per run. Many
+    targets share the same images, each image is looked up only once.
+    Lookups raising an exception are not cached.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], str] = {}
+        self._single_flight = SingleFlight(self._lock)
+
+    def digest(
+        self,
+        image: str,
+        image_auth: ImageAuth,
+        lookup: Callable[[], str],
+    ) -> str:
+        """Return the digest of `image`, `lookup` asks the registry."""
+        key = ImageExistenceCache._key(image, image_auth)
+
+        def lookup_and_store() -> str:
+            digest = lookup()
+            with self._lock:
+                self._values[key] = digest
+            return digest
+
+        return self._single_flight.get(
+            key, lambda: self._values.get(key), lookup_and_store
+        )
+
+
+# shared by all SaasHerder instances of a process, the same images are
+# checked for many targets and in every run of an integration
+image_existence_cache = ImageExistenceCache()
@@ -201,3 +201,4 @@ class TargetSpec:
     parameters: dict[str, str]
     github: Github
     target_config_hash: str
+    state_key: str
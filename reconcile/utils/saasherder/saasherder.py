@@ -22,7 +22,6 @@ from typing import (
     Union,
 )
 
-import yaml
 from github import (
     Github,
     GithubException,
@@ -57,6 +56,10 @@ from reconcile.utils.promotion_state import (
     PromotionData,
     PromotionState,
 )
+from reconcile.utils.saasherder.image_cache import (
+    ImageDigestCache,
+    image_existence_cache,
+)
 from reconcile.utils.saasherder.interfaces import (
     HasParameters,
     HasSecretParameters,
@@ -81,10 +84,16 @@ from reconcile.utils.saasherder.models import (
     TriggerTypes,
     UpstreamJob,
 )
+from reconcile.utils.saasherder.template_cache import (
+    SAASHERDER_TEMPLATE_CACHE_DIR,
+    TemplateCache,
+)
 from reconcile.utils.secret_reader import SecretReaderBase
 from reconcile.utils.state import State
 
 TARGET_CONFIG_HASH = "target_config_hash"
+# state prefix of the inputs of the last deployment of each target
+DEPLOYMENT_STATE_PREFIX = "deployments"
 
 
 UNIQUE_SAAS_FILE_ENV_COMBO_LEN = 50
@@ -117,6 +126,7 @@ class SaasHerder:  # pylint: disable=too-many-public-methods
         state: Optional[State] = None,
         validate: bool = False,
         include_trigger_trace: bool = False,
+        incremental: bool = False,
     ):
         self.error_registered = False
         self.saas_files = saas_files
@@ -138,6 +148,8 @@ class SaasHerder:  # pylint: disable=too-many-public-methods
         self.include_trigger_trace = include_trigger_trace
         self.state = state
         self._promotion_state = PromotionState(state=state) if state else None
+        self._template_cache = TemplateCache(SAASHERDER_TEMPLATE_CACHE_DIR)
+        self._image_digest_cache = ImageDigestCache()
 
         # each namespace is in fact a target,
         # so we can use it to calculate.
@@ -151,6 +163,11 @@ class SaasHerder:  # pylint: disable=too-many-public-methods
         self.compare = self._get_saas_file_feature_enabled("compare", default=True)
         self.publish_job_logs = self._get_saas_file_feature_enabled("publish_job_logs")
         self.cluster_admin = self._get_saas_file_feature_enabled("cluster_admin")
+        # targets whose inputs did not change since the last deployment are
+        # not rendered again. unrendered resources are taken from the current
+        # state, which only works out if resources are compared before applying.
+        self.incremental = incremental and self.compare and state is not None
+        self._deployment_states: dict[str, dict[str, Any]] = {}
 
     def __enter__(self) -> "SaasHerder":
         return self
@@ -730,21 +747,28 @@ class SaasHerder:  # pylint: disable=too-many-public-methods
     ) -> tuple[Any, str, str]:
         html_url = f"{url}/blob/{ref}{path}"
         commit_sha = self._get_commit_sha(url, ref, github)
+        content = self._template_cache.file_contents(
+            url,
+            path,
+            commit_sha,
+            lambda: self._fetch_file_contents(url, path, commit_sha, github),
+        )
+        return content, html_url, commit_sha
 
+    def _fetch_file_contents(
+        self, url: str, path: str, commit_sha: str, github: Github
+    ) -> str:
         if "github" in url:
             repo_name = url.rstrip("/").replace("https://github.com/", "")
             repo = github.get_repo(repo_name)
-            content = self._get_file_contents_github(repo, path, commit_sha)
-        elif "gitlab" in url:
+            return self._get_file_contents_github(repo, path, commit_sha)
+        if "gitlab" in url:
             if not self.gitlab:
                 raise Exception("gitlab is not initialized")
             project = self.gitlab.get_project(url)
             f = project.files.get(file_path=path.lstrip("/"), ref=commit_sha)
-            content = f.decode()
-        else:
-            raise Exception(f"Only GitHub and GitLab are supported: {url}")
-
-        return yaml.safe_load(content), html_url, commit_sha
+            return f.decode().decode("utf8")
+        raise Exception(f"Only GitHub and GitLab are supported: {url}")
 
     @retry()
     def _get_directory_contents(
@@ -752,7 +776,18 @@ class SaasHerder:  # pylint: disable=too-many-public-methods
     ) -> tuple[list[Any], str, str]:
         html_url = f"{url}/tree/{ref}{path}"
         commit_sha = self._get_commit_sha(url, ref, github)
-        resources = []
+        resources = self._template_cache.directory_contents(
+            url,
+            path,
+            commit_sha,
+            lambda: self._fetch_directory_contents(url, path, commit_sha, github),
+        )
+        return resources, html_url, commit_sha
+
+    def _fetch_directory_contents(
+        self, url: str, path: str, commit_sha: str, github: Github
+    ) -> list[str]:
+        contents = []
         if "github" in url:
             repo_name = url.rstrip("/").replace("https://github.com/", "")
             repo = github.get_repo(repo_name)
@@ -761,11 +796,9 @@ class SaasHerder:  # pylint: disable=too-many-public-methods
                 raise Exception(f"Path {path} and sha {commit_sha} is a file!")
             for f in directory:
                 file_path = os.path.join(path, f.name)
-                file_contents_decoded = self._get_file_contents_github(
-                    repo, file_path, commit_sha
+                contents.append(
+                    self._get_file_contents_github(repo, file_path, commit_sha)
                 )
-                resource = yaml.safe_load(file_contents_decoded)
-                resources.append(resource)
         elif "gitlab" in url:
             if not self.gitlab:
                 raise Exception("gitlab is not initialized")
@@ -776,15 +809,21 @@ class SaasHerder:  # pylint: disable=too-many-public-methods
                 file_contents = project.files.get(
                     file_path=item["path"], ref=commit_sha
                 )
-                resource = yaml.safe_load(file_contents.decode())
-                resources.append(resource)
+                contents.append(file_contents.decode().decode("utf8"))
         else:
             raise Exception(f"Only GitHub and GitLab are supported: {url}")
 
-        return resources, html_url, commit_sha
+        return contents
 
-    @retry()
     def _get_commit_sha(self, url: str, ref: str, github: Github) -> str:
+        if is_commit_sha(ref):
+            return ref
+        return self._template_cache.commit_sha(
+            url, ref, lambda: self._resolve_commit_sha(url, ref, github)
+        )
+
+    @retry()
+    def _resolve_commit_sha(self, url: str, ref: str, github: Github) -> str:
         commit_sha = ""
         if "github" in url:
             repo_name = url.rstrip("/").replace("https://github.com/", "")
@@ -844,6 +883,37 @@ class SaasHerder:  # pylint: disable=too-many-public-methods
                 return True
         return False
 
+    def _consolidate_target_parameters(
+        self, target: SaasResourceTemplateTarget, parameters: dict[str, str]
+    ) -> dict[str, str]:
+        environment_parameters = self._collect_parameters(target.namespace.environment)
+        environment_secret_parameters = self._collect_secret_parameters(
+            target.namespace.environment
+        )
+        target_parameters = self._collect_parameters(target)
+        target_secret_parameters = self._collect_secret_parameters(target)
+
+        consolidated_parameters = {}
+        consolidated_parameters.update(environment_parameters)
+        consolidated_parameters.update(environment_secret_parameters)
+        consolidated_parameters.update(parameters)
+        consolidated_parameters.update(target_parameters)
+        consolidated_parameters.update(target_secret_parameters)
+
+        for replace_key, replace_value in consolidated_parameters.items():
+            if not isinstance(replace_value, str):
+                continue
+            replace_pattern = "${" + replace_key + "}"
+            for k, v in consolidated_parameters.items():
+                if not isinstance(v, str):
+                    continue
+                if replace_pattern in v:
+                    consolidated_parameters[k] = v.replace(
+                        replace_pattern, replace_value
+                    )
+
+        return consolidated_parameters
+
     def _process_template(
         self,
         saas_file_name: str,
@@ -859,33 +929,9 @@ class SaasHerder:  # pylint: disable=too-many-public-methods
         target_config_hash: str,
     ) -> tuple[list[Any], str, Optional[Promotion]]:
         if provider == "openshift-template":
-            environment_parameters = self._collect_parameters(
-                target.namespace.environment
-            )
-            environment_secret_parameters = self._collect_secret_parameters(
-                target.namespace.environment
+            consolidated_parameters = self._consolidate_target_parameters(
+                target, parameters
             )
-            target_parameters = self._collect_parameters(target)
-            target_secret_parameters = self._collect_secret_parameters(target)
-
-            consolidated_parameters = {}
-            consolidated_parameters.update(environment_parameters)
-            consolidated_parameters.update(environment_secret_parameters)
-            consolidated_parameters.update(parameters)
-            consolidated_parameters.update(target_parameters)
-            consolidated_parameters.update(target_secret_parameters)
-
-            for replace_key, replace_value in consolidated_parameters.items():
-                if not isinstance(replace_value, str):
-                    continue
-                replace_pattern = "${" + replace_key + "}"
-                for k, v in consolidated_parameters.items():
-                    if not isinstance(v, str):
-                        continue
-                    if replace_pattern in v:
-                        consolidated_parameters[k] = v.replace(
-                            replace_pattern, replace_value
-                        )
 
             try:
                 template, html_url, commit_sha = self._get_file_contents(
@@ -986,19 +1032,30 @@ class SaasHerder:  # pylint: disable=too-many-public-methods
                 + f"unknown provider: {provider}"
             )
 
-        target_promotion = None
-        if target.promotion:
-            target_promotion = Promotion(
-                auto=target.promotion.auto,
-                publish=target.promotion.publish,
-                subscribe=target.promotion.subscribe,
-                promotion_data=target.promotion.promotion_data,
-                commit_sha=commit_sha,
-                saas_file=saas_file_name,
-                target_config_hash=target_config_hash,
-            )
+        target_promotion = self._build_promotion(
+            saas_file_name, target, commit_sha, target_config_hash
+        )
         return resources, html_url, target_promotion
 
+    @staticmethod
+    def _build_promotion(
+        saas_file_name: str,
+        target: SaasResourceTemplateTarget,
+        commit_sha: str,
+        target_config_hash: str,
+    ) -> Optional[Promotion]:
+        if not target.promotion:
+            return None
+        return Promotion(
+            auto=target.promotion.auto,
+            publish=target.promotion.publish,
+            subscribe=target.promotion.subscribe,
+            promotion_data=target.promotion.promotion_data,
+            commit_sha=commit_sha,
+            saas_file=saas_file_name,
+            target_config_hash=target_config_hash,
+        )
+
     @staticmethod
     def _collect_images(resource: Resource) -> set[str]:
         images = set()
@@ -1033,8 +1090,8 @@ class SaasHerder:  # pylint: disable=too-many-public-methods
 
         return images
 
-    @staticmethod
     def _check_image(
+        self,
         image: str,
         image_patterns: Iterable[str],
         image_auth: ImageAuth,
@@ -1050,11 +1107,18 @@ class SaasHerder:  # pylint: disable=too-many-public-methods
             error = True
             logging.error(f"{error_prefix} Image is not in imagePatterns: {image}")
         try:
-            valid = Image(
+            valid = image_existence_cache.exists(
                 image,
-                username=image_auth.username,
-                password=image_auth.password,
-                auth_server=image_auth.auth_server,
+                image_auth,
+                lambda: bool(
+                    Image(
+                        image,
+                        username=image_auth.username,
+                        password=image_auth.password,
+                        auth_server=image_auth.auth_server,
+                    )
+                ),
+                integration=self.integration,
             )
             if not valid:
                 error = True
@@ -1221,6 +1285,7 @@ class SaasHerder:  # pylint: disable=too-many-public-methods
                         parameters=consolidated_parameters,
                         github=github,
                         target_config_hash=digest,
+                        state_key=state_key,
                         # check_image options
                         image_patterns=saas_file.image_patterns,
                     )
@@ -1235,6 +1300,16 @@ class SaasHerder:  # pylint: disable=too-many-public-methods
             # to delete resources, we avoid adding them to the desired state
             return None
 
+        if self.incremental:
+            commit_sha = self._populate_unchanged_target(spec, ri)
+            if commit_sha:
+                return self._build_promotion(
+                    spec.saas_file_name,
+                    spec.target,
+                    commit_sha,
+                    spec.target_config_hash,
+                )
+
         try:
             resources, html_url, promotion = self._process_template(
                 saas_file_name=spec.saas_file_name,
@@ -1291,6 +1366,7 @@ class SaasHerder:  # pylint: disable=too-many-public-methods
             ri.register_error()
             return None
         # add desired resources
+        oc_resources = []
         for resource in resources:
             oc_resource = OR(
                 resource,
@@ -1306,6 +1382,7 @@ class SaasHerder:  # pylint: disable=too-many-public-methods
                     oc_resource,
                     privileged=spec.privileged,
                 )
+                oc_resources.append(oc_resource)
             except ResourceKeyExistsError:
                 ri.register_error()
                 msg = (
@@ -1317,8 +1394,176 @@ class SaasHerder:  # pylint: disable=too-many-public-methods
                 )
                 logging.error(msg)
 
+        if self.incremental:
+            self._record_deployment_state(spec, ri, resources, oc_resources)
+
         return promotion
 
+    def _target_fingerprint(self, spec: TargetSpec) -> tuple[str, str]:
+        """Return the commit sha and a digest of all inputs of a target."""
+        commit_sha = self._get_commit_sha(spec.url, spec.target.ref, spec.github)
+        parameters = (
+            self._consolidate_target_parameters(spec.target, spec.parameters)
+            if spec.provider == "openshift-template"
+            else {}
+        )
+        inputs = {
+            "integration_version": self.integration_version,
+            "target_config_hash": spec.target_config_hash,
+            "commit_sha": commit_sha,
+            "provider": spec.provider,
+            "hash_length": spec.hash_length,
+            "parameters": parameters,
+            "image_patterns": spec.image_patterns,
+            "privileged": spec.privileged,
+            "use_channel_in_image_tag": self._get_saas_file_feature_enabled(
+                "use_channel_in_image_tag"
+            ),
+        }
+        m = hashlib.sha256()
+        m.update(json.dumps(inputs, sort_keys=True, default=str).encode("utf-8"))
+        return commit_sha, m.hexdigest()
+
+    def _image_digests(
+        self, images: Iterable[str], image_auth: ImageAuth
+    ) -> dict[str, str]:
+        digests = {}
+        for image in images:
+            if "@" in image:
+                # referenced by digest already
+                digests[image] = image.split("@", 1)[1]
+                continue
+            digests[image] = self._image_digest_cache.digest(
+                image,
+                image_auth,
+                lambda: Image(
+                    image,
+                    username=image_auth.username,
+                    password=image_auth.password,
+                    auth_server=image_auth.auth_server,
+                ).digest,
+            )
+        return digests
+
+    @staticmethod
+    def _resource_type(
+        ri: ResourceInventory, cluster: str, namespace: str, resource: OR
+    ) -> str:
+        # same as ResourceInventory.add_desired_resource
+        if ri.get_desired_by_type(cluster, namespace, resource.kind_and_group) is None:
+            return resource.kind
+        return resource.kind_and_group
+
+    def _record_deployment_state(
+        self,
+        spec: TargetSpec,
+        ri: ResourceInventory,
+        resources: Resources,
+        oc_resources: Iterable[OR],
+    ) -> None:
+        try:
+            _, fingerprint = self._target_fingerprint(spec)
+            images = set(
+                itertools.chain.from_iterable(map(self._collect_images, resources))
+            )
+            image_digests = self._image_digests(images, spec.image_auth)
+        except Exception as e:
+            logging.warning(
+                f"[{spec.saas_file_name}/{spec.resource_template_name}] "
+                + f"unable to record inputs of {spec.cluster}/{spec.namespace}: {e}"
+            )
+            return
+
+        self._deployment_states[spec.state_key] = {
+            "fingerprint": fingerprint,
+            "images": image_digests,
+            "resources": [
+                {
+                    "type": self._resource_type(ri, spec.cluster, spec.namespace, r),
+                    "name": r.name,
+                    "sha256sum": r.sha256sum(),
+                }
+                for r in oc_resources
+            ],
+        }
+
+    def _populate_unchanged_target(
+        self, spec: TargetSpec, ri: ResourceInventory
+    ) -> Optional[str]:
+        """Add the current resources of a target as its desired resources,
+        if neither its inputs nor its resources changed since the last
+        deployment. Returns the commit sha of the target in that case."""
+        if not self.state:
+            return None
+        deployment_state = self.state.get(
+            f"{DEPLOYMENT_STATE_PREFIX}/{spec.state_key}", None
+        )
+        if not deployment_state:
+            return None
+
+        try:
+            commit_sha, fingerprint = self._target_fingerprint(spec)
+            if fingerprint != deployment_state["fingerprint"]:
+                return None
+            images = deployment_state["images"]
+            if self._image_digests(images, spec.image_auth) != images:
+                return None
+        except Exception as e:
+            logging.debug(
+                f"[{spec.saas_file_name}/{spec.resource_template_name}] "
+                + f"unable to compare inputs of {spec.cluster}/{spec.namespace}: {e}"
+            )
+            return None
+
+        # the resources must still be on the cluster as they were applied
+        current = []
+        for r in deployment_state["resources"]:
+            c_item = ri.get_current(spec.cluster, spec.namespace, r["type"], r["name"])
+            if (
+                c_item is None
+                or c_item.caller != spec.saas_file_name
+                or not c_item.has_qontract_annotations()
+                or c_item.body["metadata"]["annotations"]["qontract.sha256sum"]
+                != r["sha256sum"]
+                or not c_item.has_valid_sha256sum()
+            ):
+                return None
+            current.append((r, c_item))
+
+        for r, c_item in current:
+            try:
+                ri.add_desired(
+                    spec.cluster,
+                    spec.namespace,
+                    r["type"],
+                    r["name"],
+                    c_item,
+                    privileged=spec.privileged,
+                )
+            except ResourceKeyExistsError:
+                ri.register_error()
+                logging.error(
+                    f"[{spec.cluster}/{spec.namespace}] desired item "
+                    + f"already exists: {r['type']}/{r['name']}. "
+                    + f"saas file name: {spec.saas_file_name}, "
+                    + "resource template name: "
+                    + f"{spec.resource_template_name}."
+                )
+
+        logging.info(
+            f"[{spec.saas_file_name}/{spec.resource_template_name}] "
+            + f"{spec.cluster}/{spec.namespace} is unchanged, skipping rendering"
+        )
+        return commit_sha
+
+    def save_deployment_states(self) -> None:
+        """Store the inputs of all rendered targets, to skip them next time."""
+        if not self.state:
+            raise Exception("state is not initialized")
+
+        for key, deployment_state in self._deployment_states.items():
+            self.state[f"{DEPLOYMENT_STATE_PREFIX}/{key}"] = deployment_state
+
     def get_diff(
         self, trigger_type: TriggerTypes, dry_run: bool
     ) -> tuple[
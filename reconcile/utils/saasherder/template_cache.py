@@ -0,0 +1,108 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections.abc import Callable
+from typing import (
+    Any,
+    Optional,
+    TypeVar,
+)
+
+import yaml
+
+from reconcile.utils.cache_helpers import (
+    SingleFlight,
+    write_atomically,
+)
+
+SAASHERDER_TEMPLATE_CACHE_DIR = os.environ.get("SAASHERDER_TEMPLATE_CACHE_DIR")
+
+T = TypeVar("T")
+
+
+class TemplateCache:
+    """Thread-safe cache for the git lookups of a SaasHerder run.
+
+    Resolved commit shas are keyed by (url, ref) and only live as long as
+    the cache instance, since refs move. File and directory contents are
+    keyed by (url, path, commit sha) and are parsed once. A commit never
+    changes, so if a directory is given, raw contents are also persisted
+    there and reused by subsequent runs.
+
+    Concurrent lookups of the same key are only done once, all other
+    callers wait for the result.
+    """
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.directory = directory
+        self._lock = threading.Lock()
+        # values are wrapped in a tuple, parsed YAML might be None
+        self._values: dict[tuple[str, ...], tuple[Any]] = {}
+        self._single_flight = SingleFlight(self._lock)
+
+    def _get(self, key: tuple[str, ...], compute: Callable[[], T]) -> T:
+        def compute_and_store() -> tuple[T]:
+            value = (compute(),)
+            with self._lock:
+                self._values[key] = value
+            return value
+
+        return self._single_flight.get(
+            key, lambda: self._values.get(key), compute_and_store
+        )[0]
+
+    def commit_sha(self, url: str, ref: str, resolve: Callable[[], str]) -> str:
+        return self._get(("commit_sha", url, ref), resolve)
+
+    def file_contents(
+        self, url: str, path: str, commit_sha: str, fetch: Callable[[], str]
+    ) -> Any:
+        """Return the parsed YAML file, `fetch` returns its raw content."""
+        key = ("file", url, path, commit_sha)
+        parsed = self._get(key, lambda: yaml.safe_load(self._read_through(key, fetch)))
+        # every caller gets its own copy, resources are modified later on
+        return copy.deepcopy(parsed)
+
+    def directory_contents(
+        self,
+        url: str,
+        path: str,
+        commit_sha: str,
+        fetch: Callable[[], list[str]],
+    ) -> list[Any]:
+        """Return the parsed YAML files, `fetch` returns their raw contents."""
+        key = ("directory", url, path, commit_sha)
+        parsed = self._get(
+            key,
+            lambda: [yaml.safe_load(c) for c in self._read_through(key, fetch)],
+        )
+        return copy.deepcopy(parsed)
+
+    def _path(self, key: tuple[str, ...]) -> str:
+        assert self.directory
+        digest = hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}.json")
+
+    def _read_through(self, key: tuple[str, ...], fetch: Callable[[], T]) -> T:
+        if not self.directory:
+            return fetch()
+
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.debug(f"ignoring unreadable template cache entry {path}: {e}")
+
+        value = fetch()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_atomically(path, json.dumps(value).encode("utf-8"))
+        except OSError as e:
+            logging.debug(f"unable to write template cache entry {path}: {e}")
+        return value
@@ -1,6 +1,9 @@
+import hashlib
 import json
 import logging
+import os
 import shutil
+import time
 from collections import defaultdict
 from collections.abc import (
     Iterable,
@@ -36,9 +39,31 @@ from reconcile.utils.external_resource_spec import (
     ExternalResourceSpec,
     ExternalResourceSpecInventory,
 )
+from reconcile.utils.json_stream import JsonArrayStream
+from reconcile.utils.state import (
+    State,
+    init_state,
+)
+from reconcile.utils.terraform_plugin_cache import TerraformPluginCache
 
 ALLOWED_TF_SHOW_FORMAT_VERSION = "0.1"
 DATE_FORMAT = "%Y-%m-%d"
+# providers are downloaded once per provider set into this directory and
+# installed from there for all accounts
+TERRAFORM_PLUGIN_CACHE_DIR = os.environ.get("TERRAFORM_PLUGIN_CACHE_DIR")
+# don't plan accounts whose config and state did not change since their last
+# plan without changes. a full plan still runs every TERRAFORM_FULL_PLAN_INTERVAL
+# seconds, to detect changes made outside of terraform. telling whether the
+# state changed costs a `terraform state pull` per account and run, a single
+# read of the state backend, while a plan refreshes every resource of the
+# account. only runs which are not dry-runs store fingerprints.
+TERRAFORM_SKIP_UNCHANGED_PLANS = os.environ.get(
+    "TERRAFORM_SKIP_UNCHANGED_PLANS", ""
+).lower() in ["true", "yes"]
+TERRAFORM_FULL_PLAN_INTERVAL = int(
+    os.environ.get("TERRAFORM_FULL_PLAN_INTERVAL", 24 * 60 * 60)
+)
+PLAN_FINGERPRINT_STATE_PREFIX = "plan-fingerprints"
 
 
 @dataclass
@@ -62,6 +87,7 @@ class TerraformClient:  # pylint: disable=too-many-public-methods
         thread_pool_size: int,
         aws_api: Optional[AWSApi] = None,
         init_users=False,
+        state: Optional[State] = None,
     ):
         self.integration = integration
         self.integration_version = integration_version
@@ -73,6 +99,16 @@ class TerraformClient:  # pylint: disable=too-many-public-methods
         self._aws_api = aws_api
         self._log_lock = Lock()
         self.should_apply = False
+        self.state = state
+        # a state initialized by the client is cleaned up by it as well
+        self._owns_state = False
+        self._changed_accounts: set[str] = set()
+        self._skipped_plans: set[str] = set()
+        self._plugin_cache = (
+            TerraformPluginCache(TERRAFORM_PLUGIN_CACHE_DIR)
+            if TERRAFORM_PLUGIN_CACHE_DIR
+            else None
+        )
 
         self.init_specs()
         self.init_outputs()
@@ -118,7 +154,10 @@ class TerraformClient:  # pylint: disable=too-many-public-methods
         name = init_spec["name"]
         wd = init_spec["wd"]
         tf = Terraform(working_dir=wd)
-        return_code, stdout, stderr = tf.init()
+        if self._plugin_cache:
+            return_code, stdout, stderr = self._plugin_cache.init(tf, wd)
+        else:
+            return_code, stdout, stderr = tf.init()
         error = self.check_output(name, "init", return_code, stdout, stderr)
         if error:
             raise TerraformCommandError(return_code, "init", out=stdout, err=stderr)
@@ -147,14 +186,18 @@ class TerraformClient:  # pylint: disable=too-many-public-methods
         return name, json.loads(stdout)
 
     # terraform plan
-    def plan(self, enable_deletion):
+    def plan(self, enable_deletion, dry_run=True):
         errors = False
         disabled_deletions_detected = False
+        if TERRAFORM_SKIP_UNCHANGED_PLANS and self.state is None:
+            self.state = init_state(integration=self.integration)
+            self._owns_state = True
         results = threaded.run(
             self.terraform_plan,
             self.specs,
             self.thread_pool_size,
             enable_deletion=enable_deletion,
+            dry_run=dry_run,
         )
 
         self.created_users = []
@@ -168,10 +211,18 @@ class TerraformClient:  # pylint: disable=too-many-public-methods
 
     @retry()
     def terraform_plan(
-        self, plan_spec: dict, enable_deletion: bool
+        self, plan_spec: dict, enable_deletion: bool, dry_run: bool = True
     ) -> tuple[bool, list[AccountUser], bool]:
         name = plan_spec["name"]
         tf = plan_spec["tf"]
+        fingerprint = None
+        if TERRAFORM_SKIP_UNCHANGED_PLANS:
+            fingerprint = self._plan_fingerprint(name, tf)
+            if fingerprint and self._plan_unchanged(name, fingerprint):
+                logging.info(["skip", name, "plan", "config and state unchanged"])
+                self._skipped_plans.add(name)
+                return False, [], False
+
         return_code, stdout, stderr = tf.plan(
             detailed_exitcode=False, parallelism=self.parallelism, out=name
         )
@@ -179,8 +230,51 @@ class TerraformClient:  # pylint: disable=too-many-public-methods
         disabled_deletion_detected, created_users = self.log_plan_diff(
             name, tf, enable_deletion
         )
+        if (
+            fingerprint
+            and not dry_run
+            and not error
+            and not disabled_deletion_detected
+            and name not in self._changed_accounts
+        ):
+            self._store_plan_fingerprint(name, fingerprint)
         return disabled_deletion_detected, created_users, error
 
+    def _plan_fingerprint(self, name: str, tf: Terraform) -> Optional[str]:
+        """Digest of the rendered config and the remote state version."""
+        return_code, stdout, stderr = tf.cmd("state pull")
+        if return_code != 0:
+            logging.warning(f"[{name}] unable to pull terraform state: {stderr}")
+            return None
+        tf_state = json.loads(stdout) if stdout.strip() else {}
+        m = hashlib.sha256()
+        with open(os.path.join(tf.working_dir, "config.tf.json"), "rb") as f:
+            m.update(f.read())
+        m.update(
+            json.dumps([tf_state.get("lineage"), tf_state.get("serial")]).encode(
+                "utf-8"
+            )
+        )
+        return m.hexdigest()
+
+    def _plan_unchanged(self, name: str, fingerprint: str) -> bool:
+        assert self.state
+        last_plan = self.state.get(f"{PLAN_FINGERPRINT_STATE_PREFIX}/{name}", None)
+        if not last_plan or last_plan.get("fingerprint") != fingerprint:
+            return False
+        return time.time() - last_plan["planned_at"] < TERRAFORM_FULL_PLAN_INTERVAL
+
+    def _store_plan_fingerprint(self, name: str, fingerprint: str) -> None:
+        assert self.state
+        self.state[f"{PLAN_FINGERPRINT_STATE_PREFIX}/{name}"] = {
+            "fingerprint": fingerprint,
+            "planned_at": time.time(),
+        }
+
+    def _set_should_apply(self, name: str) -> None:
+        self.should_apply = True
+        self._changed_accounts.add(name)
+
     @staticmethod
     def _resource_diff_changed_fields(
         action: str, change: Mapping[str, Any]
@@ -228,42 +322,6 @@ class TerraformClient:  # pylint: disable=too-many-public-methods
         deletions_allowed = enable_deletion or account_enable_deletion
         created_users: list[AccountUser] = []
 
-        output = self.terraform_show(name, tf.working_dir)
-        format_version = output.get("format_version")
-        if format_version != ALLOWED_TF_SHOW_FORMAT_VERSION:
-            raise NotImplementedError("terraform show untested format version")
-
-        # https://www.terraform.io/docs/internals/json-format.html
-        # Terraform is not yet fully able to
-        # track changes to output values, so the actions indicated may not be
-        # fully accurate, but the "after" value will always be correct.
-        # to overcome the "before" value not being accurate,
-        # we find it in the previously initiated outputs.
-        output_changes = output.get("output_changes", {})
-        for output_name, output_change in output_changes.items():
-            before = self.outputs[name].get(output_name, {}).get("value")
-            after = output_change.get("after")
-            if before != after:
-                logging.info(["update", name, "output", output_name])
-                self.should_apply = True
-
-        # A way to detect deleted outputs is by comparing
-        # the prior state with the output changes.
-        # the output changes do not contain deleted outputs
-        # while the prior state does. for the outputs to
-        # actually be deleted, we should apply.
-        prior_outputs = (
-            output.get("prior_state", {}).get("values", {}).get("outputs", {})
-        )
-        deleted_outputs = [po for po in prior_outputs if po not in output_changes]
-        for output_name in deleted_outputs:
-            logging.info(["delete", name, "output", output_name])
-            self.should_apply = True
-
-        resource_changes = output.get("resource_changes")
-        if resource_changes is None:
-            return disabled_deletion_detected, created_users
-
         always_enabled_deletions = {
             "random_id",
             "aws_lb_target_group_attachment",
@@ -271,7 +329,14 @@ class TerraformClient:  # pylint: disable=too-many-public-methods
         }
 
         # https://www.terraform.io/docs/internals/json-format.html
-        for resource_change in resource_changes:
+        # resource changes are handled one by one while the plan is read,
+        # the other parts of the plan are known once it has been read.
+        plan = self.terraform_show(name, tf.working_dir)
+        format_checked = False
+        for resource_change in plan:
+            if not format_checked:
+                self._check_plan_format_version(plan.top_level)
+                format_checked = True
             resource_type = resource_change["type"]
             resource_name = resource_change["name"]
             resource_change = resource_change["change"]
@@ -303,7 +368,7 @@ class TerraformClient:  # pylint: disable=too-many-public-methods
                             self._resource_diff_changed_fields(action, resource_change),
                         ]
                     )
-                    self.should_apply = True
+                    self._set_should_apply(name)
                 if action == "create":
                     if resource_type == "aws_iam_user_login_profile":
                         created_users.append(AccountUser(name, resource_name))
@@ -333,8 +398,45 @@ class TerraformClient:  # pylint: disable=too-many-public-methods
                                 "deletion_protection to false in a new MR. "
                                 "The new MR must be merged first."
                             )
+
+        if not format_checked:
+            self._check_plan_format_version(plan.top_level)
+
+        # https://www.terraform.io/docs/internals/json-format.html
+        # Terraform is not yet fully able to
+        # track changes to output values, so the actions indicated may not be
+        # fully accurate, but the "after" value will always be correct.
+        # to overcome the "before" value not being accurate,
+        # we find it in the previously initiated outputs.
+        output = plan.top_level
+        output_changes = output.get("output_changes", {})
+        for output_name, output_change in output_changes.items():
+            before = self.outputs[name].get(output_name, {}).get("value")
+            after = output_change.get("after")
+            if before != after:
+                logging.info(["update", name, "output", output_name])
+                self._set_should_apply(name)
+
+        # A way to detect deleted outputs is by comparing
+        # the prior state with the output changes.
+        # the output changes do not contain deleted outputs
+        # while the prior state does. for the outputs to
+        # actually be deleted, we should apply.
+        prior_outputs = (
+            output.get("prior_state", {}).get("values", {}).get("outputs", {})
+        )
+        deleted_outputs = [po for po in prior_outputs if po not in output_changes]
+        for output_name in deleted_outputs:
+            logging.info(["delete", name, "output", output_name])
+            self._set_should_apply(name)
+
         return disabled_deletion_detected, created_users
 
+    @staticmethod
+    def _check_plan_format_version(plan: Mapping[str, Any]) -> None:
+        if plan.get("format_version") != ALLOWED_TF_SHOW_FORMAT_VERSION:
+            raise NotImplementedError("terraform show untested format version")
+
     def deletion_approved(self, account_name, resource_type, resource_name):
         account = self.accounts[account_name]
         deletion_approvals = account.get("deletionApprovals")
@@ -362,8 +464,18 @@ class TerraformClient:  # pylint: disable=too-many-public-methods
         return False
 
     @staticmethod
-    def terraform_show(name, working_dir):
-        return lean_tf.show_json(working_dir, name)
+    def terraform_show(name: str, working_dir: str) -> JsonArrayStream:
+        """Stream the resource changes of a plan, see log_plan_diff for the
+        other parts of the plan that are decoded."""
+        return JsonArrayStream(
+            lean_tf.show_json_chunks(working_dir, name),
+            ("resource_changes",),
+            keep=[
+                ("format_version",),
+                ("output_changes",),
+                ("prior_state", "values", "outputs"),
+            ],
+        )
 
     # terraform apply
     def apply(self):
@@ -379,6 +491,9 @@ class TerraformClient:  # pylint: disable=too-many-public-methods
     def terraform_apply(self, apply_spec):
         name = apply_spec["name"]
         tf = apply_spec["tf"]
+        if name in self._skipped_plans:
+            # nothing to apply, there is no plan
+            return False
         # adding var=None to allow applying the saved plan
         # https://github.com/beelit94/python-terraform/issues/67
         return_code, stdout, stderr = tf.apply(dir_or_plan=name, var=None)
@@ -587,6 +702,8 @@ class TerraformClient:  # pylint: disable=too-many-public-methods
     def cleanup(self):
         if self._aws_api is not None:
             self._aws_api.cleanup()
+        if self.state is not None and self._owns_state:
+            self.state.cleanup()
         for _, wd in self.working_dirs.items():
             shutil.rmtree(wd)
 
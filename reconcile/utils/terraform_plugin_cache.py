@@ -0,0 +1,132 @@
+"""
+Shared provider plugin cache for `terraform init`.
+
+Every working directory created by TerrascriptClient.dump starts empty, so a
+plain `terraform init` downloads and unpacks all providers again for each
+account. `TerraformPluginCache` downloads each set of providers only once
+and installs them from a local directory for all other working directories.
+
+Providers are kept in `providers/` using the unpacked filesystem mirror
+layout, e.g. `registry.terraform.io/hashicorp/aws/3.76.1/linux_amd64/`.
+Working directories are initialized with `-plugin-dir`, so terraform only
+reads from it and concurrent inits are safe. The lock file of a provider set
+is kept in `locks/` and shared by all working directories using that set.
+If it exists, no provider is downloaded at all, also in subsequent runs.
+"""
+import hashlib
+import json
+import logging
+import os
+import platform
+import shutil
+import tempfile
+import threading
+from collections.abc import Mapping
+from contextlib import suppress
+from typing import Any
+
+from python_terraform import Terraform
+
+LOCK_FILE = ".terraform.lock.hcl"
+# number of directory levels below .terraform/providers down to the platform,
+# i.e. hostname/namespace/type/version/os_arch
+_PROVIDER_DEPTH = 5
+
+
+def provider_set(config: Mapping[str, Any]) -> str:
+    """Return a digest of the providers required by a terraform config."""
+    providers = {
+        name: sorted(
+            json.dumps(p.get("version"), sort_keys=True)
+            for p in (blocks if isinstance(blocks, list) else [blocks])
+        )
+        for name, blocks in (config.get("provider") or {}).items()
+    }
+    required = (config.get("terraform") or {}).get("required_providers") or {}
+    m = hashlib.sha256()
+    m.update(
+        json.dumps(
+            [providers, required, platform.system(), platform.machine()],
+            sort_keys=True,
+        ).encode("utf-8")
+    )
+    return m.hexdigest()
+
+
+class TerraformPluginCache:
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.plugin_dir = os.path.join(directory, "providers")
+        self._lock = threading.Lock()
+        self._seed_locks: dict[str, threading.Lock] = {}
+
+    def _lock_file(self, providers: str) -> str:
+        return os.path.join(self.directory, "locks", f"{providers}{LOCK_FILE}")
+
+    def _seed_lock(self, providers: str) -> threading.Lock:
+        with self._lock:
+            return self._seed_locks.setdefault(providers, threading.Lock())
+
+    def init(self, tf: Terraform, working_dir: str) -> tuple[int, str, str]:
+        """Run `terraform init` in working_dir, installing providers from
+        the cache if possible. Returns the result of the init command."""
+        with open(os.path.join(working_dir, "config.tf.json")) as f:
+            providers = provider_set(json.load(f))
+        lock_file = self._lock_file(providers)
+
+        # the first working dir of a provider set populates the cache,
+        # all others wait for it and install from the cache in parallel
+        with self._seed_lock(providers):
+            if not os.path.exists(lock_file):
+                return_code, stdout, stderr = tf.init()
+                if return_code == 0:
+                    self._store(working_dir, lock_file)
+                return return_code, stdout, stderr
+
+        shutil.copyfile(lock_file, os.path.join(working_dir, LOCK_FILE))
+        return_code, stdout, stderr = tf.init(plugin_dir=self.plugin_dir)
+        if return_code != 0:
+            logging.warning(
+                f"unable to install providers from {self.plugin_dir}, "
+                f"downloading them: {stderr}"
+            )
+            with suppress(FileNotFoundError):
+                os.remove(os.path.join(working_dir, LOCK_FILE))
+            return_code, stdout, stderr = tf.init()
+        return return_code, stdout, stderr
+
+    def _store(self, working_dir: str, lock_file: str) -> None:
+        """Copy the providers installed in working_dir into the cache."""
+        try:
+            installed = os.path.join(working_dir, ".terraform", "providers")
+            staging = os.path.join(self.directory, "staging")
+            for root, dirs, _ in os.walk(installed, followlinks=True):
+                rel = os.path.relpath(root, installed)
+                if rel.count(os.sep) + 1 < _PROVIDER_DEPTH:
+                    continue
+                # root is a provider platform directory, don't descend
+                dirs.clear()
+                target = os.path.join(self.plugin_dir, rel)
+                if os.path.exists(target):
+                    continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                # copy aside and rename, so concurrent runs never see
+                # partially copied providers
+                os.makedirs(staging, exist_ok=True)
+                tmp = tempfile.mkdtemp(dir=staging)
+                try:
+                    shutil.copytree(root, tmp, dirs_exist_ok=True)
+                    os.rename(tmp, target)
+                except OSError:
+                    shutil.rmtree(tmp, ignore_errors=True)
+                    if not os.path.exists(target):
+                        raise
+
+            # the lock file marks a complete provider set, write it last
+            os.makedirs(os.path.dirname(lock_file), exist_ok=True)
+            fd, tmp_lock_file = tempfile.mkstemp(dir=os.path.dirname(lock_file))
+            os.close(fd)
+            shutil.copyfile(os.path.join(working_dir, LOCK_FILE), tmp_lock_file)
+            os.replace(tmp_lock_file, lock_file)
+        except OSError as e:
+            logging.warning(f"unable to populate plugin cache {self.directory}: {e}")
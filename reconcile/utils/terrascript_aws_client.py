@@ -1,4 +1,5 @@
 import base64
+import copy
 import enum
 import imghdr
 import json
@@ -421,6 +422,8 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
         self.jenkins_map: dict[str, JenkinsApi] = {}
         self.jenkins_lock = Lock()
         self._resource_cache: dict[str, dict[str, str]] = {}
+        # parsed resource contents by path, handed out as copies (see get_values)
+        self._values_cache: dict[str, dict[str, Any]] = {}
         if prefetch_resources_by_schemas:
             for schema in prefetch_resources_by_schemas:
                 self._resource_cache.update(self.prefetch_resources(schema))
@@ -1262,6 +1265,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
         Populates the terraform configuration from resource specs.
         :param ocm_map:
         """
+        self.prefetch_defaults()
         for specs in self.account_resource_specs.values():
             for spec in specs:
                 self.populate_tf_resources(spec, ocm_map=ocm_map)
@@ -3901,6 +3905,27 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
         gqlapi = gql.get_api()
         return {r["path"]: r for r in gqlapi.get_resources_by_schema(schema)}
 
+    def prefetch_defaults(self) -> None:
+        """
+        Fetch all defaults files referenced by the resource specs in a single
+        query, instead of one query per path while populating resources.
+        """
+        paths = set()
+        for specs in self.account_resource_specs.values():
+            for spec in specs:
+                resource = spec.resource
+                for key in ("defaults", "parameter_group"):
+                    if resource.get(key):
+                        paths.add(resource[key])
+                for s in resource.get("specs") or []:
+                    if s.get("defaults"):
+                        paths.add(s["defaults"])
+        paths -= self._resource_cache.keys()
+        if not paths:
+            return
+        gqlapi = gql.get_api()
+        self._resource_cache.update(gqlapi.get_resources(paths))
+
     def get_raw_values(self, path) -> dict[str, str]:
         if path in self._resource_cache:
             return self._resource_cache[path]
@@ -3910,9 +3935,15 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
             raw_values = gqlapi.get_resource(path)
         except gql.GqlGetResourceError as e:
             raise FetchResourceError(str(e))
+        self._resource_cache[path] = raw_values
         return raw_values
 
     def get_values(self, path: str) -> dict[str, Any]:
+        # callers modify the values they get, so every call returns a copy
+        # of the cached values instead of parsing the content again
+        if path in self._values_cache:
+            return copy.deepcopy(self._values_cache[path])
+
         raw_values = self.get_raw_values(path)
         try:
             values = anymarkup.parse(raw_values["content"], force_types=None)
@@ -3920,7 +3951,8 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
         except anymarkup.AnyMarkupError:
             e_msg = "Could not parse data. Skipping resource: {}"
             raise FetchResourceError(e_msg.format(path))
-        return values
+        self._values_cache[path] = values
+        return copy.deepcopy(values)
 
     @staticmethod
     def get_dependencies(tf_resources: Iterable[Resource]) -> list[str]: